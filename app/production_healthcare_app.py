@@ -17,7 +17,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from healthcare_database_manager_sqlserver import HealthcareDatabaseManager
-from healthcare_chatbot_service import HealthcareResponseGenerator, HealthcareConversationManager
+from healthcare_chatbot_service import HealthcareResponseGenerator, HealthcareConversationManager, release_response
 from natural_language_processor import HealthcareQueryProcessor
 from dotenv import load_dotenv
 
@@ -159,31 +159,34 @@ def chat():
         conv_manager.update_context('last_user_input', user_message)
         conv_manager.update_context('last_activity', datetime.now().timestamp())
         
-        # Save user message to database
-        db_session_id = conv_manager.get_context('db_session_id')
-        if db_session_id:
-            try:
-                db_manager.save_chat_message(db_session_id, 'user', user_message)
-            except Exception as e:
-                logger.warning(f"Failed to save user message: {str(e)}")
-        
         # Generate response using sophisticated booking flow
-        response = chatbot.generate_response(user_message, conv_manager)
-        
-        # Save bot response to database
+        db_session_id = conv_manager.get_context('db_session_id')
+        try:
+            response = chatbot.generate_response(user_message, conv_manager)
+        except Exception:
+            # Still log the user's turn if no response comes of it
+            if db_session_id:
+                try:
+                    db_manager.save_chat_message(db_session_id, 'user', user_message)
+                except Exception as e:
+                    logger.warning(f"Failed to save user message: {str(e)}")
+            raise
+        
+        # Save the user message and bot response to database together
         if db_session_id:
             try:
-                db_manager.save_chat_message(
-                    db_session_id, 'bot', response.message, 
-                    response.intent, json.dumps(response.entities)
-                )
+                db_manager.save_chat_messages([
+                    (db_session_id, 'user', user_message, None, None),
+                    (db_session_id, 'bot', response.message,
+                     response.intent, json.dumps(response.entities)),
+                ])
             except Exception as e:
-                logger.warning(f"Failed to save bot response: {str(e)}")
+                logger.warning(f"Failed to save chat messages: {str(e)}")
         
         # Log conversation for monitoring
         logger.info(f"Chat - Session: {session_id[:8]}, Intent: {response.intent}, Step: {response.booking_step}")
         
-        return jsonify({
+        payload = jsonify({
             'session_id': session_id,
             'response': response.message,
             'suggestions': response.suggestions,
@@ -195,6 +198,10 @@ def chat():
             'timestamp': datetime.now().isoformat()
         })
         
+        # Serialized, so the response object can be recycled
+        release_response(response)
+        return payload
+        
     except Exception as e:
         error_id = str(uuid.uuid4())[:8]
         logger.error(f"Chat error {error_id}: {str(e)}", exc_info=True)
@@ -488,6 +495,32 @@ def admin_sessions():
         logger.error(f"Admin sessions error: {str(e)}", exc_info=True)
         return jsonify({'error': 'Failed to get session information'}), 500
 
+@app.route('/api/admin/cache-stats')
+def admin_cache_stats():
+    """Hit-rate statistics for the chatbot's message classification caches"""
+    try:
+        return jsonify({
+            'caches': chatbot.get_cache_stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Admin cache stats error: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Failed to get cache statistics'}), 500
+
+@app.route('/api/admin/db-health')
+def admin_db_health():
+    """Query concurrency and latency percentiles for chatbot database access"""
+    try:
+        return jsonify({
+            'database': chatbot.db_health.stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Admin DB health error: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Failed to get database health'}), 500
+
 # ============================================================================
 # HEALTH CHECK AND MONITORING
 # ============================================================================
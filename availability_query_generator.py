@@ -4,9 +4,12 @@ Handles complex employee availability queries with metadata filtering
 Uses Ollama LLM for intelligent query generation
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Any, Tuple
+import hashlib
 import re
+import threading
 
 # Import model configuration and LLM
 from model_config import CHAT_MODEL, get_chat_model_config
@@ -22,6 +25,25 @@ except ImportError:
     LLM_AVAILABLE = False
 
 
+def inline_sql_params(sql_query: str, params: Tuple[Any, ...]) -> str:
+    """Substitute bound ? parameters back into SQL as literals, for display and logging"""
+    if not params:
+        return sql_query
+    pieces = sql_query.split('?')
+    if len(pieces) != len(params) + 1:
+        raise ValueError(f"Expected {len(pieces) - 1} parameters, got {len(params)}")
+    
+    literals = []
+    for value in params:
+        if isinstance(value, (date, datetime)):
+            value = value.strftime('%Y-%m-%d')
+        if isinstance(value, str):
+            literals.append("'" + value.replace("'", "''") + "'")
+        else:
+            literals.append(str(value))
+    return ''.join(piece + literal for piece, literal in zip(pieces, literals + ['']))
+
+
 class AvailabilityQueryGenerator:
     """Generate SQL queries for employee availability based on complex criteria"""
     
@@ -55,13 +77,27 @@ class AvailabilityQueryGenerator:
             metadata: Dict containing filters like gender, site_id, today's date
             
         Returns:
-            SQL query string
+            SQL query string with every filter value inlined
+        """
+        return inline_sql_params(*self.generate_parameterized_availability_query(query_text, metadata))
+    
+    def generate_parameterized_availability_query(self, query_text: str,
+                                                  metadata: Dict[str, Any]) -> Tuple[str, Tuple[Any, ...]]:
+        """
+        Generate SQL for employee availability with filter values as ? parameters
+        
+        Rule-based SQL keeps one text per set of filters present, so SQL Server
+        reuses its cached execution plan across weekdays, genders and dates.
+        LLM-generated SQL has its values inlined and comes back with no params.
+        
+        Returns:
+            (SQL query string, parameter tuple for cursor.execute)
         """
         
         # Try LLM-based generation first if available
         if self.llm_available and self.chat_model:
             try:
-                return self._generate_with_llm(query_text, metadata)
+                return self._generate_with_llm(query_text, metadata), ()
             except Exception as e:
                 print(f"⚠️ LLM generation failed, falling back to rule-based: {e}")
         
@@ -156,8 +192,8 @@ Filters: {{filters}}"""),
         
         return sql_query.strip()
     
-    def _generate_rule_based(self, query_text: str, metadata: Dict[str, Any]) -> str:
-        """Generate SQL using rule-based approach (fallback)"""
+    def _generate_rule_based(self, query_text: str, metadata: Dict[str, Any]) -> Tuple[str, Tuple[Any, ...]]:
+        """Generate parameterized SQL using rule-based approach (fallback)"""
         
         # Parse the request
         target_weekday = self._extract_weekday(query_text)
@@ -191,9 +227,9 @@ WITH AvailableEmployees AS (
         -- Calculate next occurrence of target weekday
         DATEADD(day, 
             CASE 
-                WHEN {target_weekday} >= DATEPART(weekday, GETDATE()) 
-                THEN {target_weekday} - DATEPART(weekday, GETDATE())
-                ELSE 7 - DATEPART(weekday, GETDATE()) + {target_weekday}
+                WHEN ? >= DATEPART(weekday, GETDATE()) 
+                THEN ? - DATEPART(weekday, GETDATE())
+                ELSE 7 - DATEPART(weekday, GETDATE()) + ?
             END, 
             CAST(GETDATE() AS DATE)
         ) as NextAvailableDate
@@ -202,10 +238,10 @@ WITH AvailableEmployees AS (
     LEFT JOIN Site s ON e.SiteId = s.SiteId
     LEFT JOIN Gender g ON e.Gender = g.GenderID
     WHERE e.Active = 1
-        AND ead.WeekDay = {target_weekday}  -- Target weekday (Wednesday = 3)
+        AND ead.WeekDay = ?  -- Target weekday (Wednesday = 3)
         AND (ead.AvailabilityDateFrom IS NULL OR ead.AvailabilityDateFrom <= DATEADD(day, {date_range_days}, GETDATE()))
         AND (ead.AvailabilityDateTo IS NULL OR ead.AvailabilityDateTo >= GETDATE())
-        {"AND g.Name = '" + gender + "'" if gender else ""}
+        {"AND g.Name = ?" if gender else ""}
 ),
 ConflictingAppointments AS (
     SELECT 
@@ -250,7 +286,7 @@ SELECT DISTINCT
     END as AvailableHours
 FROM AvailableEmployees ae
 LEFT JOIN ConflictingAppointments ca ON ae.EmployeeId = ca.EmployeeId
-WHERE ae.NextAvailableDate <= '{end_date.strftime('%Y-%m-%d')}'
+WHERE ae.NextAvailableDate <= ?
 ORDER BY 
     CASE 
         WHEN ISNULL(ca.ConflictCount, 0) = 0 THEN 1  -- Fully available first
@@ -261,7 +297,13 @@ ORDER BY
     ae.FirstName ASC;
 """
         
-        return query.strip()
+        # Bound in the order the placeholders appear
+        params = [target_weekday] * 4
+        if gender:
+            params.append(gender)
+        params.append(end_date.date())
+        
+        return query.strip(), tuple(params)
     
     def _extract_weekday(self, text: str) -> int:
         """Extract weekday number from text (1=Monday, 7=Sunday)"""
@@ -328,6 +370,112 @@ ORDER BY e.FirstName, ead.AvailableFrom;
         return query.strip()
 
 
+class AvailabilityPlanCache:
+    """LRU cache of generated availability SQL keyed by request fingerprint
+    
+    Each fingerprint moves through three states. MONITOR: seen, with an
+    EWMA of how long generating its SQL takes. ACTIVE: seen often enough
+    and expensive enough to keep its SQL. BYPASS: generation is cheaper
+    than caching is worth (e.g. rule-based SQL), so it is never stored.
+    One-off requests therefore never evict hot plans.
+    """
+    
+    MONITOR = "monitor"
+    ACTIVE = "active"
+    BYPASS = "bypass"
+    
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 promote_after: int = 2, min_cost_ms: float = 1.0, ewma_alpha: float = 0.3):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.promote_after = promote_after
+        self.min_cost_ms = min_cost_ms
+        self.ewma_alpha = ewma_alpha
+        self.hits = 0
+        self.misses = 0
+        
+        # fingerprint -> (SQL, bound parameters)
+        self._plans: "OrderedDict[str, Tuple[str, Tuple[Any, ...]]]" = OrderedDict()
+        self._plan_bytes = 0
+        # fingerprint -> [state, times seen, EWMA generation cost in ms]
+        self._templates: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def fingerprint(query_text: str, metadata: Dict[str, Any]) -> str:
+        """Hash of the normalized request, its filters and today's date"""
+        # Digits stay in the text: times of day aren't captured in metadata
+        # and the LLM may embed them in the SQL. The date is part of the key
+        # because the generated SQL bakes in a date range.
+        normalized = " ".join(query_text.lower().split())
+        filters = sorted((key, str(value)) for key, value in metadata.items())
+        key = f"{normalized}|{filters}|{date.today().isoformat()}"
+        return hashlib.md5(key.encode('utf-8')).hexdigest()
+    
+    def get(self, fingerprint: str) -> Optional[Tuple[str, Tuple[Any, ...]]]:
+        """Cached (SQL, params) for an ACTIVE fingerprint, else None"""
+        with self._lock:
+            plan = self._plans.get(fingerprint)
+            if plan is None:
+                self.misses += 1
+                return None
+            self._plans.move_to_end(fingerprint)
+            self._templates.move_to_end(fingerprint)
+            self.hits += 1
+            return plan
+    
+    def record(self, fingerprint: str, plan: Tuple[str, Tuple[Any, ...]], cost_ms: float):
+        """Account for a freshly generated plan and cache it once it qualifies"""
+        with self._lock:
+            template = self._templates.get(fingerprint)
+            if template is None:
+                template = [self.MONITOR, 0, cost_ms]
+                self._templates[fingerprint] = template
+                while len(self._templates) > self.max_entries * 4:
+                    evicted, _ = self._templates.popitem(last=False)
+                    self._drop_plan(evicted)
+            else:
+                self._templates.move_to_end(fingerprint)
+                template[2] += self.ewma_alpha * (cost_ms - template[2])
+            template[1] += 1
+            
+            if template[2] < self.min_cost_ms:
+                template[0] = self.BYPASS
+            elif template[1] >= self.promote_after:
+                template[0] = self.ACTIVE
+            else:
+                template[0] = self.MONITOR
+            
+            if template[0] != self.ACTIVE:
+                self._drop_plan(fingerprint)
+                return
+            
+            self._drop_plan(fingerprint)
+            self._plans[fingerprint] = plan
+            self._plan_bytes += len(plan[0])
+            while self._plans and (len(self._plans) > self.max_entries or self._plan_bytes > self.max_bytes):
+                evicted, (evicted_sql, _) = self._plans.popitem(last=False)
+                self._plan_bytes -= len(evicted_sql)
+                evicted_template = self._templates.get(evicted)
+                if evicted_template is not None:
+                    evicted_template[0] = self.MONITOR
+    
+    def _drop_plan(self, fingerprint: str):
+        """Remove a cached plan, if any (caller holds the lock)"""
+        plan = self._plans.pop(fingerprint, None)
+        if plan is not None:
+            self._plan_bytes -= len(plan[0])
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters in the same shape as functools cache_info()"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'maxsize': self.max_entries,
+            'currsize': len(self._plans)
+        }
+
+
 # Singleton instance
 availability_query_generator = None
 
@@ -0,0 +1,111 @@
+"""
+Database Connection Pool
+Keeps warm pyodbc connections to SQL Server for reuse across requests,
+bounded in size and probed before reuse after sitting idle
+"""
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+import pyodbc
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Connections are pooled here, not by the ODBC driver manager (unixODBC's
+# pool leaks handles); only takes effect before the first pyodbc.connect
+pyodbc.pooling = False
+
+# Connection pool bounds: opened up front, most open at once, and seconds a
+# connection may sit idle before it is probed with SELECT 1 on checkout
+SQL_POOL_MIN_SIZE = int(os.getenv('SQL_POOL_MIN_SIZE', '0'))
+SQL_POOL_MAX_SIZE = int(os.getenv('SQL_POOL_MAX_SIZE', '10'))
+SQL_POOL_MAX_IDLE = float(os.getenv('SQL_POOL_MAX_IDLE', '300'))
+
+# Seconds a checkout waits for a connection when all max_size are in use
+SQL_POOL_TIMEOUT = float(os.getenv('SQL_POOL_TIMEOUT', '30'))
+
+
+class ConnectionPoolExhaustedError(RuntimeError):
+    """Raised when no pooled connection frees up within the pool timeout"""
+
+
+class ConnectionPool:
+    """Bounded LIFO pool of open pyodbc connections made by one connect callable"""
+
+    def __init__(self, connect: Callable[[], pyodbc.Connection], min_size: int = SQL_POOL_MIN_SIZE,
+                 max_size: int = SQL_POOL_MAX_SIZE, max_idle: float = SQL_POOL_MAX_IDLE,
+                 timeout: float = SQL_POOL_TIMEOUT):
+        self.connect = connect
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+
+        # (connection, time it was returned); LIFO so the warmest is reused
+        # and rarely used extras go idle long enough to be probed
+        self._idle = queue.LifoQueue(maxsize=max_size)
+        # One slot per connection checked out or being opened
+        self._slots = threading.BoundedSemaphore(max_size)
+
+        for _ in range(min(min_size, max_size)):
+            self._idle.put((self.connect(), time.monotonic()))
+
+    @contextmanager
+    def acquire(self):
+        """Check out a connection for the block; it is discarded if the block raises"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise ConnectionPoolExhaustedError(
+                f"All {self.max_size} database connections busy for {self.timeout}s")
+
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        try:
+            yield conn
+        except Exception:
+            self._discard(conn)
+            raise
+        else:
+            self._idle.put((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def _checkout(self) -> pyodbc.Connection:
+        """An idle connection that still answers, or a new one"""
+        while True:
+            try:
+                conn, returned_at = self._idle.get_nowait()
+            except queue.Empty:
+                return self.connect()
+
+            if time.monotonic() - returned_at < self.max_idle:
+                return conn
+            try:
+                conn.execute("SELECT 1").fetchone()
+                return conn
+            except pyodbc.Error:
+                self._discard(conn)
+
+    @staticmethod
+    def _discard(conn: pyodbc.Connection):
+        """Close a connection that won't go back in the pool"""
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
@@ -0,0 +1,21 @@
+"""
+Database Parameter Binding
+Python-side parsing and pyodbc input sizes for parameters bound against the
+healthcare SQL Server schema, shared by both database managers
+"""
+
+from datetime import datetime
+
+import pyodbc
+
+# Parameter binding for Appointment.ScheduledDate (a datetime column): native
+# timestamp with datetime's precision, so the column is compared as-is
+# rather than converted to datetime2 to match the parameter
+SCHEDULED_DATE_INPUT = (pyodbc.SQL_TYPE_TIMESTAMP, 23, 3)
+
+
+def as_datetime(value) -> datetime:
+    """datetime for an ISO date/time string ('T' or space separated), or the value itself"""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).strip())
@@ -0,0 +1,117 @@
+"""
+Database Pool Health
+Bounds how many chatbot queries hit SQL Server at once and keeps rolling
+latency percentiles for the ones that do
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Concurrent queries allowed before callers queue; pool_size + max_overflow
+DB_POOL_SIZE = int(os.getenv('HEALTHCARE_DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('HEALTHCARE_DB_MAX_OVERFLOW', '10'))
+
+# Seconds a query waits for a free slot before failing instead of piling up
+DB_POOL_TIMEOUT = float(os.getenv('HEALTHCARE_DB_POOL_TIMEOUT', '30'))
+
+# Number of recent query latencies the percentiles are computed over
+LATENCY_WINDOW = 1000
+
+
+class DBPoolExhaustedError(RuntimeError):
+    """Raised when no query slot frees up within the pool timeout"""
+
+
+class DBPoolHealth:
+    """Concurrency gate plus rolling latency percentiles for database queries"""
+
+    def __init__(self, pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_MAX_OVERFLOW,
+                 timeout: float = DB_POOL_TIMEOUT, window: int = LATENCY_WINDOW):
+        self.max_connections = pool_size + max_overflow
+        self.timeout = timeout
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.total_queries = 0
+        self.failed_queries = 0
+        self.exhausted = 0
+
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._latencies_ms = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        """Hold a query slot for the duration of the block and time it"""
+        timeout = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self.exhausted += 1
+            raise DBPoolExhaustedError(
+                f"All {self.max_connections} database query slots busy for {timeout}s")
+
+        with self._lock:
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.in_use -= 1
+                self.total_queries += 1
+                self.failed_queries += failed
+                self._latencies_ms.append(elapsed_ms)
+            self._slots.release()
+
+    def percentiles(self) -> Dict[str, float]:
+        """p50/p95/p99 over the latency window, in milliseconds"""
+        with self._lock:
+            samples = sorted(self._latencies_ms)
+        if not samples:
+            return {'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0}
+
+        last = len(samples) - 1
+        return {
+            'p50_ms': round(samples[int(last * 0.50)], 2),
+            'p95_ms': round(samples[int(last * 0.95)], 2),
+            'p99_ms': round(samples[int(last * 0.99)], 2)
+        }
+
+    def stats(self) -> Dict[str, float]:
+        """Slot usage, failure counters and latency percentiles"""
+        with self._lock:
+            stats = {
+                'max_connections': self.max_connections,
+                'in_use': self.in_use,
+                'peak_in_use': self.peak_in_use,
+                'total_queries': self.total_queries,
+                'failed_queries': self.failed_queries,
+                'exhausted': self.exhausted
+            }
+        stats.update(self.percentiles())
+        return stats
+
+
+# Global instance shared by every chatbot query path
+_db_pool_health = None
+_health_init_lock = threading.Lock()
+
+
+def get_db_pool_health() -> DBPoolHealth:
+    """Get or create the global database pool health tracker"""
+    global _db_pool_health
+    if _db_pool_health is None:
+        with _health_init_lock:
+            if _db_pool_health is None:
+                _db_pool_health = DBPoolHealth()
+    return _db_pool_health
@@ -0,0 +1,36 @@
+"""
+Database Row Fetching
+Materializes pyodbc result sets in fetchmany batches, shared by the database
+managers and the chatbot's generated-SQL path
+"""
+
+import os
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Rows pulled from the driver per fetchmany call. Batching keeps at most this
+# many pyodbc rows alive next to the built dicts instead of the whole result
+# set twice; the name searches and lookups (TOP 10-200) fit in one call
+SQL_FETCH_BATCH_SIZE = int(os.getenv('SQL_FETCH_BATCH_SIZE', '256'))
+
+
+def iter_rows(cursor, batch_size: int = SQL_FETCH_BATCH_SIZE) -> Iterator[Any]:
+    """Yield a cursor's remaining rows, fetching them batch_size at a time"""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def fetch_dicts(cursor, columns: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Remaining rows of the cursor's result set as column-name dicts
+
+    Pass columns to reuse names already read from cursor.description.
+    """
+    if columns is None:
+        columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in iter_rows(cursor)]
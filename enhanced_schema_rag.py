@@ -4,8 +4,10 @@ Retrieves complete table schemas directly from the database to ensure accurate c
 Uses Ollama LLM for intelligent SQL query generation
 """
 
+import functools
 import json
 import logging
+import threading
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, field
 import re
@@ -360,6 +362,12 @@ class EnhancedSchemaRAG:
             print(f"⚠️ Warning: Could not generate embedding: {e}")
             return [0.0] * 384
 
+    def embed_query(self, text: str) -> Optional[List[float]]:
+        """Embed free text with the schema embedding model, or None if no model is loaded"""
+        if not self.embedding_model:
+            return None
+        return self._get_embedding(text)
+
     def _create_complete_table_text(self, table_schema: DatabaseTable) -> str:
         """Create comprehensive text representation of complete table schema"""
         text_parts = [
@@ -660,20 +668,24 @@ Generate a precise SQL query for: {user_query}"""),
                     return table.table_name
         
         # Default priority order
-        priority_order = ["Appointment", "Patient", "Employee", "Auth", "Location"]
+        priority_order = ("Appointment", "Patient", "Employee", "Auth", "Location")
+        by_name = {t.table_name: t for t in tables}
         for table_name in priority_order:
-            if any(t.table_name == table_name for t in tables):
+            if table_name in by_name:
                 return table_name
         
         return tables[0].table_name if tables else "Patient"
 
 
-# Singleton instance for the enhanced schema RAG
-enhanced_schema_rag = None
+# One enhanced schema RAG per database manager. The lock keeps concurrent
+# first requests from each building (and then discarding) an instance.
+_rag_init_lock = threading.Lock()
+
+@functools.cache
+def _build_rag(db_manager) -> EnhancedSchemaRAG:
+    return EnhancedSchemaRAG(db_manager)
 
 def get_enhanced_schema_rag(db_manager) -> EnhancedSchemaRAG:
     """Get or create the enhanced schema RAG instance"""
-    global enhanced_schema_rag
-    if enhanced_schema_rag is None:
-        enhanced_schema_rag = EnhancedSchemaRAG(db_manager)
-    return enhanced_schema_rag
+    with _rag_init_lock:
+        return _build_rag(db_manager)
@@ -3,9 +3,41 @@
 Query generator for employee availability search
 """
 
+from functools import lru_cache
+from typing import List, Tuple
+
 from dynamic_schema_manager import get_dynamic_schema_manager
 from sql_schema_parser import create_schema_parser
 
+# Columns returned by the availability queries
+AVAILABILITY_SELECT_COLUMNS = [
+    "e.EmployeeId",
+    "e.FirstName",
+    "e.LastName",
+    "e.Email",
+    "e.PhoneCell",
+    "e.Title",
+    "s.Name AS SiteName",
+    "g.GenderType",
+    "ead.WeekDay",
+    "ead.AvailableFrom",
+    "ead.AvailableTo",
+    "ead.AvailabilityDateFrom",
+    "ead.AvailabilityDateTo"
+]
+
+# Names per batched availability query: two bound parameters each keeps a
+# batch under SQL Server's 2100-parameter limit
+AVAILABILITY_BATCH_MAX_NAMES = 1000
+
+@lru_cache(maxsize=4096)
+def parse_employee_name(employee_name: str) -> Tuple[str, str]:
+    """Split an employee name into (first, last); last is empty for single names"""
+    name_parts = employee_name.strip().split()
+    first_name = name_parts[0] if name_parts else ""
+    last_name = name_parts[-1] if len(name_parts) > 1 else ""
+    return first_name, last_name
+
 def get_availability_query_for_employee(employee_name: str):
     """Generate SQL query for employee availability"""
     print(f"=== Generating Availability Query for '{employee_name}' ===\n")
@@ -83,31 +115,13 @@ def generate_employee_availability_sql(employee_name: str, tables: dict) -> str:
     """Generate SQL for employee availability search"""
     
     # Parse employee name
-    name_parts = employee_name.strip().split()
-    first_name = name_parts[0] if name_parts else ""
-    last_name = name_parts[-1] if len(name_parts) > 1 else ""
+    first_name, last_name = parse_employee_name(employee_name)
     
     # Base query structure
     sql_parts = []
     
     # SELECT clause
-    select_cols = [
-        "e.EmployeeId",
-        "e.FirstName",
-        "e.LastName",
-        "e.Email",
-        "e.PhoneCell",
-        "e.Title",
-        "s.Name AS SiteName",
-        "g.GenderType",
-        "ead.WeekDay",
-        "ead.AvailableFrom",
-        "ead.AvailableTo",
-        "ead.AvailabilityDateFrom",
-        "ead.AvailabilityDateTo"
-    ]
-    
-    sql_parts.append(f"SELECT {', '.join(select_cols)}")
+    sql_parts.append(f"SELECT {', '.join(AVAILABILITY_SELECT_COLUMNS)}")
     
     # FROM clause with JOINs
     sql_parts.append("FROM Employee e")
@@ -147,6 +161,54 @@ def generate_employee_availability_sql(employee_name: str, tables: dict) -> str:
     
     return "\n".join(sql_parts)
 
+def generate_employee_availability_sql_batch(names: List[str]) -> List[Tuple[str, tuple]]:
+    """Generate parameterized SQL for the availability of several employees
+
+    The names are bound through a VALUES row constructor, so a shift planner
+    asking for N employees issues one round trip per AVAILABILITY_BATCH_MAX_NAMES
+    names instead of N queries. Each name matches like
+    generate_employee_availability_sql: a single name is a substring of the
+    first or last name, a full name needs both parts. Returns (sql, params)
+    pairs to pass to ``execute_query`` in order.
+    """
+    # Parse each name once and drop duplicates while keeping caller order
+    name_pairs = []
+    for name in names:
+        pair = parse_employee_name(name)
+        if pair[0] and pair not in name_pairs:
+            name_pairs.append(pair)
+    
+    if not name_pairs:
+        raise ValueError("At least one employee name is required")
+    
+    return [
+        _availability_batch_sql(name_pairs[start:start + AVAILABILITY_BATCH_MAX_NAMES])
+        for start in range(0, len(name_pairs), AVAILABILITY_BATCH_MAX_NAMES)
+    ]
+
+def _availability_batch_sql(name_pairs: List[Tuple[str, str]]) -> Tuple[str, tuple]:
+    """SQL and params for one batch of parsed (first, last) names"""
+    values_rows = ", ".join("(?, ?)" for _ in name_pairs)
+    params = tuple(part for pair in name_pairs for part in pair)
+    
+    sql_parts = [
+        f"SELECT {', '.join(AVAILABILITY_SELECT_COLUMNS)}",
+        "FROM Employee e",
+        "LEFT JOIN EmployeeAvailabilityDateTime ead ON e.EmployeeId = ead.EmployeeId",
+        "LEFT JOIN Gender g ON e.Gender = g.GenderID",
+        "LEFT JOIN Site s ON e.SiteId = s.SiteId",
+        "WHERE EXISTS (",
+        f"    SELECT 1 FROM (VALUES {values_rows}) AS n(FirstName, LastName)",
+        "    WHERE (n.LastName = '' AND (e.FirstName LIKE '%' + n.FirstName + '%' OR e.LastName LIKE '%' + n.FirstName + '%'))",
+        "       OR (n.LastName <> '' AND e.FirstName LIKE '%' + n.FirstName + '%' AND e.LastName LIKE '%' + n.LastName + '%')",
+        ")",
+        "AND e.Active = 1",
+        "AND (ead.AvailabilityStatusId IS NULL OR ead.AvailabilityStatusId = 1)",
+        "ORDER BY e.LastName, e.FirstName, ead.WeekDay, ead.AvailableFrom"
+    ]
+    
+    return "\n".join(sql_parts), params
+
 def test_specific_query():
     """Test the specific query from the user"""
     print("=== Testing Specific Query: 'get me the availibility of jon snow' ===\n")
@@ -3,80 +3,87 @@
 Generate optimized SQL query for specific employee availability on a specific day
 """
 
+import logging
+
 from dynamic_schema_manager import get_dynamic_schema_manager
-from sql_schema_parser import create_schema_parser
+from generate_availability_query import parse_employee_name
 
-def generate_wednesday_availability_query(employee_name: str = "jon snow"):
-    """Generate SQL for Wednesday availability specifically"""
-    print(f"=== Wednesday Availability Query for '{employee_name}' ===\n")
-    
-    # Initialize components
-    manager = get_dynamic_schema_manager()
-    parser = create_schema_parser()
-    
-    # Get the relevant tables
-    key_tables = ['Employee', 'EmployeeAvailabilityDateTime', 'Gender', 'Site']
-    table_info = {}
-    
-    for table_name in key_tables:
-        table_data = manager.current_schema.get(table_name)
-        if table_data:
-            table_info[table_name] = table_data
-    
-    print("1. Valid Tables Identified:")
-    for table_name, table_data in table_info.items():
-        print(f"   ✅ {table_name}: {len(table_data['columns'])} columns")
-        if table_data.get('foreign_keys'):
-            print(f"      Foreign Keys: {len(table_data['foreign_keys'])}")
-            for fk in table_data['foreign_keys']:
-                print(f"        • {fk['column']} → {fk['references_table']}.{fk['references_column']}")
-    
-    print("\n2. Query Requirements Analysis:")
-    print("   • Employee name search: FirstName LIKE '%jon%' AND LastName LIKE '%snow%'")
-    print("   • Day filter: WeekDay = 4 (Wednesday, where 1=Sunday, 4=Wednesday)")
-    print("   • Active employee filter: Active = 1")
-    print("   • Availability status: AvailabilityStatusId = 1 or NULL")
-    print("   • Include: Contact info, site, gender, availability times")
+logger = logging.getLogger(__name__)
+
+# Columns every availability caller consumes
+_MINIMAL_SELECT = ("e.EmployeeId", "ead.AvailableFrom", "ead.AvailableTo")
+
+# Optional column groups, selected through the ``include`` flags
+_INCLUDE_COLUMNS = {
+    'contact': ("e.FirstName", "e.LastName", "e.Email", "e.PhoneCell", "e.Title", "e.NPI"),
+    'site': ("s.Name AS SiteName",),
+    'gender': ("g.GenderType",),
+    'schedule': ("ead.AvailabilityDateFrom", "ead.AvailabilityDateTo", "ead.TotalDesiredHourPerWeek")
+}
+
+# Joins needed only when the matching column group is selected
+_INCLUDE_JOINS = {
+    'site': "LEFT JOIN Site s ON e.SiteId = s.SiteId",
+    'gender': "LEFT JOIN Gender g ON e.Gender = g.GenderID"
+}
+
+DEFAULT_INCLUDE = ('contact', 'site', 'gender', 'schedule')
+
+# Readable day name for queries spanning several weekdays (1=Sunday)
+_DAY_CASE_SQL = """CASE ead.WeekDay
+        WHEN 1 THEN 'Sunday'
+        WHEN 2 THEN 'Monday'
+        WHEN 3 THEN 'Tuesday'
+        WHEN 4 THEN 'Wednesday'
+        WHEN 5 THEN 'Thursday'
+        WHEN 6 THEN 'Friday'
+        WHEN 7 THEN 'Saturday'
+        ELSE 'Unknown'
+    END AS DayName"""
+
+_DAY_NAMES = {1: 'Sunday', 2: 'Monday', 3: 'Tuesday', 4: 'Wednesday', 5: 'Thursday', 6: 'Friday', 7: 'Saturday'}
+
+def _day_name_column(week_day: int = None) -> str:
+    """DayName column: a constant literal when the weekday is pinned, else the CASE"""
+    if week_day is None:
+        return _DAY_CASE_SQL
+    return f"N'{_DAY_NAMES[week_day]}' AS DayName"
+
+def _build_select(include) -> tuple:
+    """Return the SELECT column list and extra JOINs for the requested column groups"""
+    unknown = set(include) - set(_INCLUDE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown include flags: {', '.join(sorted(unknown))}")
     
-    print("\n3. Generated SQL Query:")
+    columns = list(_MINIMAL_SELECT)
+    joins = []
+    for flag in DEFAULT_INCLUDE:
+        if flag in include:
+            columns.extend(_INCLUDE_COLUMNS[flag])
+            if flag in _INCLUDE_JOINS:
+                joins.append(_INCLUDE_JOINS[flag])
+    return columns, joins
+
+def generate_wednesday_query(employee_name: str, include=DEFAULT_INCLUDE) -> str:
+    """Generate SQL for an employee's Wednesday availability
     
-    # Parse employee name
-    name_parts = employee_name.strip().split()
-    first_name = name_parts[0] if name_parts else ""
-    last_name = name_parts[-1] if len(name_parts) > 1 else ""
+    ``include`` selects the optional column groups ('contact', 'site',
+    'gender', 'schedule'); EmployeeId and the availability window are
+    always returned.
+    """
+    first_name, last_name = parse_employee_name(employee_name)
     
-    # Generate optimized SQL for Wednesday availability
+    # WeekDay is pinned by the WHERE clause, so DayName is a literal rather
+    # than a per-row CASE.
+    select_columns, extra_joins = _build_select(include)
+    select_columns.append(_day_name_column(4))
+    select_sql = ",\n    ".join(select_columns)
+    joins_sql = "".join(f"\n{join}" for join in extra_joins)
     sql_query = f"""
 SELECT 
-    e.EmployeeId,
-    e.FirstName,
-    e.LastName,
-    e.Email,
-    e.PhoneCell,
-    e.Title,
-    e.NPI,
-    s.Name AS SiteName,
-    g.GenderType,
-    ead.WeekDay,
-    ead.AvailableFrom,
-    ead.AvailableTo,
-    ead.AvailabilityDateFrom,
-    ead.AvailabilityDateTo,
-    ead.TotalDesiredHourPerWeek,
-    CASE 
-        WHEN ead.WeekDay = 4 THEN 'Wednesday'
-        WHEN ead.WeekDay = 1 THEN 'Sunday'
-        WHEN ead.WeekDay = 2 THEN 'Monday'
-        WHEN ead.WeekDay = 3 THEN 'Tuesday'
-        WHEN ead.WeekDay = 5 THEN 'Thursday'
-        WHEN ead.WeekDay = 6 THEN 'Friday'
-        WHEN ead.WeekDay = 7 THEN 'Saturday'
-        ELSE 'Unknown'
-    END AS DayName
+    {select_sql}
 FROM Employee e
-LEFT JOIN EmployeeAvailabilityDateTime ead ON e.EmployeeId = ead.EmployeeId
-LEFT JOIN Gender g ON e.Gender = g.GenderID
-LEFT JOIN Site s ON e.SiteId = s.SiteId
+LEFT JOIN EmployeeAvailabilityDateTime ead ON e.EmployeeId = ead.EmployeeId{joins_sql}
 WHERE 
     (e.FirstName LIKE '%{first_name}%' AND e.LastName LIKE '%{last_name}%')
     AND e.Active = 1
@@ -89,20 +96,14 @@ ORDER BY
     e.FirstName, 
     ead.AvailableFrom"""
     
-    print(sql_query)
-    
-    print("\n4. Query Features:")
-    print("   ✅ Uses exact table/column names from schema")
-    print("   ✅ Filters for Wednesday (WeekDay = 4)")
-    print("   ✅ Includes proper JOINs based on foreign key relationships")
-    print("   ✅ Filters for active employees only")
-    print("   ✅ Includes availability status validation")
-    print("   ✅ Shows readable day name via CASE statement")
-    print("   ✅ Orders results logically")
-    
-    print("\n5. Alternative Query (All Days for Jon Snow):")
+    logger.debug("Generated Wednesday availability SQL for %r:%s", employee_name, sql_query)
+    return sql_query
+
+def generate_all_days_query(employee_name: str) -> str:
+    """Generate SQL for an employee's availability across all weekdays"""
+    first_name, last_name = parse_employee_name(employee_name)
     
-    all_days_query = f"""
+    sql_query = f"""
 SELECT 
     e.EmployeeId,
     e.FirstName,
@@ -112,16 +113,7 @@ SELECT
     e.Title,
     s.Name AS SiteName,
     g.GenderType,
-    CASE 
-        WHEN ead.WeekDay = 1 THEN 'Sunday'
-        WHEN ead.WeekDay = 2 THEN 'Monday'
-        WHEN ead.WeekDay = 3 THEN 'Tuesday'
-        WHEN ead.WeekDay = 4 THEN 'Wednesday'
-        WHEN ead.WeekDay = 5 THEN 'Thursday'
-        WHEN ead.WeekDay = 6 THEN 'Friday'
-        WHEN ead.WeekDay = 7 THEN 'Saturday'
-        ELSE 'Unknown'
-    END AS DayName,
+    {_day_name_column()},
     ead.AvailableFrom,
     ead.AvailableTo,
     DATEDIFF(MINUTE, ead.AvailableFrom, ead.AvailableTo) AS AvailableMinutes
@@ -140,6 +132,56 @@ ORDER BY
     ead.WeekDay,
     ead.AvailableFrom"""
     
+    logger.debug("Generated all-days availability SQL for %r:%s", employee_name, sql_query)
+    return sql_query
+
+def generate_wednesday_availability_query(employee_name: str = "jon snow", include=DEFAULT_INCLUDE):
+    """CLI report: print the Wednesday and all-days queries with schema context"""
+    print(f"=== Wednesday Availability Query for '{employee_name}' ===\n")
+    
+    # Initialize components
+    manager = get_dynamic_schema_manager()
+    
+    # Get the relevant tables
+    key_tables = ['Employee', 'EmployeeAvailabilityDateTime', 'Gender', 'Site']
+    table_info = {}
+    
+    for table_name in key_tables:
+        table_data = manager.current_schema.get(table_name)
+        if table_data:
+            table_info[table_name] = table_data
+    
+    print("1. Valid Tables Identified:")
+    for table_name, table_data in table_info.items():
+        print(f"   ✅ {table_name}: {len(table_data['columns'])} columns")
+        if table_data.get('foreign_keys'):
+            print(f"      Foreign Keys: {len(table_data['foreign_keys'])}")
+            for fk in table_data['foreign_keys']:
+                print(f"        • {fk['column']} → {fk['references_table']}.{fk['references_column']}")
+    
+    print("\n2. Query Requirements Analysis:")
+    print("   • Employee name search: FirstName LIKE '%jon%' AND LastName LIKE '%snow%'")
+    print("   • Day filter: WeekDay = 4 (Wednesday, where 1=Sunday, 4=Wednesday)")
+    print("   • Active employee filter: Active = 1")
+    print("   • Availability status: AvailabilityStatusId = 1 or NULL")
+    print("   • Include: Contact info, site, gender, availability times")
+    
+    print("\n3. Generated SQL Query:")
+    sql_query = generate_wednesday_query(employee_name, include)
+    print(sql_query)
+    
+    print("\n4. Query Features:")
+    print("   ✅ Uses exact table/column names from schema")
+    print("   ✅ Filters for Wednesday (WeekDay = 4)")
+    print("   ✅ Includes proper JOINs based on foreign key relationships")
+    print("   ✅ Filters for active employees only")
+    print("   ✅ Includes availability status validation")
+    print("   ✅ Selects only the requested column groups")
+    print("   ✅ Day name is a constant literal (no per-row CASE)")
+    print("   ✅ Orders results logically")
+    
+    print("\n5. Alternative Query (All Days for Jon Snow):")
+    all_days_query = generate_all_days_query(employee_name)
     print(all_days_query)
     
     return sql_query, all_days_query, table_info
@@ -3,12 +3,24 @@ Healthcare Chatbot Service
 Contains the main conversation management and response generation classes
 """
 
+import atexit
+import copy
 import json
+import logging
+import os
+import queue
 import re
+import sys
+import threading
 import time
+from collections import deque
 from datetime import datetime, timedelta
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+from contextlib import contextmanager
+from dataclasses import MISSING, dataclass, field, fields
+from functools import cached_property, lru_cache
+from itertools import islice
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 from enum import Enum
 
 from ai_chatbot_tools import HealthcareToolsRegistry, ToolType
@@ -17,10 +29,14 @@ from healthcare_database_manager_sqlserver import HealthcareDatabaseManager
 from healthcare_schema_rag import get_healthcare_schema_rag
 from enhanced_schema_rag import get_enhanced_schema_rag
 from dynamic_schema_manager import get_dynamic_schema_manager
-from availability_query_generator import get_availability_query_generator
+from availability_query_generator import AvailabilityPlanCache, get_availability_query_generator
 from enhanced_availability_query_processor import get_availability_query_processor
 # Import working availability query function
 from generate_availability_query import get_availability_query_for_employee, generate_employee_availability_sql
+from semantic_response_cache import SemanticResponseCache
+from query_result_cache import QueryResultCache, get_query_result_cache, is_read_only_sql, tables_in_sql
+from db_rows import fetch_dicts
+from db_pool_health import get_db_pool_health
 
 # WebSocket for real-time chain of thoughts
 try:
@@ -31,6 +47,347 @@ except ImportError:
     get_chain_of_thoughts_ws = None
     WEBSOCKET_AVAILABLE = False
 
+# Compact JSON encoder for log entries: orjson when installed, else stdlib
+try:
+    import orjson
+    
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj, default=str).decode()
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, default=str)
+
+# Recycle ChatResponse objects through a freelist. Only safe when callers
+# are finished with a response once it has been sent (see release_response)
+RESPONSE_POOL_ENABLED = os.getenv('CHATBOT_RESPONSE_POOL', 'False').lower() == 'true'
+RESPONSE_POOL_SIZE = 64
+
+# Reuse the response to a semantically similar recent question. Answers are
+# shared across sessions (only within the same intent, entities, filters and
+# ids), so this stays opt-in
+SEMANTIC_RESPONSE_CACHE_ENABLED = os.getenv('CHATBOT_SEMANTIC_CACHE', 'False').lower() == 'true'
+
+# Writes to these tables never change an answer, so they don't clear cached responses
+_CHAT_LOG_TABLES = frozenset({'chatsession', 'chatmessage'})
+
+# Generated availability SQL is reused for this long per employee name, so
+# schema changes still reach new queries
+AVAILABILITY_SQL_TTL_SECONDS = 60
+
+# The schema file is re-parsed for changes at most this often; general
+# queries in between assume it is unchanged
+SCHEMA_CHECK_TTL_SECONDS = 60
+
+# Messages kept per conversation; older ones are dropped
+MAX_HISTORY_ENTRIES = 200
+
+# Most queued thoughts/queries the background log writer handles per wake-up
+LOG_WRITER_BATCH_SIZE = 64
+
+# Queued after everything else by close(); the log writer exits when it reaches it
+_LOG_WRITER_STOP = None
+
+
+# Intent patterns, in match-priority order (most frequent intent first)
+INTENT_PATTERNS = {
+    'check_availability': [
+        r'check.*availabilit',
+        r'is.*available',
+        r'free.*time',
+        r'when.*available',
+        r'schedule.*for',
+        r'get.*availability',
+        r'show.*availability',
+        r'availability.*of',
+        r'find.*availability'
+    ],
+    'book_appointment': [
+        r'book.*appointment',
+        r'schedule.*appointment',
+        r'make.*appointment',
+        r'reserve.*time',
+        r'set.*appointment'
+    ],
+    'find_provider': [
+        r'find.*therapist',
+        r'find.*doctor',
+        r'show.*therapist',
+        r'list.*provider',
+        r'who.*specializes'
+    ],
+    'get_appointments': [
+        r'my.*appointment',
+        r'show.*appointment',
+        r'list.*appointment',
+        r'upcoming.*appointment'
+    ],
+    'cancel_appointment': [
+        r'cancel.*appointment',
+        r'remove.*appointment',
+        r'delete.*appointment'
+    ]
+}
+
+# Intent names interned, so the names reported by the master regex below are
+# the same objects as the intent literals compared against elsewhere
+INTENTS = {intent: sys.intern(intent) for intent in (*INTENT_PATTERNS, 'general_query')}
+
+# Every intent compiled into one master regex so a single match call
+# classifies the message. Each branch is an anchored lookahead that searches
+# the whole message followed by an empty named group, so the branch order
+# stays the match priority instead of whichever pattern occurs leftmost.
+# Matching is case-insensitive so the message never needs to be lowercased.
+_MASTER_INTENT_RE = re.compile(
+    "^(?:" + "|".join(
+        rf"(?=[\s\S]*?(?:{'|'.join(patterns)}))(?P<{intent}>)"
+        for intent, patterns in INTENT_PATTERNS.items()
+    ) + ")",
+    re.IGNORECASE
+)
+
+# Entity extraction patterns
+_NAME_RE = re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b')
+# Day name -> date.weekday() index
+_WEEKDAY_INDEX = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6
+}
+_WEEKDAYS = frozenset(_WEEKDAY_INDEX)
+# EmployeeAvailabilityDateTime.WeekDay value (1=Sunday .. 7=Saturday) -> day name
+_DAY_NAMES = {
+    1: 'Sunday', 2: 'Monday', 3: 'Tuesday', 4: 'Wednesday',
+    5: 'Thursday', 6: 'Friday', 7: 'Saturday'
+}
+_WEEKDAY_NAME_RE = re.compile('|'.join(_WEEKDAY_INDEX))
+_DATE_WORDS = _WEEKDAYS | {'today', 'tomorrow', 'yesterday'}
+_DIGITS_RE = re.compile(r'\d+')
+# Words (split at any non-word character, so "today's" and "monday-friday"
+# still yield their day words) and whole numeric dates
+_DATE_TOKEN_RE = re.compile(r'(?P<numeric>\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b)|\w+')
+# Employee-name phrasings in priority order: "availability of [name]",
+# "get me the availability of [name]", "show [name] availability" and
+# "when is [name] available", fused the same way as the intent regex
+_EMPLOYEE_NAME_PATTERNS = (
+    r'availability\s+of\s+(?P<name1>[a-zA-Z\s]+)',
+    r'get.*availability.*of\s+(?P<name2>[a-zA-Z\s]+)',
+    r'show\s+(?P<name3>[a-zA-Z\s]+)\s+availability',
+    r'when\s+is\s+(?P<name4>[a-zA-Z\s]+)\s+available',
+)
+_EMPLOYEE_NAME_RE = re.compile(
+    "^(?:" + "|".join(rf"(?=[\s\S]*?{pattern})" for pattern in _EMPLOYEE_NAME_PATTERNS) + ")"
+)
+# "[name] schedule", and names after common keywords; both need a check on
+# the captured text so they stay separate
+_SCHEDULE_NAME_RE = re.compile(r'([a-zA-Z\s]+)\s+schedule')
+_KEYWORD_NAME_RES = tuple(re.compile(rf'{keyword}\s+([a-zA-Z\s]+)') for keyword in ('for', 'of', 'with'))
+# Availability filters, each fused in priority order like the patterns above:
+# site/location id, and target day or date
+_SITE_ID_RE = re.compile(
+    r'^(?:(?=[\s\S]*?site\s*(?P<site1>\d+))'
+    r'|(?=[\s\S]*?location\s*(?P<site2>\d+))'
+    r'|(?=[\s\S]*?siteid\s*(?P<site3>\d+)))'
+)
+_TARGET_DATE_RE = re.compile(
+    r'^(?:(?=[\s\S]*?(?P<date1>monday|tuesday|wednesday|thursday|friday|saturday|sunday))'
+    r'|(?=[\s\S]*?(?P<date2>\d{4}-\d{2}-\d{2}))'
+    r'|(?=[\s\S]*?(?P<date3>\d{1,2}[-/]\d{1,2}[-/]\d{2,4})))'
+)
+# Role and specialty filters, first listed keyword wins
+_ROLE_KEYWORDS = ('therapist', 'doctor', 'nurse', 'specialist', 'counselor')
+_ROLE_RE = re.compile(
+    "^(?:" + "|".join(rf"(?=[\s\S]*?(?P<role{i}>{keyword}))" for i, keyword in enumerate(_ROLE_KEYWORDS)) + ")"
+)
+_METADATA_SPECIALTIES = ('physical therapy', 'mental health', 'occupational therapy', 'speech therapy')
+_METADATA_SPECIALTY_RE = re.compile(
+    "^(?:" + "|".join(rf"(?=[\s\S]*?(?P<spec{i}>{keyword}))" for i, keyword in enumerate(_METADATA_SPECIALTIES)) + ")"
+)
+_TIME_RE = re.compile(r'\b(\d{1,2}:\d{2}(?:\s*[ap]m)?|\d{1,2}\s*[ap]m)\b', re.IGNORECASE)
+
+# Query intent labels for result formatting, in priority order, fused into
+# one case-insensitive regex with the same anchored-lookahead layout as
+# _MASTER_INTENT_RE (keywords still match anywhere, e.g. "booking")
+_QUERY_INTENT_KEYWORDS = (
+    ('availability check', ('available', 'availability', 'free', 'open')),
+    ('appointment booking', ('book', 'schedule', 'appointment')),
+    ('provider search', ('therapist', 'provider', 'doctor', 'specialist')),
+    ('appointment modification', ('cancel', 'reschedule', 'change'))
+)
+_QUERY_INTENT_LABELS = {f"intent{i}": label for i, (label, _) in enumerate(_QUERY_INTENT_KEYWORDS)}
+_QUERY_INTENT_RE = re.compile(
+    "^(?:" + "|".join(
+        rf"(?=[\s\S]*?(?:{'|'.join(words)}))(?P<intent{i}>)"
+        for i, (_, words) in enumerate(_QUERY_INTENT_KEYWORDS)
+    ) + ")",
+    re.IGNORECASE
+)
+
+# Therapy specialty keywords. Every keyword sits in one alternation inside a
+# lookahead, so a single finditer pass reports the keyword starting at each
+# position (no keyword is a prefix of another specialty's keyword, so none
+# is shadowed) and the specialties come from a keyword lookup.
+SPECIALTY_KEYWORDS = {
+    'anxiety': ['anxiety', 'anxious', 'worry', 'panic'],
+    'depression': ['depression', 'depressed', 'sad', 'mood'],
+    'trauma': ['trauma', 'ptsd', 'abuse'],
+    'family': ['family', 'couples', 'marriage', 'relationship'],
+    'addiction': ['addiction', 'substance', 'alcohol', 'drug']
+}
+_SPECIALTY_BY_KEYWORD = {
+    keyword: specialty for specialty, keywords in SPECIALTY_KEYWORDS.items() for keyword in keywords
+}
+_SPECIALTY_ORDER = {specialty: i for i, specialty in enumerate(SPECIALTY_KEYWORDS)}
+_SPECIALTY_RE = re.compile("(?=(" + "|".join(_SPECIALTY_BY_KEYWORD) + "))")
+
+
+def setup_chatbot_logging():
+    """Configure root logging once, writing through a background queue listener
+
+    Like basicConfig, this leaves an already-configured root logger alone.
+    Otherwise log calls only enqueue the record and a QueueListener thread
+    does the file and console writes.
+    """
+    if getattr(setup_chatbot_logging, "_done", False):
+        return
+    setup_chatbot_logging._done = True
+    
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [logging.FileHandler('healthcare_chatbot.log'), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+
+
+@lru_cache(maxsize=1024)
+def _classify_intent(message: str) -> str:
+    """Return the first intent whose patterns match the message"""
+    match = _MASTER_INTENT_RE.match(message)
+    return INTENTS[match.lastgroup] if match else INTENTS['general_query']
+
+
+@lru_cache(maxsize=2048)
+def _query_intent(query: str) -> str:
+    """Result-formatting intent label for a query"""
+    match = _QUERY_INTENT_RE.match(query)
+    return _QUERY_INTENT_LABELS[match.lastgroup] if match else "general information"
+
+
+@lru_cache(maxsize=1024)
+def _extract_entity_items(message: str) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """Extract entities as a hashable tuple of (entity, values) pairs"""
+    items = []
+    
+    # Date and time references are reported lowercased
+    message_lower = message.lower()
+    
+    # Extract names (simple pattern). Names need a capital letter, so skip
+    # the regex scan entirely when lowercasing changed nothing
+    if message_lower != message:
+        names = tuple(match.group(0) for match in _NAME_RE.finditer(message))
+        if names:
+            items.append(('names', names))
+    
+    # Extract dates: day words are set lookups on the message's words, only
+    # numeric dates need a regex
+    date_references = []
+    previous, previous_end = '', 0
+    for match in _DATE_TOKEN_RE.finditer(message_lower):
+        token = match.group(0)
+        if match.group('numeric'):
+            date_references.append(token)
+        elif token in _DATE_WORDS:
+            # "next monday" only when nothing but whitespace separates them
+            if (token in _WEEKDAYS and previous == 'next'
+                    and message_lower[previous_end:match.start()].isspace()):
+                token = f"next {token}"
+            date_references.append(token)
+        previous, previous_end = match.group(0), match.end()
+    if date_references:
+        items.append(('date_references', tuple(date_references)))
+    
+    # Extract times
+    times = _TIME_RE.findall(message_lower)
+    if times:
+        items.append(('times', tuple(times)))
+    
+    return tuple(items)
+
+
+@lru_cache(maxsize=4096)
+def _availability_metadata_items(message_lower: str) -> Tuple[Tuple[str, Any], ...]:
+    """Availability filters (gender, site, date, role, specialty) in a lowercased
+    message, as a hashable tuple of (filter, value) pairs"""
+    metadata = {}
+    
+    # Extract gender filter
+    if 'male' in message_lower and 'female' not in message_lower:
+        metadata['gender'] = 'Male'
+    elif 'female' in message_lower and 'male' not in message_lower:
+        metadata['gender'] = 'Female'
+    
+    # Extract site/location filter
+    match = _SITE_ID_RE.match(message_lower)
+    if match:
+        metadata['site_id'] = int(match.group(match.lastgroup))
+    
+    # Extract date filter (look for Wednesday, specific dates, etc.)
+    match = _TARGET_DATE_RE.match(message_lower)
+    if match:
+        metadata['target_date'] = match.group(match.lastgroup)
+    
+    # Extract role/position filter
+    match = _ROLE_RE.match(message_lower)
+    if match:
+        metadata['role'] = match.group(match.lastgroup).title()
+    
+    # Extract specialty filter
+    match = _METADATA_SPECIALTY_RE.match(message_lower)
+    if match:
+        metadata['specialty'] = match.group(match.lastgroup)
+    
+    return tuple(metadata.items())
+
+
+def extract_availability_metadata_batch(messages: Iterable[str]) -> List[Dict[str, Any]]:
+    """Availability filters for many messages, e.g. when replaying chat logs offline
+
+    Each message is lowercased once, and repeated messages are served from
+    the same cache as live chat turns.
+    """
+    return [dict(_availability_metadata_items(message.lower())) for message in messages]
+
+
+def _compose_name(result: Dict[str, Any]) -> str:
+    """Display name of a provider row: provider_name, else first and last name"""
+    name = result.get('provider_name')
+    if name:
+        return name
+    return f"{result.get('first_name', '')} {result.get('last_name', '')}".strip()
+
+
+@lru_cache(maxsize=256)
+def _cached_availability_sql(normalized_name: str, ttl_bucket: int) -> Tuple[str, Dict[str, Any]]:
+    """Availability SQL and schema tables; ttl_bucket expires the entry"""
+    return get_availability_query_for_employee(normalized_name)
+
+
+def get_availability_sql(employee_name: str) -> Tuple[str, Dict[str, Any]]:
+    """Availability SQL for an employee, cached per normalized name"""
+    # "Jon Snow", "jon snow" and "Jon  Snow" share an entry; the generated
+    # LIKE filters are case-insensitive on SQL Server
+    normalized_name = " ".join(employee_name.lower().split())
+    return _cached_availability_sql(normalized_name, int(time.time()) // AVAILABILITY_SQL_TTL_SECONDS)
+
 
 class BookingStep(Enum):
     """Enumeration of booking steps"""
@@ -47,7 +404,7 @@ class BookingStep(Enum):
     COMPLETED = "completed"
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatResponse:
     """Response from the healthcare chatbot"""
     message: str
@@ -73,9 +430,110 @@ class ChatResponse:
             self.suggestions = self.suggested_actions
         elif self.suggestions and not self.suggested_actions:
             self.suggested_actions = self.suggestions
+    
+    def reset(self):
+        """Restore every field to its default, reusing the list objects"""
+        for response_field in fields(self):
+            if response_field.default_factory is not MISSING:
+                getattr(self, response_field.name).clear()
+            elif response_field.default is not MISSING:
+                setattr(self, response_field.name, response_field.default)
+            else:
+                setattr(self, response_field.name, "")
+
+
+_response_pool: "queue.LifoQueue[ChatResponse]" = queue.LifoQueue(maxsize=RESPONSE_POOL_SIZE)
+
+
+def acquire_response(message: str, **values) -> ChatResponse:
+    """Build a ChatResponse, reusing a pooled one when pooling is enabled"""
+    if RESPONSE_POOL_ENABLED:
+        try:
+            response = _response_pool.get_nowait()
+        except queue.Empty:
+            pass
+        else:
+            response.message = message
+            for name, value in values.items():
+                setattr(response, name, value)
+            response.__post_init__()
+            return response
+    return ChatResponse(message=message, **values)
+
+
+def release_response(response: ChatResponse):
+    """Return a response to the pool once the caller has finished sending it"""
+    if not RESPONSE_POOL_ENABLED:
+        return
+    response.reset()
+    try:
+        _response_pool.put_nowait(response)
+    except queue.Full:
+        pass
+
+
+@contextmanager
+def borrow_response(message: str, **values):
+    """Context manager around acquire_response/release_response"""
+    response = acquire_response(message, **values)
+    try:
+        yield response
+    finally:
+        release_response(response)
+
+
+# (message, intent, suggestions) for _create_fallback_response. Kept as
+# plain tuples rather than shared ChatResponse instances, since responses
+# are reset and reused by the response pool.
+_FALLBACK_DB_ERROR = (
+    "I'm having trouble accessing some database tables. This might be a temporary issue. Please try again in a moment, or I can help you with general information about our services.",
+    "database_error",
+    ("Try again later", "Ask about our services", "Contact support", "Book appointment manually")
+)
+_FALLBACK_CONN_ERROR = (
+    "I'm experiencing connection issues with our database. Please try your request again, or I can provide general assistance.",
+    "connection_error",
+    ("Try again", "Check your connection", "Contact support", "Ask general questions")
+)
+_FALLBACK_GENERIC = (
+    "I encountered an unexpected issue while processing your request. Our technical team has been notified. Please try again or contact support.",
+    "general_error",
+    ("Try rephrasing", "Contact support", "Try again later", "Ask different question")
+)
+
+# Suggested actions for handler errors that don't name their own
+_DEFAULT_ERROR_ACTIONS = ("Try again", "Contact support")
+
+
+def _handler_response(message: str, status: str, actions: Iterable[str], cot: List[str],
+                      session: Optional[str], values: Dict[str, Any]) -> ChatResponse:
+    """Single construction site for the query handlers' responses"""
+    # Actions are passed as tuples; the response gets its own list
+    return acquire_response(message, status=status, suggested_actions=list(actions),
+                            chain_of_thoughts=cot, websocket_session_id=session, **values)
+
+
+def _success_response(message: str, *, actions: Iterable[str], cot: List[str],
+                      session: Optional[str] = None, **values) -> ChatResponse:
+    """Handler response for a query that returned results"""
+    return _handler_response(message, "success", actions, cot, session, values)
+
+
+def _no_results_response(message: str, *, actions: Iterable[str], cot: List[str],
+                         session: Optional[str] = None, **values) -> ChatResponse:
+    """Handler response for a query that ran but matched nothing"""
+    return _handler_response(message, "no_results", actions, cot, session, values)
+
 
+def _error_response(message: str, *, error: str, cot: List[str], session: Optional[str] = None,
+                    actions: Iterable[str] = _DEFAULT_ERROR_ACTIONS, status: str = "error",
+                    data: Optional[Dict[str, Any]] = None, **values) -> ChatResponse:
+    """Handler response for a failure; data always carries the error first"""
+    values['data'] = {'error': error, **(data or {})}
+    return _handler_response(message, status, actions, cot, session, values)
 
-@dataclass
+
+@dataclass(slots=True)
 class BookingContext:
     """Context for booking flow management"""
     step: BookingStep = BookingStep.INITIAL
@@ -91,13 +549,42 @@ class BookingContext:
     search_criteria: Dict[str, Any] = field(default_factory=dict)
 
 
+@dataclass(slots=True)
+class HistoryEntry:
+    """One conversation message; the timestamp is epoch nanoseconds"""
+    role: str
+    message: str
+    ts_ns: int
+    
+    def as_dict(self) -> Dict[str, str]:
+        """The entry with its timestamp rendered as ISO 8601"""
+        return {
+            'role': self.role,
+            'message': self.message,
+            'timestamp': datetime.fromtimestamp(self.ts_ns / 1e9).isoformat()
+        }
+
+
+@dataclass(slots=True)
+class QueryResult:
+    """Outcome of executing a generated availability query"""
+    success: bool
+    results: List[Dict[str, Any]]
+    sql_query: str
+    execution_time: float
+    chain_of_thoughts: List[str]
+    confidence_score: float = 0.0
+    error_message: Optional[str] = None
+    schema_analysis: Dict[str, Any] = field(default_factory=dict)
+
+
 class HealthcareConversationManager:
     """Manages conversation state and booking context"""
     
     def __init__(self):
         self.context = {}
         self.booking_context = BookingContext()
-        self.conversation_history = []
+        self.conversation_history = deque(maxlen=MAX_HISTORY_ENTRIES)
         
     def update_context(self, key: str, value: Any):
         """Update conversation context"""
@@ -113,11 +600,11 @@ class HealthcareConversationManager:
     
     def add_to_history(self, role: str, message: str):
         """Add message to conversation history"""
-        self.conversation_history.append({
-            'role': role,
-            'message': message,
-            'timestamp': datetime.now().isoformat()
-        })
+        self.conversation_history.append(HistoryEntry(role, message, time.time_ns()))
+    
+    def as_dicts(self) -> List[Dict[str, str]]:
+        """Conversation history as plain dicts with ISO 8601 timestamps"""
+        return [entry.as_dict() for entry in self.conversation_history]
     
     def reset_booking_context(self):
         """Reset booking context for new booking"""
@@ -127,100 +614,131 @@ class HealthcareConversationManager:
 class HealthcareResponseGenerator:
     """Generates intelligent responses for healthcare conversations"""
     
+    # Result formatter for each query intent label, each called as
+    # formatter(results, query); anything else gets the generic
+    # schema-context formatting
+    _RAG_FORMATTERS = {
+        'availability check': '_format_availability_results',
+        'appointment booking': '_format_appointment_results',
+        'appointment modification': '_format_appointment_results',
+        'provider search': '_format_provider_results'
+    }
+    
     def __init__(self, db_manager: HealthcareDatabaseManager):
         self.db_manager = db_manager
         self.query_processor = HealthcareQueryProcessor(db_manager)
         self.tool_registry = HealthcareToolsRegistry()
         
-        # Initialize Dynamic Schema Manager (primary system)
-        print("🔄 DEBUG: Initializing dynamic schema management system...")
-        self.dynamic_schema = get_dynamic_schema_manager(db_manager)
-        print("✅ DEBUG: Dynamic schema management system ready")
+        # The schema systems and the WebSocket are built on first use by the
+        # cached properties below, so sessions that never need them don't pay
+        # for them at startup
         
-        # Initialize Enhanced RAG system as backup
-        print("🔍 DEBUG: Initializing enhanced healthcare schema RAG system...")
-        self.schema_rag = get_enhanced_schema_rag(db_manager)
-        print("✅ DEBUG: Enhanced healthcare schema RAG system ready")
+        # Responses to recent queries, looked up by query embedding
+        self.response_cache = SemanticResponseCache(capacity=512, threshold=0.95)
         
-        # Keep the old schema RAG as fallback
-        self.fallback_schema_rag = get_healthcare_schema_rag()
+        # Generated availability-list SQL, by request fingerprint
+        self._avail_plan_cache = AvailabilityPlanCache(max_entries=1000)
         
-        # WebSocket for real-time chain of thoughts
-        self.websocket_cot = get_chain_of_thoughts_ws() if WEBSOCKET_AVAILABLE else None
-        if self.websocket_cot:
-            print("✅ Real-time chain of thoughts WebSocket ready")
-        else:
-            print("⚠️ Chain of thoughts will be provided in response only")
+        # Rows of repeated read-only queries; writes in the database manager
+        # invalidate the tables they touch
+        self.result_cache = get_query_result_cache()
+        self.result_cache.add_invalidation_listener(self._on_table_invalidated)
+        self.db_health = get_db_pool_health()
         
         # Setup enhanced logging
-        import logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('healthcare_chatbot.log'),
-                logging.StreamHandler()
-            ]
-        )
+        setup_chatbot_logging()
         self.logger = logging.getLogger('HealthcareChatbot')
         
+        # Start of the request being handled on each thread, so thoughts can
+        # be stamped with a cheap relative offset
+        self._request_clock = threading.local()
+        
+        # Console/file/WebSocket output for thoughts and queries is written by
+        # a background thread so it stays off the request path. close() (also
+        # run at exit, before the logging listener stops) writes what is
+        # still queued and stops the thread
+        self._log_q = queue.SimpleQueue()
+        self._log_writer = threading.Thread(target=self._log_drain, name='chatbot-log-writer', daemon=True)
+        self._log_writer.start()
+        atexit.register(self.close)
+        
+        # Monotonic time of the last schema change check (None: never)
+        self._schema_checked_at = None
+        
         # Intent patterns
-        self.intent_patterns = {
-            'check_availability': [
-                r'check.*availabilit',
-                r'is.*available',
-                r'free.*time',
-                r'when.*available',
-                r'schedule.*for',
-                r'get.*availability',
-                r'show.*availability',
-                r'availability.*of',
-                r'find.*availability'
-            ],
-            'book_appointment': [
-                r'book.*appointment',
-                r'schedule.*appointment',
-                r'make.*appointment',
-                r'reserve.*time',
-                r'set.*appointment'
-            ],
-            'find_provider': [
-                r'find.*therapist',
-                r'find.*doctor',
-                r'show.*therapist',
-                r'list.*provider',
-                r'who.*specializes'
-            ],
-            'get_appointments': [
-                r'my.*appointment',
-                r'show.*appointment',
-                r'list.*appointment',
-                r'upcoming.*appointment'
-            ],
-            'cancel_appointment': [
-                r'cancel.*appointment',
-                r'remove.*appointment',
-                r'delete.*appointment'
-            ]
+        self.intent_patterns = INTENT_PATTERNS
+        
+        # Intent handlers, adapted to one signature:
+        # (message, entities, booking_context, chain_of_thoughts, websocket_session_id)
+        self._intent_dispatch = {
+            'book_appointment': lambda message, entities, booking_context, chain_of_thoughts, session_id:
+                self._handle_booking_flow(message, entities, booking_context),
+            'check_availability': lambda message, entities, booking_context, chain_of_thoughts, session_id:
+                self._handle_availability_check(message, entities, session_id, chain_of_thoughts),
+            'find_provider': lambda message, entities, booking_context, chain_of_thoughts, session_id:
+                self._handle_provider_search(message, entities),
+            'get_appointments': lambda message, entities, booking_context, chain_of_thoughts, session_id:
+                self._handle_appointment_query(message, entities),
+        }
+        
+        # Per intent: (thought, WebSocket tool name, tool selection reasoning)
+        self._tool_descriptions = {
+            'book_appointment': ("� Processing appointment booking request",
+                                 "booking_workflow", "User wants to book an appointment"),
+            'check_availability': ("🔍 Processing availability check request",
+                                   "availability_check", "User wants to check provider availability"),
+            'find_provider': ("�‍⚕️ Processing provider search request",
+                              "provider_search", "User wants to find healthcare providers"),
+            'get_appointments': ("� Processing appointment query request",
+                                 "appointment_query", "User wants to retrieve appointment information"),
         }
+        self._general_tool_description = ("� Processing as general healthcare query",
+                                          "natural_language_processing", "Processing general query with NLP")
+    
+    @cached_property
+    def dynamic_schema(self):
+        """Dynamic Schema Manager (primary system)"""
+        self.logger.debug("🔄 Initializing dynamic schema management system...")
+        manager = get_dynamic_schema_manager(self.db_manager)
+        self.logger.debug("✅ Dynamic schema management system ready")
+        return manager
+    
+    @cached_property
+    def schema_rag(self):
+        """Enhanced RAG system, backup to the dynamic schema manager"""
+        self.logger.debug("🔍 Initializing enhanced healthcare schema RAG system...")
+        rag = get_enhanced_schema_rag(self.db_manager)
+        self.logger.debug("✅ Enhanced healthcare schema RAG system ready")
+        return rag
+    
+    @cached_property
+    def fallback_schema_rag(self):
+        """The old schema RAG, kept as fallback"""
+        return get_healthcare_schema_rag()
+    
+    @cached_property
+    def websocket_cot(self):
+        """WebSocket for real-time chain of thoughts, or None if unavailable"""
+        websocket_cot = get_chain_of_thoughts_ws() if WEBSOCKET_AVAILABLE else None
+        if websocket_cot:
+            print("✅ Real-time chain of thoughts WebSocket ready")
+        else:
+            print("⚠️ Chain of thoughts will be provided in response only")
+        return websocket_cot
     
     def emit_thought(self, thought: str, session_id: str = None):
         """Emit a chain of thought with detailed logging"""
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        formatted_thought = f"[{timestamp}] {thought}"
-        
-        # Log to console for debugging
-        print(f"💭 {formatted_thought}")
-        
-        # Log to file for persistence
-        self.logger.info(f"[ChainOfThought] {formatted_thought}")
+        start_ns = getattr(self._request_clock, 'start_ns', None)
+        if start_ns is not None:
+            elapsed_us = (time.time_ns() - start_ns) // 1_000
+            formatted_thought = "[+%d.%03dms] %s" % (elapsed_us // 1_000, elapsed_us % 1_000, thought)
+        else:
+            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+            formatted_thought = f"[{timestamp}] {thought}"
         
-        # Emit to WebSocket if available
-        if self.websocket_cot and session_id:
-            try:
-                self.websocket_cot.emit_thought(session_id, formatted_thought)
-            except Exception as e:
-                print(f"⚠️ WebSocket emit failed: {e}")
+        # Hand off to the log writer unless nobody would see it
+        if (session_id and self.websocket_cot) or self.logger.isEnabledFor(logging.INFO):
+            self._log_q.put_nowait(('thought', session_id, formatted_thought))
         
         return formatted_thought
     
@@ -237,16 +755,89 @@ class HealthcareResponseGenerator:
             "metadata": metadata or {}
         }
         
-        # Log to console with formatting
-        print(f"\n🔍 GENERATED QUERY [{query_type}]:")
-        print(f"📅 Time: {log_entry['timestamp']}")
-        print(f"🆔 Session: {session_id or 'N/A'}")
-        print(f"📊 Complexity: {log_entry['complexity']}")
-        print(f"📝 Query:\n{query}")
-        print("─" * 80)
+        # Hand off to the log writer unless nobody would see it
+        if (session_id and self.websocket_cot) or self.logger.isEnabledFor(logging.INFO):
+            self._log_q.put_nowait(('query', session_id, log_entry))
         
-        # Log to file for persistence
-        self.logger.info(f"[GeneratedQuery] {json.dumps(log_entry, indent=2)}")
+        return log_entry
+    
+    def close(self):
+        """Write the queued thoughts and queries, then stop the log writer"""
+        if self._log_writer.is_alive():
+            self._log_q.put_nowait(_LOG_WRITER_STOP)
+            self._log_writer.join()
+        atexit.unregister(self.close)
+    
+    def _log_drain(self):
+        """Background writer: drain queued thoughts and queries in batches until close()"""
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self._log_q.get()
+            try:
+                while item is not _LOG_WRITER_STOP:
+                    batch.append(item)
+                    if len(batch) == LOG_WRITER_BATCH_SIZE:
+                        break
+                    item = self._log_q.get_nowait()
+                else:
+                    stopping = True
+            except queue.Empty:
+                pass
+            
+            # Consecutive thoughts for one session go out as a single WebSocket frame
+            pending_session, pending = None, []
+            for kind, session_id, payload in batch:
+                if pending and (kind != 'thought' or session_id != pending_session):
+                    self._flush_thoughts(pending_session, pending)
+                    pending = []
+                try:
+                    if kind == 'thought':
+                        self._write_thought(session_id, payload)
+                        if session_id:
+                            pending_session = session_id
+                            pending.append(payload)
+                    else:
+                        self._write_query(session_id, payload)
+                except Exception as e:
+                    print(f"⚠️ Log writer failed: {e}")
+            if pending:
+                self._flush_thoughts(pending_session, pending)
+    
+    def _write_thought(self, session_id: Optional[str], formatted_thought: str):
+        """Write one chain of thought to console and log file"""
+        if self.logger.isEnabledFor(logging.INFO):
+            # Log to console for debugging
+            print(f"💭 {formatted_thought}")
+            
+            # Log to file for persistence
+            self.logger.info(f"[ChainOfThought] {formatted_thought}")
+    
+    def _flush_thoughts(self, session_id: str, thoughts: List[str]):
+        """Emit a run of chain of thoughts to the WebSocket session in one batch"""
+        if self.websocket_cot:
+            try:
+                self.websocket_cot.emit_thoughts_batch(session_id, thoughts)
+            except Exception as e:
+                print(f"⚠️ WebSocket emit failed: {e}")
+    
+    def _write_query(self, session_id: Optional[str], log_entry: Dict[str, Any]):
+        """Write one generated query to console, log file and WebSocket"""
+        query = log_entry['query']
+        query_type = log_entry['query_type']
+        
+        if self.logger.isEnabledFor(logging.INFO):
+            # Log to console with formatting, as a single write
+            print(
+                f"\n🔍 GENERATED QUERY [{query_type}]:\n"
+                f"📅 Time: {log_entry['timestamp']}\n"
+                f"🆔 Session: {session_id or 'N/A'}\n"
+                f"📊 Complexity: {log_entry['complexity']}\n"
+                f"📝 Query:\n{query}"
+            )
+            
+            # Log to file for persistence
+            self.logger.info("[GeneratedQuery] %s", _dumps(log_entry))
         
         # Emit to WebSocket for live monitoring
         if self.websocket_cot and session_id:
@@ -254,12 +845,11 @@ class HealthcareResponseGenerator:
                 self.websocket_cot.emit_query_generated(session_id, query, query_type)
             except Exception as e:
                 print(f"⚠️ WebSocket query log failed: {e}")
-        
-        return log_entry
 
     def generate_response(self, user_message: str, conversation_manager: HealthcareConversationManager) -> ChatResponse:
         """Generate intelligent response to user message"""
-        start_time = time.time()
+        start_ns = time.time_ns()
+        self._request_clock.start_ns = start_ns
         chain_of_thoughts = []
         websocket_session_id = None
         
@@ -299,45 +889,43 @@ class HealthcareResponseGenerator:
             self.emit_thought(f"� Current booking step: {booking_context.step.value}", websocket_session_id)
             chain_of_thoughts.append(f"Retrieved booking context, current step: {booking_context.step.value}")
             
+            # Rephrasings of a recent question reuse its response; the booking
+            # flow is stateful so it always runs
+            query_embedding = None
+            cached_response = None
+            if (SEMANTIC_RESPONSE_CACHE_ENABLED and self.response_cache.enabled
+                    and intent != 'book_appointment' and booking_context.step == BookingStep.INITIAL):
+                cache_scope = self._response_cache_scope(user_message, intent, entities)
+                query_embedding = self.schema_rag.embed_query(user_message)
+                cached_response = self.response_cache.get(query_embedding, cache_scope)
+            
             # Generate response based on intent and context
-            if intent == 'book_appointment':
-                self.emit_thought("� Processing appointment booking request", websocket_session_id)
-                if self.websocket_cot and websocket_session_id:
-                    self.websocket_cot.emit_tool_selection(websocket_session_id, "booking_workflow", "User wants to book an appointment")
-                response = self._handle_booking_flow(user_message, entities, booking_context, chain_of_thoughts, websocket_session_id)
-            elif intent == 'check_availability':
-                self.emit_thought("🔍 Processing availability check request", websocket_session_id)
-                if self.websocket_cot and websocket_session_id:
-                    self.websocket_cot.emit_tool_selection(websocket_session_id, "availability_check", "User wants to check provider availability")
-                response = self._handle_availability_check(user_message, entities, websocket_session_id, chain_of_thoughts)
-            elif intent == 'find_provider':
-                self.emit_thought("�‍⚕️ Processing provider search request", websocket_session_id)
-                if self.websocket_cot and websocket_session_id:
-                    self.websocket_cot.emit_tool_selection(websocket_session_id, "provider_search", "User wants to find healthcare providers")
-                response = self._handle_provider_search(user_message, entities, chain_of_thoughts, websocket_session_id)
-            elif intent == 'get_appointments':
-                self.emit_thought("� Processing appointment query request", websocket_session_id)
-                if self.websocket_cot and websocket_session_id:
-                    self.websocket_cot.emit_tool_selection(websocket_session_id, "appointment_query", "User wants to retrieve appointment information")
-                response = self._handle_appointment_query(user_message, entities, chain_of_thoughts, websocket_session_id)
+            if cached_response is not None:
+                self.emit_thought("♻️ Reusing response to a semantically similar recent query", websocket_session_id)
+                chain_of_thoughts.append("Reused cached response for a semantically similar query")
+                response = copy.deepcopy(cached_response)
             else:
-                self.emit_thought("� Processing as general healthcare query", websocket_session_id)
+                # Anything without a dedicated handler goes through natural
+                # language query processing
+                handler = self._intent_dispatch.get(intent, self._dispatch_general_query)
+                thought, tool_name, reasoning = self._tool_descriptions.get(intent, self._general_tool_description)
+                self.emit_thought(thought, websocket_session_id)
                 if self.websocket_cot and websocket_session_id:
-                    self.websocket_cot.emit_tool_selection(websocket_session_id, "natural_language_processing", "Processing general query with NLP")
-                # Try natural language query processing
-                response = self._handle_general_query(user_message, websocket_session_id)
+                    self.websocket_cot.emit_tool_selection(websocket_session_id, tool_name, reasoning)
+                response = handler(user_message, entities, booking_context, chain_of_thoughts, websocket_session_id)
             
-            print(f"🔍 DEBUG: Generated response intent: {response.intent}")
-            print(f"🔍 DEBUG: Response message length: {len(response.message)} chars")
+            if query_embedding is not None and cached_response is None and response.status == "success":
+                self.response_cache.put(query_embedding, copy.deepcopy(response), cache_scope)
+            
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Generated response intent=%s, message length=%d chars",
+                                  response.intent, len(response.message))
             
             # Add response to history
-            print("🔍 DEBUG: Adding response to conversation history...")
             conversation_manager.add_to_history('assistant', response.message)
             
-            print("🔍 DEBUG: Response generation completed successfully")
-            
             # Calculate processing time and emit completion
-            processing_time_ms = int((time.time() - start_time) * 1000)
+            processing_time_ms = (time.time_ns() - start_ns) // 1_000_000
             chain_of_thoughts.append(f"Response generated successfully in {processing_time_ms}ms")
             
             if self.websocket_cot and websocket_session_id:
@@ -351,75 +939,69 @@ class HealthcareResponseGenerator:
             return response
             
         except Exception as e:
-            print(f"❌ ERROR in generate_response: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            self.logger.exception("❌ ERROR in generate_response: %s", e,
+                                  extra={'session': websocket_session_id})
             
             # Emit error to WebSocket
             if self.websocket_cot and websocket_session_id:
                 self.websocket_cot.emit_error(websocket_session_id, type(e).__name__, str(e), "Response Generation")
             
-            processing_time_ms = int((time.time() - start_time) * 1000)
+            processing_time_ms = (time.time_ns() - start_ns) // 1_000_000
             chain_of_thoughts.append(f"Error occurred: {str(e)}")
             
-            return ChatResponse(
+            return acquire_response(
                 message=f"I apologize, but I encountered an error processing your request. Please try again or contact support if the issue persists.",
                 status="error",
                 chain_of_thoughts=chain_of_thoughts,
                 websocket_session_id=websocket_session_id,
                 processing_time_ms=processing_time_ms
             )
+        finally:
+            self._request_clock.start_ns = None
+    
+    def _dispatch_general_query(self, message: str, entities: Dict, booking_context: BookingContext,
+                                chain_of_thoughts: List[str], websocket_session_id: Optional[str]) -> ChatResponse:
+        """Dispatch-table adapter for _handle_general_query"""
+        return self._handle_general_query(message, websocket_session_id)
+    
+    def _response_cache_scope(self, message: str, intent: str, entities: Dict[str, Any]) -> Tuple:
+        """Everything in a message that selects specific rows; a cached response
+        is only reused for a message with the same scope"""
+        return (
+            intent,
+            tuple((entity, tuple(values)) for entity, values in sorted(entities.items())),
+            self._extract_employee_name_from_query(message, entities),
+            _availability_metadata_items(message.lower()),
+            tuple(_DIGITS_RE.findall(message)),
+        )
+    
+    def _on_table_invalidated(self, table_name: str):
+        """Drop cached responses when a write may have changed what they report"""
+        if table_name.lower() not in _CHAT_LOG_TABLES:
+            self.response_cache.clear()
     
     def _analyze_intent(self, message: str) -> str:
         """Analyze message intent"""
-        message_lower = message.lower()
-        
-        # Debug output
-        print(f"🔍 DEBUG: Analyzing intent for: '{message}'")
-        print(f"🔍 DEBUG: Lowercase: '{message_lower}'")
-        
-        for intent, patterns in self.intent_patterns.items():
-            print(f"🔍 DEBUG: Checking {intent}:")
-            for pattern in patterns:
-                if re.search(pattern, message_lower):
-                    print(f"🔍 DEBUG: ✅ MATCHED {intent} with pattern: {pattern}")
-                    return intent
-                else:
-                    print(f"🔍 DEBUG: ❌ No match: {pattern}")
-        
-        print(f"🔍 DEBUG: No patterns matched, returning 'general_query'")
-        return 'general_query'
+        return _classify_intent(message)
     
     def _extract_entities(self, message: str) -> Dict[str, Any]:
         """Extract entities from message"""
-        entities = {}
-        
-        # Extract names (simple pattern)
-        name_pattern = r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b'
-        names = re.findall(name_pattern, message)
-        if names:
-            entities['names'] = names
-        
-        # Extract dates
-        date_patterns = [
-            r'\b(today|tomorrow|yesterday)\b',
-            r'\b(monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b',
-            r'\b(next\s+(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday))\b',
-            r'\b(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\b'
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.findall(pattern, message.lower())
-            if matches:
-                entities['date_references'] = matches
-        
-        # Extract times
-        time_pattern = r'\b(\d{1,2}:\d{2}(?:\s*[ap]m)?|\d{1,2}\s*[ap]m)\b'
-        times = re.findall(time_pattern, message.lower())
-        if times:
-            entities['times'] = times
-        
-        return entities
+        # Rebuild the dict (with fresh lists) from the cached hashable form so
+        # callers can mutate it freely
+        return {entity: list(values) for entity, values in _extract_entity_items(message)}
+    
+    def get_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss statistics for the per-message and response caches"""
+        return {
+            'intent': _classify_intent.cache_info()._asdict(),
+            'entities': _extract_entity_items.cache_info()._asdict(),
+            'query_intent': _query_intent.cache_info()._asdict(),
+            'availability_metadata': _availability_metadata_items.cache_info()._asdict(),
+            'availability_sql': _cached_availability_sql.cache_info()._asdict(),
+            'availability_plans': self._avail_plan_cache.stats(),
+            'query_results': self.result_cache.stats(),
+            'responses': self.response_cache.stats()
+        }
     
     def _handle_booking_flow(self, message: str, entities: Dict, booking_context: BookingContext) -> ChatResponse:
         """Handle multi-step booking flow"""
@@ -518,8 +1100,6 @@ class HealthcareResponseGenerator:
     
     def _extract_employee_name_from_query(self, message: str, entities: Dict) -> Optional[str]:
         """Extract employee name from user query"""
-        import re
-        
         # First check if entities contain employee name
         if entities and 'employee_name' in entities:
             return entities['employee_name']
@@ -527,28 +1107,13 @@ class HealthcareResponseGenerator:
         # Look for common patterns in the message
         message_lower = message.lower()
         
-        # Pattern 1: "availability of [name]"
-        pattern1 = re.search(r'availability\s+of\s+([a-zA-Z\s]+)', message_lower)
-        if pattern1:
-            return pattern1.group(1).strip()
-        
-        # Pattern 2: "get me the availability of [name]"
-        pattern2 = re.search(r'get.*availability.*of\s+([a-zA-Z\s]+)', message_lower)
-        if pattern2:
-            return pattern2.group(1).strip()
-        
-        # Pattern 3: "show [name] availability"
-        pattern3 = re.search(r'show\s+([a-zA-Z\s]+)\s+availability', message_lower)
-        if pattern3:
-            return pattern3.group(1).strip()
-        
-        # Pattern 4: "when is [name] available"
-        pattern4 = re.search(r'when\s+is\s+([a-zA-Z\s]+)\s+available', message_lower)
-        if pattern4:
-            return pattern4.group(1).strip()
+        # Patterns 1-4 in one pass; the named group says which one matched
+        match = _EMPLOYEE_NAME_RE.match(message_lower)
+        if match:
+            return match.group(match.lastgroup).strip()
         
         # Pattern 5: "[name] schedule"
-        pattern5 = re.search(r'([a-zA-Z\s]+)\s+schedule', message_lower)
+        pattern5 = _SCHEDULE_NAME_RE.search(message_lower)
         if pattern5:
             name = pattern5.group(1).strip()
             # Avoid common words
@@ -556,10 +1121,8 @@ class HealthcareResponseGenerator:
                 return name
         
         # Pattern 6: Look for names after common keywords
-        keywords = ['for', 'of', 'with']
-        for keyword in keywords:
-            pattern = rf'{keyword}\s+([a-zA-Z\s]+)'
-            match = re.search(pattern, message_lower)
+        for keyword_re in _KEYWORD_NAME_RES:
+            match = keyword_re.search(message_lower)
             if match:
                 potential_name = match.group(1).strip()
                 # Check if it looks like a name (2-3 words, proper case)
@@ -598,7 +1161,7 @@ class HealthcareResponseGenerator:
             
             # Use the working availability query function
             self.emit_thought("🔍 Generating SQL query for availability check", websocket_session_id)
-            sql_query, table_info = get_availability_query_for_employee(employee_name)
+            sql_query, table_info = get_availability_sql(employee_name)
             chain_of_thoughts.append(f"Generated SQL query for {employee_name}")
             
             # Execute the query
@@ -610,56 +1173,50 @@ class HealthcareResponseGenerator:
                 execution_time = time.time() - start_time
                 
                 # Create result object similar to enhanced processor
-                class QueryResult:
-                    def __init__(self, success, results, sql_query, execution_time, chain_of_thoughts):
-                        self.success = success
-                        self.results = results
-                        self.sql_query = sql_query
-                        self.execution_time = execution_time
-                        self.chain_of_thoughts = chain_of_thoughts
-                        self.confidence_score = 0.9 if results else 0.7
-                        self.error_message = None
-                        self.schema_analysis = table_info
-                
-                result = QueryResult(True, results, sql_query, execution_time, chain_of_thoughts)
+                result = QueryResult(
+                    success=True,
+                    results=results,
+                    sql_query=sql_query,
+                    execution_time=execution_time,
+                    chain_of_thoughts=chain_of_thoughts,
+                    confidence_score=0.9 if results else 0.7,
+                    schema_analysis=table_info
+                )
                 
             except Exception as query_error:
                 execution_time = time.time() - start_time
                 error_msg = str(query_error)
                 self.emit_thought(f"❌ Query execution failed: {error_msg}", websocket_session_id)
                 
-                class QueryResult:
-                    def __init__(self, success, error_message, sql_query, execution_time, chain_of_thoughts):
-                        self.success = success
-                        self.results = []
-                        self.sql_query = sql_query
-                        self.execution_time = execution_time
-                        self.chain_of_thoughts = chain_of_thoughts
-                        self.confidence_score = 0.0
-                        self.error_message = error_message
-                        self.schema_analysis = {}
-                
-                result = QueryResult(False, error_msg, sql_query, execution_time, chain_of_thoughts)
+                result = QueryResult(
+                    success=False,
+                    results=[],
+                    sql_query=sql_query,
+                    execution_time=execution_time,
+                    chain_of_thoughts=chain_of_thoughts,
+                    error_message=error_msg
+                )
             
             # Merge chain of thoughts
             chain_of_thoughts.extend(result.chain_of_thoughts)
             
             # Emit thoughts to WebSocket if available
             if self.websocket_cot and websocket_session_id:
-                for thought in result.chain_of_thoughts:
-                    self.websocket_cot.emit_thought(websocket_session_id, thought)
+                self.websocket_cot.emit_thoughts_batch(websocket_session_id, result.chain_of_thoughts)
             
             if result.success:
                 self.emit_thought(f"✅ Query executed successfully. Found {len(result.results)} results.", websocket_session_id)
                 
                 # Format the results for display
                 if result.results:
-                    formatted_message = self._format_availability_results(message, result.results, result.sql_query)
+                    formatted_message = self._format_availability_results(result.results, message, result.sql_query)
                     suggestions = self._generate_availability_suggestions(result.results)
                     
-                    return ChatResponse(
-                        message=formatted_message,
-                        status="success",
+                    return _success_response(
+                        formatted_message,
+                        actions=suggestions,
+                        cot=chain_of_thoughts,
+                        session=websocket_session_id,
                         intent="availability_results",
                         confidence=result.confidence_score,
                         entities={'employee_name': employee_name, 'results_count': len(result.results)},
@@ -669,35 +1226,31 @@ class HealthcareResponseGenerator:
                             'schema_analysis': result.schema_analysis,
                             'execution_time': result.execution_time
                         },
-                        suggested_actions=suggestions,
-                        chain_of_thoughts=chain_of_thoughts,
-                        websocket_session_id=websocket_session_id,
                         query_executed=result.sql_query,
                         execution_time=result.execution_time
                     )
                 else:
-                    return ChatResponse(
-                        message=f"I found the relevant information in our database, but no availability matches your query. The query was executed successfully against the employee schedules.",
-                        status="no_results",
+                    return _no_results_response(
+                        f"I found the relevant information in our database, but no availability matches your query. The query was executed successfully against the employee schedules.",
+                        actions=("Try a different name", "Check different day", "Show all available staff"),
+                        cot=chain_of_thoughts,
+                        session=websocket_session_id,
                         intent="no_availability_results",
                         entities={'employee_name': employee_name, 'results_count': 0},
-                        data={'sql_query': result.sql_query, 'execution_time': result.execution_time},
-                        suggested_actions=["Try a different name", "Check different day", "Show all available staff"],
-                        chain_of_thoughts=chain_of_thoughts,
-                        websocket_session_id=websocket_session_id
+                        data={'sql_query': result.sql_query, 'execution_time': result.execution_time}
                     )
             else:
                 self.emit_thought(f"❌ Query processing failed: {result.error_message}", websocket_session_id)
                 
-                return ChatResponse(
-                    message=f"I understand you're looking for availability information. I've analyzed the request and generated the appropriate query, but encountered an issue during execution: {result.error_message}. Please try rephrasing your request or contact support.",
-                    status="error",
+                return _error_response(
+                    f"I understand you're looking for availability information. I've analyzed the request and generated the appropriate query, but encountered an issue during execution: {result.error_message}. Please try rephrasing your request or contact support.",
+                    error=result.error_message,
+                    cot=chain_of_thoughts,
+                    session=websocket_session_id,
+                    actions=("Try different wording", "Check database connection", "Contact support"),
+                    data={'execution_time': result.execution_time},
                     intent="availability_error",
-                    entities={'employee_name': employee_name, 'error': result.error_message},
-                    data={'error': result.error_message, 'execution_time': result.execution_time},
-                    suggested_actions=["Try different wording", "Check database connection", "Contact support"],
-                    chain_of_thoughts=chain_of_thoughts,
-                    websocket_session_id=websocket_session_id
+                    entities={'employee_name': employee_name, 'error': result.error_message}
                 )
                 
         except Exception as e:
@@ -713,134 +1266,118 @@ class HealthcareResponseGenerator:
         """Handle advanced availability queries like 'list of available employees' with metadata filters"""
         if chain_of_thoughts is None:
             chain_of_thoughts = []
+        
+        # Bound once; these are used throughout the handler
+        emit = self.emit_thought
+        ws = self.websocket_cot if websocket_session_id else None
             
         try:
             # Initialize availability query generator
-            self.emit_thought("🛠️ Initializing specialized availability query generator", websocket_session_id)
+            emit("🛠️ Initializing specialized availability query generator", websocket_session_id)
             availability_generator = get_availability_query_generator()
             chain_of_thoughts.append("Initialized specialized availability query generator")
             
-            if self.websocket_cot and websocket_session_id:
-                self.websocket_cot.emit_tool_selection(websocket_session_id, "advanced_sql_generation", "Generating advanced SQL for employee availability")
+            if ws is not None:
+                ws.emit_tool_selection(websocket_session_id, "advanced_sql_generation", "Generating advanced SQL for employee availability")
             
             # Parse metadata from the message (this would be enhanced with better NLP)
-            self.emit_thought("🔍 Extracting metadata filters from user request", websocket_session_id)
+            emit("🔍 Extracting metadata filters from user request", websocket_session_id)
             metadata = self._extract_availability_metadata(message, entities)
-            self.emit_thought(f"📊 Extracted metadata: {metadata}", websocket_session_id)
+            emit(f"📊 Extracted metadata: {metadata}", websocket_session_id)
             chain_of_thoughts.append(f"Extracted metadata: {metadata}")
             
-            # Generate specialized query
-            self.emit_thought("⚙️ Generating specialized SQL query for availability", websocket_session_id)
-            sql_query = availability_generator.generate_availability_query(
-                query_text=message,
-                metadata=metadata
-            )
+            # Generate specialized query, unless this request shape has a cached plan
+            fingerprint = AvailabilityPlanCache.fingerprint(message, metadata)
+            plan = self._avail_plan_cache.get(fingerprint)
+            if plan is None:
+                emit("⚙️ Generating specialized SQL query for availability", websocket_session_id)
+                generation_start = time.perf_counter()
+                plan = availability_generator.generate_parameterized_availability_query(
+                    query_text=message,
+                    metadata=metadata
+                )
+                self._avail_plan_cache.record(fingerprint, plan, (time.perf_counter() - generation_start) * 1000)
+            else:
+                emit("♻️ Reusing cached SQL plan for this request", websocket_session_id)
+            sql_query, sql_params = plan
             
             # Log the generated query
-            self.log_query(sql_query, "AVAILABILITY_SQL", websocket_session_id, metadata)
-            self.emit_thought("✅ Successfully generated specialized SQL query", websocket_session_id)
+            self.log_query(sql_query, "AVAILABILITY_SQL", websocket_session_id, {**metadata, 'params': sql_params})
+            emit("✅ Successfully generated specialized SQL query", websocket_session_id)
             chain_of_thoughts.append(f"Generated specialized SQL query")
             
-            if self.websocket_cot and websocket_session_id:
-                self.websocket_cot.emit_database_query(websocket_session_id, "executing")
+            if ws is not None:
+                ws.emit_database_query(websocket_session_id, "executing")
             
             # Execute the query
-            self.emit_thought("🗄️ Executing query against database", websocket_session_id)
+            emit("🗄️ Executing query against database", websocket_session_id)
             try:
-                with self.db_manager.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute(sql_query)
-                    results = []
-                    
-                    # Get column names
-                    columns = [desc[0] for desc in cursor.description]
-                    
-                    # Fetch results
-                    for row in cursor.fetchall():
-                        row_dict = {}
-                        for i, value in enumerate(row):
-                            row_dict[columns[i]] = value
-                        results.append(row_dict)
+                results = self._execute_read_query(sql_query, tables_in_sql(sql_query), sql_params)
+                emit(f"✅ Query executed successfully, found {len(results)} results", websocket_session_id)
+                chain_of_thoughts.append(f"Query executed successfully, found {len(results)} results")
+                
+                if ws is not None:
+                    ws.emit_database_query(websocket_session_id, "completed", len(results))
+                
+                if results:
+                    # Format results for availability display
+                    emit("📋 Formatting results for display", websocket_session_id)
+                    formatted_message = self._format_availability_list_results(results, metadata)
                     
-                    self.emit_thought(f"✅ Query executed successfully, found {len(results)} results", websocket_session_id)
-                    chain_of_thoughts.append(f"Query executed successfully, found {len(results)} results")
+                    if ws is not None:
+                        ws.emit_response_generation(websocket_session_id, "availability_list_response", 0.95)
                     
-                    if self.websocket_cot and websocket_session_id:
-                        self.websocket_cot.emit_database_query(websocket_session_id, "completed", len(results))
+                    return _success_response(
+                        formatted_message,
+                        actions=(
+                            "Book with available employee",
+                            "Check specific availability",
+                            "Filter by different criteria"
+                        ),
+                        cot=chain_of_thoughts,
+                        data={
+                            'employees': results,
+                            'metadata': metadata,
+                            'sql_query': sql_query
+                        },
+                        query_executed=sql_query
+                    )
+                else:
+                    emit("⚠️ No results found for the specified criteria", websocket_session_id)
+                    return _no_results_response(
+                        f"I couldn't find any employees available with the specified criteria. Please try different filters or check a different date.",
+                        actions=("Try different date", "Remove some filters", "Check all employees"),
+                        cot=chain_of_thoughts,
+                        data={'metadata': metadata, 'sql_query': sql_query},
+                        query_executed=sql_query
+                    )
                     
-                    if results:
-                        # Format results for availability display
-                        self.emit_thought("📋 Formatting results for display", websocket_session_id)
-                        formatted_message = self._format_availability_list_results(results, metadata)
-                        
-                        if self.websocket_cot and websocket_session_id:
-                            self.websocket_cot.emit_response_generation(websocket_session_id, "availability_list_response", 0.95)
-                        
-                        return ChatResponse(
-                            message=formatted_message,
-                            status="success",
-                            data={
-                                'employees': results,
-                                'metadata': metadata,
-                                'sql_query': sql_query
-                            },
-                            suggested_actions=[
-                                "Book with available employee",
-                                "Check specific availability",
-                                "Filter by different criteria"
-                            ],
-                            chain_of_thoughts=chain_of_thoughts,
-                            query_executed=sql_query
-                        )
-                    else:
-                        self.emit_thought("⚠️ No results found for the specified criteria", websocket_session_id)
-                        return ChatResponse(
-                            message=f"I couldn't find any employees available with the specified criteria. Please try different filters or check a different date.",
-                            status="no_results",
-                            data={'metadata': metadata, 'sql_query': sql_query},
-                            suggested_actions=[
-                                "Try different date",
-                                "Remove some filters",
-                                "Check all employees"
-                            ],
-                            chain_of_thoughts=chain_of_thoughts,
-                            query_executed=sql_query
-                        )
-                        
             except Exception as db_error:
                 chain_of_thoughts.append(f"Database error: {str(db_error)}")
                 
-                if self.websocket_cot and websocket_session_id:
-                    self.websocket_cot.emit_error(websocket_session_id, "DatabaseError", str(db_error), "Query Execution")
+                if ws is not None:
+                    ws.emit_error(websocket_session_id, "DatabaseError", str(db_error), "Query Execution")
                 
-                return ChatResponse(
-                    message=f"I encountered a database error while searching for available employees. Please try again or contact support. Error: {str(db_error)}",
+                return _error_response(
+                    f"I encountered a database error while searching for available employees. Please try again or contact support. Error: {str(db_error)}",
+                    error=str(db_error),
+                    cot=chain_of_thoughts,
+                    actions=(*_DEFAULT_ERROR_ACTIONS, "Use simpler query"),
                     status="database_error",
-                    data={'error': str(db_error), 'sql_query': sql_query},
-                    suggested_actions=[
-                        "Try again",
-                        "Contact support",
-                        "Use simpler query"
-                    ],
-                    chain_of_thoughts=chain_of_thoughts
+                    data={'sql_query': sql_query}
                 )
                 
         except Exception as e:
             chain_of_thoughts.append(f"Error in advanced availability query: {str(e)}")
             
-            if self.websocket_cot and websocket_session_id:
-                self.websocket_cot.emit_error(websocket_session_id, type(e).__name__, str(e), "Advanced Query Processing")
+            if ws is not None:
+                ws.emit_error(websocket_session_id, type(e).__name__, str(e), "Advanced Query Processing")
             
-            return ChatResponse(
-                message=f"I encountered an error while processing your availability request. Please try a simpler query or contact support.",
-                status="error",
-                data={'error': str(e)},
-                suggested_actions=[
-                    "Try simpler query",
-                    "Contact support",
-                    "Check individual availability"
-                ],
-                chain_of_thoughts=chain_of_thoughts
+            return _error_response(
+                f"I encountered an error while processing your availability request. Please try a simpler query or contact support.",
+                error=str(e),
+                cot=chain_of_thoughts,
+                actions=("Try simpler query", "Contact support", "Check individual availability")
             )
     
     def _handle_provider_search(self, message: str, entities: Dict) -> ChatResponse:
@@ -874,104 +1411,106 @@ class HealthcareResponseGenerator:
             suggestions=["Reschedule appointment", "Cancel appointment", "Book new appointment"]
         )
     
+    def _check_schema_changes(self) -> List[str]:
+        """Tables changed since the last check; skips the check within SCHEMA_CHECK_TTL_SECONDS"""
+        now = time.monotonic()
+        if self._schema_checked_at is not None and now - self._schema_checked_at < SCHEMA_CHECK_TTL_SECONDS:
+            return []
+        self._schema_checked_at = now
+        return self.dynamic_schema.check_for_schema_changes().tables_updated
+    
     def _handle_general_query(self, message: str, websocket_session_id: Optional[str] = None) -> ChatResponse:
         """Handle general queries using RAG-enhanced schema retrieval and SQL generation"""
+        # Bound once; these are used throughout the handler
+        logger = self.logger
+        emit = self.emit_thought
+        
         try:
-            print(f"🔍 DEBUG: Processing general query with Dynamic Schema Manager: '{message}'")
+            logger.debug("🔍 Processing general query with Dynamic Schema Manager: '%s'", message)
             
             # Step 1: Check for schema changes and update if needed
-            print("🔄 DEBUG: Checking for database schema changes...")
-            self.emit_thought("🔄 Checking for database schema updates", websocket_session_id)
+            logger.debug("🔄 Checking for database schema changes...")
+            emit("🔄 Checking for database schema updates", websocket_session_id)
             
-            update_info = self.dynamic_schema.check_for_schema_changes()
-            if update_info.tables_updated:
-                print(f"🔄 Schema changes detected: {len(update_info.tables_updated)} tables updated")
-                self.emit_thought(f"📊 Schema updated: {len(update_info.tables_updated)} tables refreshed", websocket_session_id)
+            tables_updated = self._check_schema_changes()
+            if tables_updated:
+                logger.info("🔄 Schema changes detected: %d tables updated", len(tables_updated))
+                emit(f"📊 Schema updated: {len(tables_updated)} tables refreshed", websocket_session_id)
             
             # Step 2: Get relevant schema using dynamic manager
-            print("🔍 DEBUG: Retrieving relevant schema using Dynamic Schema Manager...")
-            self.emit_thought("🗄️ Retrieving current database schema with exact column names", websocket_session_id)
+            logger.debug("🔍 Retrieving relevant schema using Dynamic Schema Manager...")
+            emit("🗄️ Retrieving current database schema with exact column names", websocket_session_id)
             
-            schema_result = self.dynamic_schema.get_schema_for_query(message)
+            dynamic_schema = self.dynamic_schema
+            schema_result = dynamic_schema.get_schema_for_query(message)
+            table_names = [t['table_name'] for t in schema_result['tables']]
             
-            print(f"🔍 DEBUG: Found {len(schema_result['tables'])} relevant tables:")
-            for table in schema_result['tables']:
-                print(f"  - {table['table_name']}: {len(table['columns'])} columns")
-                column_names = [col['name'] for col in table['columns'][:5]]
-                print(f"    Columns: {', '.join(column_names)}{'...' if len(table['columns']) > 5 else ''}")
-            print(f"🔍 DEBUG: Schema confidence: {schema_result['confidence_score']:.2f} ({schema_result['search_method']})")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Found %d relevant tables:", len(table_names))
+                for table in schema_result['tables']:
+                    column_names = [col['name'] for col in table['columns'][:5]]
+                    logger.debug("  - %s: %d columns", table['table_name'], len(table['columns']))
+                    logger.debug("    Columns: %s%s", ', '.join(column_names), '...' if len(table['columns']) > 5 else '')
+                logger.debug("Schema confidence: %.2f (%s)", schema_result['confidence_score'], schema_result['search_method'])
             
             # Step 3: Generate SQL using dynamic schema manager
-            print("🔍 DEBUG: Generating SQL with current schema...")
-            self.emit_thought("⚙️ Generating SQL query with real-time schema validation", websocket_session_id)
+            logger.debug("🔍 Generating SQL with current schema...")
+            emit("⚙️ Generating SQL query with real-time schema validation", websocket_session_id)
             
-            sql_query = self.dynamic_schema.generate_sql_with_current_schema(message, schema_result['tables'])
-            print(f"🔍 DEBUG: Generated SQL with dynamic schema:\n{sql_query}")
+            sql_query = dynamic_schema.generate_sql_with_current_schema(message, schema_result['tables'])
+            logger.debug("🔍 Generated SQL with dynamic schema:\n%s", sql_query)
             
             # Log the generated query
             self.log_query(sql_query, "Dynamic_Schema_SQL", websocket_session_id, {
                 "user_query": message,
-                "tables_used": [t['table_name'] for t in schema_result['tables']],
+                "tables_used": table_names,
                 "confidence": schema_result['confidence_score'],
                 "search_method": schema_result['search_method'],
-                "schema_updated": len(update_info.tables_updated) > 0
+                "schema_updated": len(tables_updated) > 0
             })
             
             # Step 4: Execute the SQL query
             try:
-                print("🔍 DEBUG: Executing SQL query with validated schema...")
-                self.emit_thought("🔄 Executing database query with verified column names", websocket_session_id)
+                logger.debug("🔍 Executing SQL query with validated schema...")
+                emit("🔄 Executing database query with verified column names", websocket_session_id)
                 
-                with self.db_manager.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute(sql_query)
-                    results = []
-                    
-                    # Get column names
-                    columns = [desc[0] for desc in cursor.description]
-                    
-                    # Fetch results
-                    for row in cursor.fetchall():
-                        row_dict = {}
-                        for i, value in enumerate(row):
-                            row_dict[columns[i]] = value
-                        results.append(row_dict)
+                tables = tables_in_sql(sql_query).union(table_names)
+                results = self._execute_read_query(sql_query, tables)
+                logger.debug("✅ Query executed successfully, %d results found", len(results))
+                
+                if results:
+                    # Format results for display
+                    formatted_message = self._format_rag_query_results(message, results, schema_result)
                     
-                    print(f"✅ DEBUG: Query executed successfully, {len(results)} results found")
+                    return ChatResponse(
+                        message=formatted_message,
+                        intent="rag_query_results",
+                        entities={
+                            'query_results': results,
+                            'sql_query': sql_query,
+                            'schema_tables': table_names,
+                            'confidence_score': schema_result["confidence_score"]
+                        },
+                        suggestions=self._generate_contextual_suggestions(message, results)
+                    )
+                else:
+                    return ChatResponse(
+                        message=f"I found the relevant information in our database, but no results matched your query. The query searched through {', '.join(table_names)} tables.",
+                        intent="no_results",
+                        entities={'sql_query': sql_query, 'schema_tables': table_names},
+                        suggestions=["Try a different search", "Check spelling", "Use different keywords"]
+                    )
                     
-                    if results:
-                        # Format results for display
-                        formatted_message = self._format_rag_query_results(message, results, schema_result)
-                        
-                        return ChatResponse(
-                            message=formatted_message,
-                            intent="rag_query_results",
-                            entities={
-                                'query_results': results,
-                                'sql_query': sql_query,
-                                'schema_tables': [t["table_name"] for t in schema_result["tables"]],
-                                'confidence_score': schema_result["confidence_score"]
-                            },
-                            suggestions=self._generate_contextual_suggestions(message, results)
-                        )
-                    else:
-                        return ChatResponse(
-                            message=f"I found the relevant information in our database, but no results matched your query. The query searched through {', '.join([t['table_name'] for t in schema_result['tables']])} tables.",
-                            intent="no_results",
-                            entities={'sql_query': sql_query, 'schema_tables': [t["table_name"] for t in schema_result["tables"]]},
-                            suggestions=["Try a different search", "Check spelling", "Use different keywords"]
-                        )
-                        
             except Exception as db_error:
-                print(f"⚠️ DEBUG: Database execution failed: {str(db_error)}")
+                logger.warning("⚠️ Database execution failed: %s", db_error)
                 
                 # Provide helpful response even without database execution
                 return ChatResponse(
-                    message=f"I understand you're looking for information about {self._extract_query_intent(message)}. I've identified the relevant database tables ({', '.join([t['table_name'] for t in schema_result['tables']])}) and generated the appropriate query, but I'm currently unable to connect to the database to get the results. Please check your database connection.",
+                    message=f"I understand you're looking for information about {self._extract_query_intent(message)}. I've identified the relevant database tables ({', '.join(table_names)}) and generated the appropriate query, but I'm currently unable to connect to the database to get the results. Please check your database connection.",
                     intent="database_unavailable",
                     entities={
                         'sql_query': sql_query,
-                        'schema_tables': [t["table_name"] for t in schema_result["tables"]],
+                        'schema_tables': table_names,
                         'confidence_score': schema_result["confidence_score"],
                         'error': str(db_error)
                     },
@@ -979,13 +1518,11 @@ class HealthcareResponseGenerator:
                 )
                 
         except Exception as e:
-            print(f"❌ DEBUG: Error in RAG general query processing: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error in RAG general query processing: %s", e)
             
             # Fallback to original query processor
             try:
-                print("🔍 DEBUG: Falling back to original query processor...")
+                logger.debug("🔍 Falling back to original query processor...")
                 result = self.query_processor.process_query(message)
                 
                 if result['success']:
@@ -1017,51 +1554,30 @@ class HealthcareResponseGenerator:
     
     def _extract_availability_metadata(self, message: str, entities: Dict) -> Dict[str, Any]:
         """Extract metadata for availability queries"""
-        metadata = {}
-        message_lower = message.lower()
-        
-        # Extract gender filter
-        if 'male' in message_lower and 'female' not in message_lower:
-            metadata['gender'] = 'Male'
-        elif 'female' in message_lower and 'male' not in message_lower:
-            metadata['gender'] = 'Female'
-        
-        # Extract site/location filter
-        site_patterns = [r'site\s*(\d+)', r'location\s*(\d+)', r'siteid\s*(\d+)']
-        for pattern in site_patterns:
-            match = re.search(pattern, message_lower)
-            if match:
-                metadata['site_id'] = int(match.group(1))
-                break
-        
-        # Extract date filter (look for Wednesday, specific dates, etc.)
-        date_patterns = [
-            r'(monday|tuesday|wednesday|thursday|friday|saturday|sunday)',
-            r'(\d{4}-\d{2}-\d{2})',
-            r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})'
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, message_lower)
-            if match:
-                metadata['target_date'] = match.group(1)
-                break
-        
-        # Extract role/position filter
-        role_keywords = ['therapist', 'doctor', 'nurse', 'specialist', 'counselor']
-        for keyword in role_keywords:
-            if keyword in message_lower:
-                metadata['role'] = keyword.title()
-                break
-        
-        # Extract specialty filter
-        specialty_keywords = ['physical therapy', 'mental health', 'occupational therapy', 'speech therapy']
-        for specialty in specialty_keywords:
-            if specialty in message_lower:
-                metadata['specialty'] = specialty
-                break
-        
-        return metadata
+        return dict(_availability_metadata_items(message.lower()))
+    
+    def _execute_read_query(self, sql_query: str, tables: Iterable[str],
+                            params: Tuple[Any, ...] = ()) -> List[Dict[str, Any]]:
+        """Run a generated query with any bound ? params, serving repeated read-only ones from the result cache"""
+        cacheable = is_read_only_sql(sql_query)
+        cache_key = QueryResultCache.key(sql_query, params)
+        if cacheable:
+            results = self.result_cache.get(cache_key)
+            if results is not None:
+                return results
+        
+        # Bounded like a connection pool so a burst of chats queues (or
+        # fails fast) instead of opening a connection per request
+        with self.db_health.checkout(), self.db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql_query, *params)
+            
+            # Fetch results in batches rather than one fetchall() allocation
+            results = fetch_dicts(cursor)
+        
+        if cacheable:
+            self.result_cache.insert(cache_key, results, tables)
+        return results
     
     def _format_availability_list_results(self, results: List[Dict], metadata: Dict) -> str:
         """Format availability list results for display"""
@@ -1084,33 +1600,29 @@ class HealthcareResponseGenerator:
         header = "Available Employees"
         if filter_desc:
             header += f" ({', '.join(filter_desc)})"
-        header += f" - {len(results)} found:\n\n"
+        parts = [f"{header} - {len(results)} found:\n\n"]
+        append = parts.append
         
-        formatted = header
-        
-        for i, employee in enumerate(results[:10], 1):  # Limit to 10 results
+        for i, employee in enumerate(islice(results, 10), 1):  # Limit to 10 results
             name = employee.get('EmployeeName') or f"{employee.get('first_name', '')} {employee.get('last_name', '')}".strip()
             title = employee.get('Title') or employee.get('job_title', 'Employee')
             site = employee.get('SiteId') or employee.get('site_id', 'N/A')
             gender = employee.get('Gender') or 'N/A'
             
-            formatted += f"{i}. {name}\n"
-            formatted += f"   Title: {title}\n"
-            formatted += f"   Site: {site}\n"
-            formatted += f"   Gender: {gender}\n"
+            append(f"{i}. {name}\n   Title: {title}\n   Site: {site}\n   Gender: {gender}\n")
             
             # Add availability info if present
             if 'available_slots' in employee:
-                formatted += f"   Available Slots: {employee['available_slots']}\n"
+                append(f"   Available Slots: {employee['available_slots']}\n")
             elif 'next_available' in employee:
-                formatted += f"   Next Available: {employee['next_available']}\n"
+                append(f"   Next Available: {employee['next_available']}\n")
             
-            formatted += "\n"
+            append("\n")
         
         if len(results) > 10:
-            formatted += f"... and {len(results) - 10} more employees. Use filters to narrow down the results.\n"
+            append(f"... and {len(results) - 10} more employees. Use filters to narrow down the results.\n")
         
-        return formatted
+        return ''.join(parts)
 
     def _parse_date_reference(self, date_refs: List[str]) -> Optional[str]:
         """Parse date references into actual dates"""
@@ -1122,36 +1634,23 @@ class HealthcareResponseGenerator:
         for ref in date_refs:
             ref_lower = ref.lower()
             if 'today' in ref_lower:
-                return today.strftime('%Y-%m-%d')
+                return today.isoformat()
             elif 'tomorrow' in ref_lower:
-                return (today + timedelta(days=1)).strftime('%Y-%m-%d')
-            elif 'wednesday' in ref_lower:
-                # Find next Wednesday
-                days_ahead = 2 - today.weekday()  # Wednesday is 2
-                if days_ahead <= 0:
-                    days_ahead += 7
-                return (today + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
+                return (today + timedelta(days=1)).isoformat()
+            
+            day = _WEEKDAY_NAME_RE.search(ref_lower)
+            if day:
+                # Next occurrence of that weekday, 1-7 days ahead
+                days_ahead = (_WEEKDAY_INDEX[day.group()] - today.weekday() - 1) % 7 + 1
+                return (today + timedelta(days=days_ahead)).isoformat()
             # Add more date parsing logic as needed
         
         return None
     
     def _extract_specialties(self, message: str) -> List[str]:
         """Extract therapy specialties from message"""
-        specialties = []
-        specialty_keywords = {
-            'anxiety': ['anxiety', 'anxious', 'worry', 'panic'],
-            'depression': ['depression', 'depressed', 'sad', 'mood'],
-            'trauma': ['trauma', 'ptsd', 'abuse'],
-            'family': ['family', 'couples', 'marriage', 'relationship'],
-            'addiction': ['addiction', 'substance', 'alcohol', 'drug']
-        }
-        
-        message_lower = message.lower()
-        for specialty, keywords in specialty_keywords.items():
-            if any(keyword in message_lower for keyword in keywords):
-                specialties.append(specialty)
-        
-        return specialties
+        found = {_SPECIALTY_BY_KEYWORD[keyword] for keyword in _SPECIALTY_RE.findall(message.lower())}
+        return sorted(found, key=_SPECIALTY_ORDER.__getitem__)
     
     def _format_query_results(self, result: Dict) -> str:
         """Format query results for chat display"""
@@ -1172,7 +1671,7 @@ class HealthcareResponseGenerator:
         else:
             # Multiple results - format as list
             formatted = "Here's what I found:\n\n"
-            for i, item in enumerate(results[:5], 1):  # Limit to 5 results
+            for i, item in enumerate(islice(results, 5), 1):  # Limit to 5 results
                 if 'EmployeeName' in item:
                     formatted += f"{i}. {item['EmployeeName']}\n"
                 elif 'PatientName' in item:
@@ -1188,44 +1687,35 @@ class HealthcareResponseGenerator:
     def _format_rag_query_results(self, original_query: str, results: list, schema_result) -> str:
         """Format RAG query results with context"""
         try:
-            intent = self._extract_query_intent(original_query)
+            formatter = self._RAG_FORMATTERS.get(self._extract_query_intent(original_query))
+            if formatter:
+                return getattr(self, formatter)(results, original_query)
+            
+            # Generic formatting with schema context
             result_count = len(results)
+            table_names = [t["name"] for t in schema_result["tables"]]
             
-            if "availability" in intent.lower() or "available" in original_query.lower():
-                return self._format_availability_results(results, original_query)
-            elif "appointment" in intent.lower() or "book" in original_query.lower():
-                return self._format_appointment_results(results, original_query)
-            elif "therapist" in intent.lower() or "provider" in original_query.lower():
-                return self._format_provider_results(results, original_query)
+            if result_count == 0:
+                return f"I searched through {', '.join(table_names)} but couldn't find any results for '{original_query}'."
+            elif result_count == 1:
+                return f"I found 1 result for '{original_query}' in our {', '.join(table_names)} database:\n\n{self._format_single_result(results[0])}"
             else:
-                # Generic formatting with schema context
-                table_names = [t["name"] for t in schema_result["tables"]]
-                
-                if result_count == 0:
-                    return f"I searched through {', '.join(table_names)} but couldn't find any results for '{original_query}'."
-                elif result_count == 1:
-                    return f"I found 1 result for '{original_query}' in our {', '.join(table_names)} database:\n\n{self._format_single_result(results[0])}"
-                else:
-                    return f"I found {result_count} results for '{original_query}' in our {', '.join(table_names)} database:\n\n{self._format_multiple_results(results[:5])}"  # Limit to 5 results
+                return f"I found {result_count} results for '{original_query}' in our {', '.join(table_names)} database:\n\n{self._format_multiple_results(islice(results, 5))}"  # Limit to 5 results
                     
         except Exception as e:
-            print(f"⚠️ DEBUG: Error formatting RAG results: {str(e)}")
+            self.logger.warning("⚠️ Error formatting RAG results: %s", e)
             return f"I found {len(results)} results for your query."
 
-    def _format_availability_results(self, query: str, results: list, sql_query: str = None) -> str:
+    def _format_availability_results(self, results: list, query: str, sql_query: str = None) -> str:
         """Format availability-specific results with enhanced schema-aware formatting"""
         if not results:
             return f"I analyzed your query '{query}' and searched the employee schedules, but couldn't find any matching availability information. Please try specifying a different date, time, or provider name."
         
-        # Determine the day mapping for display
-        day_mapping = {
-            1: 'Sunday', 2: 'Monday', 3: 'Tuesday', 4: 'Wednesday',
-            5: 'Thursday', 6: 'Friday', 7: 'Saturday'
-        }
-        
-        formatted = f"Here's the availability information for your query '{query}':\n\n"
+        total = len(results)
+        blocks = []
+        append = blocks.append
         
-        for i, result in enumerate(results[:5]):  # Limit to 5 results
+        for result in islice(results, 5):  # Limit to 5 results
             try:
                 # Extract employee information
                 employee_name = result.get('EmployeeName', 'Unknown Employee')
@@ -1233,7 +1723,7 @@ class HealthcareResponseGenerator:
                 
                 # Extract schedule information
                 week_day = result.get('WeekDay')  # Updated column name
-                day_name = day_mapping.get(week_day, f'Day {week_day}') if week_day else 'Unknown Day'
+                day_name = _DAY_NAMES.get(week_day, f'Day {week_day}') if week_day else 'Unknown Day'
                 
                 available_from = result.get('AvailableFrom', 'N/A')  # Updated column name
                 available_to = result.get('AvailableTo', 'N/A')  # Updated column name
@@ -1242,112 +1732,105 @@ class HealthcareResponseGenerator:
                 # Format the time display
                 time_display = f"{available_from} - {available_to}" if available_from != 'N/A' and available_to != 'N/A' else 'Time not specified'
                 
-                # Create the formatted entry
-                formatted += f"🩺 **{employee_name}** (ID: {employee_id})\n"
-                formatted += f"   📅 {day_name}: {time_display}\n"
-                formatted += f"   ✅ Status: {'Available' if availability_status_id == 1 else 'Not Available'}\n"
-                
-                if i < len(results) - 1 and i < 4:  # Add separator if not last item
-                    formatted += "\n"
+                # Create the formatted entry as one string
+                status = 'Available' if availability_status_id == 1 else 'Not Available'
+                append(
+                    f"🩺 **{employee_name}** (ID: {employee_id})\n"
+                    f"   📅 {day_name}: {time_display}\n"
+                    f"   ✅ Status: {status}\n"
+                )
                     
             except Exception as e:
                 # Fallback for unexpected result structure
-                formatted += f"• {str(result)}\n"
+                append(f"• {str(result)}\n")
+        
+        # Entries are separated by a blank line; the join puts it only between them
+        parts = [f"Here's the availability information for your query '{query}':\n\n", "\n".join(blocks)]
+        append = parts.append
         
         # Add summary information
-        if len(results) > 5:
-            formatted += f"\n... and {len(results) - 5} more results available.\n"
+        if total > 5:
+            append(f"\n... and {total - 5} more results available.\n")
         
-        formatted += f"\n📊 Total matches found: {len(results)}"
+        append(f"\n📊 Total matches found: {total}")
         
         if sql_query:
-            formatted += f"\n\n🔍 Query executed successfully against the employee schedules database."
+            append(f"\n\n🔍 Query executed successfully against the employee schedules database.")
         
-        return formatted
+        return "".join(parts)
 
     def _format_appointment_results(self, results: list, query: str) -> str:
         """Format appointment-specific results"""
         if not results:
             return "I couldn't find any appointment information. Would you like to book a new appointment?"
         
-        formatted = "Here are the appointment details I found:\n\n"
-        for result in results[:3]:
+        parts = ["Here are the appointment details I found:\n\n"]
+        for result in islice(results, 3):
             appointment_id = result.get('appointment_id', 'N/A')
-            provider = result.get('provider_name') or f"{result.get('first_name', '')} {result.get('last_name', '')}".strip()
+            provider = _compose_name(result)
             date = result.get('appointment_date', 'Date not specified')
             time = result.get('appointment_time', 'Time not specified')
             status = result.get('status', 'Status unknown')
             
-            formatted += f"• Appointment #{appointment_id}\n"
-            formatted += f"  Provider: {provider}\n"
-            formatted += f"  Date/Time: {date} at {time}\n"
-            formatted += f"  Status: {status}\n\n"
+            parts.extend((
+                f"• Appointment #{appointment_id}\n",
+                f"  Provider: {provider}\n",
+                f"  Date/Time: {date} at {time}\n",
+                f"  Status: {status}\n\n"
+            ))
         
-        return formatted
+        return "".join(parts)
 
     def _format_provider_results(self, results: list, query: str) -> str:
         """Format provider-specific results"""
         if not results:
             return "I couldn't find any providers matching your criteria. Please try different search terms."
         
-        formatted = "Here are the providers I found:\n\n"
-        for result in results[:5]:
-            name = result.get('provider_name') or f"{result.get('first_name', '')} {result.get('last_name', '')}".strip()
-            specialty = result.get('specialty') or result.get('specialization', 'General')
-            phone = result.get('phone') or result.get('contact_phone', 'Phone not available')
-            email = result.get('email') or result.get('contact_email', 'Email not available')
-            
-            formatted += f"• {name}\n"
-            formatted += f"  Specialty: {specialty}\n"
-            formatted += f"  Phone: {phone}\n"
-            formatted += f"  Email: {email}\n\n"
-        
-        return formatted
+        parts = ["Here are the providers I found:\n\n"]
+        for result in islice(results, 5):
+            name = _compose_name(result)
+            # Alternate column names are only looked up when the primary one is empty
+            get = result.get
+            specialty = get('specialty') or get('specialization', 'General')
+            phone = get('phone') or get('contact_phone', 'Phone not available')
+            email = get('email') or get('contact_email', 'Email not available')
+            
+            parts.extend((
+                f"• {name}\n",
+                f"  Specialty: {specialty}\n",
+                f"  Phone: {phone}\n",
+                f"  Email: {email}\n\n"
+            ))
+        
+        return "".join(parts)
 
     def _format_single_result(self, result: dict) -> str:
         """Format a single result nicely"""
-        formatted = ""
+        parts = []
         for key, value in result.items():
             if value is not None:
                 key_display = key.replace('_', ' ').title()
-                formatted += f"{key_display}: {value}\n"
-        return formatted
+                parts.append(f"{key_display}: {value}\n")
+        return "".join(parts)
 
-    def _format_multiple_results(self, results: list) -> str:
+    def _format_multiple_results(self, results: Iterable[dict]) -> str:
         """Format multiple results in a compact way"""
-        formatted = ""
+        rows = []
         for i, result in enumerate(results, 1):
-            formatted += f"{i}. "
-            # Show most relevant fields first
-            if 'provider_name' in result or 'first_name' in result:
-                name = result.get('provider_name') or f"{result.get('first_name', '')} {result.get('last_name', '')}".strip()
-                formatted += name
-            
-            if 'appointment_date' in result:
-                formatted += f" - {result['appointment_date']}"
-            if 'appointment_time' in result:
-                formatted += f" at {result['appointment_time']}"
-            if 'specialty' in result:
-                formatted += f" ({result['specialty']})"
-            
-            formatted += "\n"
-        
-        return formatted
+            # Show most relevant fields first; each optional fragment is ""
+            # when the column is missing
+            name = _compose_name(result) if 'provider_name' in result or 'first_name' in result else ""
+            date_part = f" - {result['appointment_date']}" if 'appointment_date' in result else ""
+            time_part = f" at {result['appointment_time']}" if 'appointment_time' in result else ""
+            spec_part = f" ({result['specialty']})" if 'specialty' in result else ""
+            rows.append(f"{i}. {name}{date_part}{time_part}{spec_part}")
+        
+        return "\n".join(rows) + "\n" if rows else ""
 
     def _extract_query_intent(self, query: str) -> str:
         """Extract the main intent from a query"""
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in ['available', 'availability', 'free', 'open']):
-            return "availability check"
-        elif any(word in query_lower for word in ['book', 'schedule', 'appointment']):
-            return "appointment booking"
-        elif any(word in query_lower for word in ['therapist', 'provider', 'doctor', 'specialist']):
-            return "provider search"
-        elif any(word in query_lower for word in ['cancel', 'reschedule', 'change']):
-            return "appointment modification"
-        else:
-            return "general information"
+        # Cached: one turn classifies the same query for formatting and suggestions
+        return _query_intent(query)
 
     def _generate_availability_suggestions(self, results: list) -> list:
         """Generate contextual suggestions based on availability results"""
@@ -1365,21 +1848,17 @@ class HealthcareResponseGenerator:
             employee_names = set()
             days_mentioned = set()
             
-            for result in results[:3]:  # Check first few results
+            for result in islice(results, 3):  # Check first few results
                 if 'EmployeeName' in result:
                     employee_names.add(result['EmployeeName'])
                 if 'WeekDay' in result:  # Updated column name
-                    day_mapping = {
-                        1: 'Sunday', 2: 'Monday', 3: 'Tuesday', 4: 'Wednesday',
-                        5: 'Thursday', 6: 'Friday', 7: 'Saturday'
-                    }
-                    day_name = day_mapping.get(result['WeekDay'])  # Updated column name
+                    day_name = _DAY_NAMES.get(result['WeekDay'])  # Updated column name
                     if day_name:
                         days_mentioned.add(day_name)
             
             # Generate suggestions based on available employees
             if employee_names:
-                first_employee = list(employee_names)[0]
+                first_employee = next(iter(employee_names))
                 suggestions.append(f"Book with {first_employee}")
                 if len(employee_names) > 1:
                     suggestions.append("Compare all providers")
@@ -1422,35 +1901,9 @@ class HealthcareResponseGenerator:
     def _create_fallback_response(self, error_msg: str) -> ChatResponse:
         """Create a fallback response when all retries fail"""
         if "42S02" in error_msg or "Invalid object name" in error_msg:
-            return ChatResponse(
-                message="I'm having trouble accessing some database tables. This might be a temporary issue. Please try again in a moment, or I can help you with general information about our services.",
-                intent="database_error",
-                suggestions=[
-                    "Try again later", 
-                    "Ask about our services", 
-                    "Contact support",
-                    "Book appointment manually"
-                ]
-            )
+            message, intent, suggestions = _FALLBACK_DB_ERROR
         elif "timeout" in error_msg.lower() or "connection" in error_msg.lower():
-            return ChatResponse(
-                message="I'm experiencing connection issues with our database. Please try your request again, or I can provide general assistance.",
-                intent="connection_error", 
-                suggestions=[
-                    "Try again", 
-                    "Check your connection", 
-                    "Contact support",
-                    "Ask general questions"
-                ]
-            )
+            message, intent, suggestions = _FALLBACK_CONN_ERROR
         else:
-            return ChatResponse(
-                message="I encountered an unexpected issue while processing your request. Our technical team has been notified. Please try again or contact support.",
-                intent="general_error",
-                suggestions=[
-                    "Try rephrasing", 
-                    "Contact support", 
-                    "Try again later",
-                    "Ask different question"
-                ]
-            )
\ No newline at end of file
+            message, intent, suggestions = _FALLBACK_GENERIC
+        return acquire_response(message, intent=intent, suggestions=list(suggestions))
\ No newline at end of file
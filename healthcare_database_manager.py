@@ -5,19 +5,130 @@ Handles operations for the real SQL Server healthcare management database
 
 import pyodbc
 import json
+import threading
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional, Tuple
 import uuid
 import os
 from dotenv import load_dotenv
 
+from db_connection_pool import ConnectionPool
+from db_params import SCHEDULED_DATE_INPUT, as_datetime
+from db_rows import fetch_dicts
+from name_match_ranking import name_search_shape, rank_by_name
+from query_result_cache import QueryResultCache, get_query_result_cache
+
+try:
+    from metaphone import doublemetaphone
+    METAPHONE_AVAILABLE = True
+except ImportError:
+    doublemetaphone = None
+    METAPHONE_AVAILABLE = False
+
 load_dotenv()
 
+# Patient has the indexed FirstNameDM/LastNameDM Double Metaphone columns
+# (see SQL_SERVER_SETUP.md); search on them instead of per-row SOUNDEX
+PATIENT_METAPHONE_COLUMNS = os.getenv('HEALTHCARE_PATIENT_METAPHONE', 'False').lower() == 'true'
+
+# Phonetic part of the patient search filter: SOUNDEX computed on every row,
+# or equality on the precomputed metaphone columns so their indexes apply
+_SOUNDEX_NAME_FILTER = """SOUNDEX(p.FirstName) = SOUNDEX(@first)
+                    OR SOUNDEX(p.LastName) = SOUNDEX(@last)"""
+_METAPHONE_NAME_FILTER = """p.FirstNameDM IN (?, ?)
+                    OR p.LastNameDM IN (?, ?)"""
+
+# First pass of the patient search, tried before the phonetic filter
+_EXACT_NAME_FILTER = "p.FirstName = @first AND p.LastName = @last"
+
+# vw_PatientLocations indexed view exists (see SQL_SERVER_SETUP.md); read a
+# patient's locations from it instead of joining the mapping to Location
+PATIENT_LOCATION_VIEW = os.getenv('HEALTHCARE_PATIENT_LOCATION_VIEW', 'False').lower() == 'true'
+
+# Active locations of each patient, as pl: the join the indexed view
+# materializes, or the view itself
+_PATIENT_LOCATION_JOIN = """(
+                    SELECT plm.PatientId, plm.IsDefault, l.LocationId, l.Name AS LocationName,
+                           l.Address1, l.Address2, l.City, l.StateId, l.ZipCode, l.Phone
+                    FROM PatientLocationMapping plm
+                    JOIN Location l ON plm.LocationId = l.LocationId
+                    WHERE plm.Active = 1 AND l.Active = 1
+                ) pl"""
+_PATIENT_LOCATION_VIEW = "vw_PatientLocations pl WITH (NOEXPAND)"
+
+# Longest appointment the conflict check has to look back for; bounds the
+# ScheduledDate range so it can seek on an (EmployeeId, ScheduledDate) index
+MAX_APPOINTMENT_MINUTES = int(os.getenv('HEALTHCARE_MAX_APPOINTMENT_MINUTES', '1440'))
+
+# Chat session ids generated per os.urandom call
+SESSION_ID_BATCH = 128
+
+# Patient and Employee have a full-text indexed FullNameLower column (see
+# SQL_SERVER_SETUP.md); match name words with CONTAINS instead of '%x%' scans
+NAME_FULLTEXT_INDEX = os.getenv('HEALTHCARE_NAME_FULLTEXT', 'False').lower() == 'true'
+
+
+def _metaphone_codes(word: str) -> Tuple[str, str]:
+    """Primary and alternate Double Metaphone codes (alternate falls back to primary)"""
+    primary, alternate = doublemetaphone(word)
+    return primary, alternate or primary
+
+
+_session_ids = deque()
+_session_ids_lock = threading.Lock()
+
+
+def _next_session_id() -> str:
+    """Random (version 4) UUID string, drawn from a buffer refilled SESSION_ID_BATCH at a time"""
+    while True:
+        try:
+            return _session_ids.popleft()
+        except IndexError:
+            with _session_ids_lock:
+                if not _session_ids:
+                    raw = os.urandom(16 * SESSION_ID_BATCH)
+                    _session_ids.extend(
+                        str(uuid.UUID(bytes=raw[i:i + 16], version=4))
+                        for i in range(0, len(raw), 16)
+                    )
+
+
+def _substring_name_filter(alias: str) -> str:
+    """Substring part of a name search filter for the Patient (p) or Employee (e) alias
+
+    The full-text form takes one parameter, the query from _fulltext_name_query.
+    """
+    if NAME_FULLTEXT_INDEX:
+        return f"CONTAINS({alias}.FullNameLower, ?)"
+    return f"""LOWER({alias}.FirstName) LIKE '%' + @first + '%'
+                    OR LOWER({alias}.LastName) LIKE '%' + @last + '%'"""
+
+
+def _fulltext_name_query(name_parts: List[str]) -> str:
+    """CONTAINS query matching any name part as a word prefix: '"john*" OR "smi*"'"""
+    terms = (part.lower().replace('"', '') for part in name_parts)
+    return ' OR '.join(f'"{term}*"' for term in terms if term)
+
+
+def _name_cache_key(search: str, name: str) -> str:
+    """Result cache key for a name search, ignoring case and extra whitespace"""
+    return QueryResultCache.key(search, (' '.join(name.lower().split()),))
+
+
 class HealthcareDatabaseManager:
     """Manages database operations for the healthcare booking chatbot"""
     
     def __init__(self, connection_string: str = None):
         self.connection_string = connection_string or self._build_connection_string()
+        # Connection currently borrowed by each thread, so nested calls
+        # (e.g. the conflict check inside book_appointment) share it
+        self._local = threading.local()
+        self._pool = ConnectionPool(lambda: pyodbc.connect(self.connection_string))
+        # Shared with the chatbot, so writes through either side invalidate
+        # the name search results cached here
+        self.result_cache = get_query_result_cache()
     
     def _build_connection_string(self) -> str:
         """Build SQL Server connection string from environment variables"""
@@ -33,103 +144,160 @@ class HealthcareDatabaseManager:
             # Use Windows Authentication
             return f"DRIVER={{{driver}}};SERVER={server};DATABASE={database};Trusted_Connection=yes;TrustServerCertificate=yes;"
     
+    @contextmanager
     def get_connection(self):
-        """Get SQL Server database connection"""
-        return pyodbc.connect(self.connection_string)
+        """Borrow a pooled SQL Server connection for the duration of a with block
+
+        Commits on success and rolls back on error like pyodbc's own
+        connection context manager, then hands the connection back to the
+        pool (or drops it, after an error). Nested calls on the same thread
+        reuse the outer connection and leave commit/release to it.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        
+        with self._pool.acquire() as conn:
+            self._local.conn = conn
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                try:
+                    conn.rollback()
+                except pyodbc.Error:
+                    pass
+                raise
+            finally:
+                self._local.conn = None
     
     def search_patient_by_name(self, patient_name: str) -> List[Dict]:
         """Search for patients using fuzzy name matching with phonetic similarity"""
+        # Split the name here rather than with STRING_SPLIT, so the query
+        # compares against plain variables instead of re-running NameParts
+        # subqueries for every predicate and row
+        name_parts = patient_name.split()
+        if not name_parts:
+            return []
+        first_name, last_name = name_parts[0], name_parts[-1]
+        
+        cache_key = _name_cache_key('search_patient_by_name', patient_name)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
             # SQL Server-compatible patient search query with phonetic matching
             query = """
-                WITH NameParts AS ( 
-                    SELECT value AS Part, ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS PartNumber 
-                    FROM STRING_SPLIT(?, ' ')
-                    WHERE LEN(TRIM(value)) > 0
-                ) 
-                SELECT TOP 10
+                SET NOCOUNT ON;
+                DECLARE @full NVARCHAR(200) = LOWER(TRIM(?)),
+                        @first NVARCHAR(100) = LOWER(?),
+                        @last NVARCHAR(100) = LOWER(?);
+                
+                SELECT TOP {top}
                     p.PatientId, 
                     p.FirstName, 
                     p.MiddleName, 
                     p.LastName,
                     p.DOB,
                     p.Email,
-                    s.Name as SiteName,
-                    -- Exact match score
-                    CASE 
-                        WHEN LOWER(TRIM(CONCAT(ISNULL(p.FirstName, ''), ' ', ISNULL(p.MiddleName, ''), ' ', ISNULL(p.LastName, '')))) = LOWER(TRIM(?)) THEN 100
-                        WHEN LOWER(TRIM(CONCAT(ISNULL(p.FirstName, ''), ' ', ISNULL(p.LastName, '')))) = LOWER(TRIM(?)) THEN 95
-                        ELSE 0 
-                    END +
-                    -- First name similarity using SOUNDEX
-                    CASE 
-                        WHEN LOWER(p.FirstName) = LOWER((SELECT Part FROM NameParts WHERE PartNumber = 1)) THEN 40
-                        WHEN SOUNDEX(p.FirstName) = SOUNDEX((SELECT Part FROM NameParts WHERE PartNumber = 1)) THEN 30
-                        WHEN LOWER(p.FirstName) LIKE LOWER((SELECT Part + '%' FROM NameParts WHERE PartNumber = 1)) THEN 25
-                        ELSE 0 
-                    END +
-                    -- Last name similarity using SOUNDEX
-                    CASE 
-                        WHEN LOWER(p.LastName) = LOWER((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) THEN 40
-                        WHEN SOUNDEX(p.LastName) = SOUNDEX((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) THEN 30
-                        WHEN LOWER(p.LastName) LIKE LOWER((SELECT Part + '%' FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) THEN 25
-                        ELSE 0 
-                    END AS MatchScore
+                    s.Name as SiteName{match_score}
                 FROM Patient p
                 LEFT JOIN Site s ON p.SiteId = s.SiteId
                 WHERE p.IsActive = 1
-                AND (
-                    SOUNDEX(p.FirstName) = SOUNDEX((SELECT Part FROM NameParts WHERE PartNumber = 1))
-                    OR SOUNDEX(p.LastName) = SOUNDEX((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts)))
-                    OR LOWER(p.FirstName) LIKE '%' + LOWER((SELECT Part FROM NameParts WHERE PartNumber = 1)) + '%'
-                    OR LOWER(p.LastName) LIKE '%' + LOWER((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) + '%'
-                )
-                ORDER BY MatchScore DESC
+                AND {name_filter}
+                {order_by}
             """
             
-            cursor.execute(query, (patient_name, patient_name, patient_name))
-            
-            # Convert to list of dictionaries
-            columns = [column[0] for column in cursor.description]
+            params = [patient_name, first_name, last_name]
+            shape = name_search_shape('p')
             results = []
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
             
-            return results
+            # Exact first and last name first: plain equality (the column
+            # collation is case-insensitive) seeks a name index, and the
+            # phonetic/substring widening below only runs when it misses
+            if len(name_parts) > 1:
+                cursor.execute(query.format(name_filter=_EXACT_NAME_FILTER, **shape), params)
+                results = fetch_dicts(cursor)
+            
+            if not results:
+                if PATIENT_METAPHONE_COLUMNS and METAPHONE_AVAILABLE:
+                    phonetic_filter = _METAPHONE_NAME_FILTER
+                    params.extend(_metaphone_codes(first_name))
+                    params.extend(_metaphone_codes(last_name))
+                else:
+                    phonetic_filter = _SOUNDEX_NAME_FILTER
+                if NAME_FULLTEXT_INDEX:
+                    params.append(_fulltext_name_query(name_parts))
+                
+                name_filter = f"""(
+                    {phonetic_filter}
+                    OR {_substring_name_filter('p')}
+                )"""
+                cursor.execute(query.format(name_filter=name_filter, **shape), params)
+                results = fetch_dicts(cursor)
+            
+            results = rank_by_name(patient_name, results)
+        
+        self.result_cache.insert(cache_key, results, ('Patient', 'Site'))
+        return results
+    
+    def refresh_patient_metaphone_codes(self, batch_size: int = 1000) -> int:
+        """Recompute Patient.FirstNameDM/LastNameDM for rows whose codes are missing
+
+        Run after adding the columns and periodically (or from a job) so
+        patients created since the last run are found by the metaphone
+        search. Returns the number of patients updated.
+        """
+        if not METAPHONE_AVAILABLE:
+            raise RuntimeError("metaphone package not installed; pip install metaphone")
+        
+        updated = 0
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.fast_executemany = True
+            cursor.execute("""
+                SELECT PatientId, FirstName, LastName FROM Patient
+                WHERE FirstNameDM IS NULL OR LastNameDM IS NULL
+            """)
+            rows = cursor.fetchall()
+            
+            for start in range(0, len(rows), batch_size):
+                batch = [
+                    (_metaphone_codes(first_name or '')[0], _metaphone_codes(last_name or '')[0], patient_id)
+                    for patient_id, first_name, last_name in rows[start:start + batch_size]
+                ]
+                cursor.executemany("UPDATE Patient SET FirstNameDM = ?, LastNameDM = ? WHERE PatientId = ?", batch)
+                updated += len(batch)
+        
+        self.result_cache.invalidate_table('Patient')
+        return updated
     
     def search_employee_by_name(self, employee_name: str) -> List[Dict]:
         """Search for employees using fuzzy name matching"""
+        # Names may be written "Last, First"; commas split like spaces
+        name_parts = employee_name.replace(',', ' ').split()
+        if not name_parts:
+            return []
+        
+        cache_key = _name_cache_key('search_employee_by_name', employee_name)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
             query = """
-                WITH NameParts AS ( 
-                    SELECT value AS Part, ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS PartNumber 
-                    FROM (
-                        SELECT TRIM(value) as value 
-                        FROM (
-                            SELECT ? as input
-                            UNION ALL SELECT REPLACE(?, ',', ' ')
-                        ) 
-                        CROSS JOIN (
-                            WITH split(part, rest) AS (
-                                SELECT '', input || ' '
-                                UNION ALL
-                                SELECT 
-                                    SUBSTR(rest, 1, INSTR(rest, ' ') - 1),
-                                    SUBSTR(rest, INSTR(rest, ' ') + 1)
-                                FROM split
-                                WHERE rest != ''
-                            )
-                            SELECT part as value FROM split WHERE part != ''
-                        )
-                        WHERE LENGTH(TRIM(value)) > 0
-                    )
-                ) 
-                SELECT 
+                SET NOCOUNT ON;
+                DECLARE @full NVARCHAR(200) = LOWER(TRIM(?)),
+                        @first NVARCHAR(100) = LOWER(?),
+                        @last NVARCHAR(100) = LOWER(?);
+                
+                SELECT TOP {top}
                     e.EmployeeId,
                     e.FirstName,
                     e.MiddleName, 
@@ -138,39 +306,40 @@ class HealthcareDatabaseManager:
                     e.Email,
                     e.PhoneCell,
                     s.Name as SiteName,
-                    et.EmployeeTypeName,
-                    -- Match scoring
-                    CASE 
-                        WHEN LOWER(TRIM(CONCAT(COALESCE(e.FirstName, ''), ' ', COALESCE(e.LastName, '')))) = LOWER(TRIM(?)) THEN 100
-                        WHEN LOWER(e.FirstName) = LOWER((SELECT Part FROM NameParts WHERE PartNumber = 1)) THEN 50
-                        WHEN LOWER(e.LastName) = LOWER((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) THEN 50
-                        WHEN LOWER(e.FirstName) LIKE LOWER((SELECT Part || '%' FROM NameParts WHERE PartNumber = 1)) THEN 30
-                        WHEN LOWER(e.LastName) LIKE LOWER((SELECT Part || '%' FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) THEN 30
-                        ELSE 0 
-                    END AS MatchScore
+                    et.EmployeeTypeName{match_score}
                 FROM Employee e
                 LEFT JOIN Site s ON e.SiteId = s.SiteId
                 LEFT JOIN EmployeeType et ON e.EmployeeTypeId = et.EmployeeTypeId
                 WHERE e.Active = 1
                 AND e.TerminationDate IS NULL
                 AND (
-                    LOWER(e.FirstName) LIKE '%' || LOWER((SELECT Part FROM NameParts WHERE PartNumber = 1)) || '%'
-                    OR LOWER(e.LastName) LIKE '%' || LOWER((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) || '%'
+                    {substring_filter}
                 )
-                ORDER BY MatchScore DESC
-                LIMIT 10
-            """
+                {order_by}
+            """.format(substring_filter=_substring_name_filter('e'),
+                       # Employees are only filtered by substring, so they
+                       # are scored without SOUNDEX points
+                       **name_search_shape('e', phonetic=False))
             
-            cursor.execute(query, (employee_name, employee_name, employee_name))
-            return [dict(row) for row in cursor.fetchall()]
+            params = [employee_name, name_parts[0], name_parts[-1]]
+            if NAME_FULLTEXT_INDEX:
+                params.append(_fulltext_name_query(name_parts))
+            
+            cursor.execute(query, params)
+            results = rank_by_name(employee_name, fetch_dicts(cursor))
+        
+        self.result_cache.insert(cache_key, results, ('Employee', 'Site', 'EmployeeType'))
+        return results
     
     def get_patient_authorizations(self, patient_id: int) -> List[Dict]:
         """Get active authorizations for a patient"""
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
             query = """
+                SET NOCOUNT ON;
+                DECLARE @today DATE = CAST(GETDATE() AS date);
+                
                 SELECT 
                     a.AuthId,
                     a.AuthNumber,
@@ -191,21 +360,23 @@ class HealthcareDatabaseManager:
                 LEFT JOIN AuthStatus ast ON a.AuthStatusId = ast.AuthStatusID
                 WHERE a.PatientId = ?
                 AND a.Valid = 1
-                AND (a.EndDate IS NULL OR a.EndDate >= date('now'))
-                AND ast.AuthStatusID = 4  -- Approved status
+                AND a.AuthStatusId = 4  -- Approved status
+                AND (a.EndDate IS NULL OR a.EndDate >= @today)
                 ORDER BY a.StartDate DESC
             """
             
             cursor.execute(query, (patient_id,))
-            return [dict(row) for row in cursor.fetchall()]
+            return fetch_dicts(cursor)
     
     def get_auth_details(self, auth_id: int) -> List[Dict]:
         """Get authorization details and services"""
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
             query = """
+                SET NOCOUNT ON;
+                DECLARE @today DATE = CAST(GETDATE() AS date);
+                
                 SELECT 
                     ad.AuthDetailId,
                     ad.AuthId,
@@ -225,136 +396,157 @@ class HealthcareDatabaseManager:
                 LEFT JOIN Auth a ON ad.AuthId = a.AuthId
                 LEFT JOIN TreatmentType tt ON a.TreatmentTypeId = tt.TreatmentTypeid
                 WHERE ad.AuthId = ?
-                AND (ad.EndDate IS NULL OR ad.EndDate >= date('now'))
+                AND (ad.EndDate IS NULL OR ad.EndDate >= @today)
                 ORDER BY ad.AuthDetailId
             """
             
             cursor.execute(query, (auth_id,))
-            return [dict(row) for row in cursor.fetchall()]
+            return fetch_dicts(cursor)
     
     def get_patient_locations(self, patient_id: int) -> List[Dict]:
         """Get available locations for a patient"""
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
             query = """
                 SELECT DISTINCT
-                    l.LocationId,
-                    l.Name as LocationName,
-                    l.Address1,
-                    l.Address2,
-                    l.City,
+                    pl.LocationId,
+                    pl.LocationName,
+                    pl.Address1,
+                    pl.Address2,
+                    pl.City,
                     st.StateName,
-                    l.ZipCode,
-                    l.Phone,
-                    plm.IsDefault,
+                    pl.ZipCode,
+                    pl.Phone,
+                    pl.IsDefault,
                     z.ZoneName
-                FROM PatientLocationMapping plm
-                JOIN Location l ON plm.LocationId = l.LocationId
-                LEFT JOIN State st ON l.StateId = st.StateId
-                LEFT JOIN ZoneLocationMapping zlm ON l.LocationId = zlm.LocationId
+                FROM {locations}
+                LEFT JOIN State st ON pl.StateId = st.StateId
+                LEFT JOIN ZoneLocationMapping zlm ON pl.LocationId = zlm.LocationId
                 LEFT JOIN [Zone] z ON zlm.ZoneId = z.ZoneId
-                WHERE plm.PatientId = ?
-                AND plm.Active = 1
-                AND l.Active = 1
-                ORDER BY plm.IsDefault DESC, l.Name
-            """
+                WHERE pl.PatientId = ?
+                ORDER BY pl.IsDefault DESC, pl.LocationName
+            """.format(locations=_PATIENT_LOCATION_VIEW if PATIENT_LOCATION_VIEW else _PATIENT_LOCATION_JOIN)
             
             cursor.execute(query, (patient_id,))
-            return [dict(row) for row in cursor.fetchall()]
+            return fetch_dicts(cursor)
     
     def check_employee_eligibility(self, employee_id: int, service_type_id: int, 
                                  location_id: int, treatment_type_id: int) -> Dict:
         """Check if employee is eligible for specific service at location"""
-        with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
+        return self.check_employees_eligibility(
+            [employee_id], service_type_id, location_id, treatment_type_id)[int(employee_id)]
+    
+    def check_employees_eligibility(self, employee_ids: List[int], service_type_id: int,
+                                    location_id: int, treatment_type_id: int) -> Dict[int, Dict]:
+        """Check eligibility of several employees for a service at a location in one query
+
+        Returns the check_employee_eligibility result for each id, keyed by id.
+        """
+        results = {}
+        for employee_id in map(int, employee_ids):
             # Check multiple eligibility criteria
-            eligibility_checks = {
-                'is_active': False,
-                'has_treatment_type': False,
-                'has_service_rate': False,
-                'in_zone': False,
-                'has_clearances': False,
-                'has_credentials': False,
-                'has_qualifications': False,
-                'has_training': False,
-                'not_on_leave': False,
-                'available_hours': False
+            results[employee_id] = {
+                'eligible': False,
+                'checks': {
+                    'is_active': False,
+                    'has_treatment_type': False,
+                    'has_service_rate': False,
+                    'in_zone': False,
+                    'has_clearances': False,
+                    'has_credentials': False,
+                    'has_qualifications': False,
+                    'has_training': False,
+                    'not_on_leave': False,
+                    'available_hours': False
+                },
+                'employee_id': employee_id
             }
+        if not results:
+            return results
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
             
-            # Check if employee is active
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM Employee 
-                WHERE EmployeeId = ? AND Active = 1 AND TerminationDate IS NULL
-            """, (employee_id,))
-            eligibility_checks['is_active'] = cursor.fetchone()['count'] > 0
-            
-            # Check treatment type mapping
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM EmployeeTreatmentTypeMapping 
-                WHERE EmployeeId = ? AND TreatmentTypeId = ?
-            """, (employee_id, treatment_type_id))
-            eligibility_checks['has_treatment_type'] = cursor.fetchone()['count'] > 0
-            
-            # Check service rate
-            cursor.execute("""
-                SELECT COUNT(*) as count FROM EmployeeServiceRate 
-                WHERE EmployeeId = ? AND ServiceTypeId = ? AND Active = 1
-            """, (employee_id, service_type_id))
-            eligibility_checks['has_service_rate'] = cursor.fetchone()['count'] > 0
-            
-            # Check zone mapping (if location has zones)
-            cursor.execute("""
-                SELECT COUNT(*) as count 
-                FROM EmployeeZoneMapping ezm
-                JOIN ZoneLocationMapping zlm ON ezm.ZoneId = zlm.ZoneId
-                WHERE ezm.EmployeeId = ? AND zlm.LocationId = ?
-            """, (employee_id, location_id))
-            zone_count = cursor.fetchone()['count']
-            eligibility_checks['in_zone'] = zone_count > 0
-            
-            # Check required clearances (active and not expired)
-            cursor.execute("""
-                SELECT 
-                    COUNT(DISTINCT ects.EmpClearanceTypeId) as required_count,
-                    COUNT(DISTINCT CASE WHEN ec.Active = 1 AND (ec.Expirationdate IS NULL OR ec.Expirationdate >= date('now')) THEN ects.EmpClearanceTypeId END) as valid_count
-                FROM Employee e
-                JOIN EmpClearanceTypeSiteMapping ects ON e.SiteId = ects.SiteId
-                LEFT JOIN EmpClearance ec ON e.EmployeeId = ec.EmployeeID AND ects.EmpClearanceTypeId = ec.EmpClearanceTypeId
-                WHERE e.EmployeeId = ? AND ects.Active = 1
-            """, (employee_id,))
-            clearance_result = cursor.fetchone()
-            eligibility_checks['has_clearances'] = (clearance_result['required_count'] == 0 or 
-                                                  clearance_result['valid_count'] == clearance_result['required_count'])
-            
-            # Similar checks for credentials, qualifications, and training...
-            # (Abbreviated for space, but would follow same pattern)
-            
-            # Check if not on leave
+            # One row of 0/1 flags per employee, every criterion correlated
+            # on the id list passed in as a JSON array
             cursor.execute("""
-                SELECT COUNT(*) as count FROM EmployeeLeave el
-                JOIN LeaveStatus ls ON el.LeaveStatusId = ls.LeaveStatusId
-                WHERE el.EmployeeId = ? 
-                AND ls.Name = 'Approved'
-                AND date('now') BETWEEN el.StartDate AND el.EndDate
-            """, (employee_id,))
-            eligibility_checks['not_on_leave'] = cursor.fetchone()['count'] == 0
-            
-            overall_eligible = all(eligibility_checks.values())
+                SET NOCOUNT ON;
+                DECLARE @today DATE = CAST(GETDATE() AS date);
+                
+                SELECT
+                    ids.EmployeeId,
+                    
+                    -- Employee is active
+                    CASE WHEN EXISTS (
+                        SELECT 1 FROM Employee
+                        WHERE EmployeeId = ids.EmployeeId AND Active = 1 AND TerminationDate IS NULL
+                    ) THEN 1 ELSE 0 END AS is_active,
+                    
+                    -- Treatment type mapping
+                    CASE WHEN EXISTS (
+                        SELECT 1 FROM EmployeeTreatmentTypeMapping
+                        WHERE EmployeeId = ids.EmployeeId AND TreatmentTypeId = ?
+                    ) THEN 1 ELSE 0 END AS has_treatment_type,
+                    
+                    -- Service rate
+                    CASE WHEN EXISTS (
+                        SELECT 1 FROM EmployeeServiceRate
+                        WHERE EmployeeId = ids.EmployeeId AND ServiceTypeId = ? AND Active = 1
+                    ) THEN 1 ELSE 0 END AS has_service_rate,
+                    
+                    -- Zone mapping (if location has zones)
+                    CASE WHEN EXISTS (
+                        SELECT 1
+                        FROM EmployeeZoneMapping ezm
+                        JOIN ZoneLocationMapping zlm ON ezm.ZoneId = zlm.ZoneId
+                        WHERE ezm.EmployeeId = ids.EmployeeId AND zlm.LocationId = ?
+                    ) THEN 1 ELSE 0 END AS in_zone,
+                    
+                    -- No clearance required at the employee's site lacks an
+                    -- active, unexpired clearance
+                    CASE WHEN NOT EXISTS (
+                        SELECT 1
+                        FROM Employee e
+                        JOIN EmpClearanceTypeSiteMapping ects ON e.SiteId = ects.SiteId
+                        WHERE e.EmployeeId = ids.EmployeeId AND ects.Active = 1
+                        AND NOT EXISTS (
+                            SELECT 1 FROM EmpClearance ec
+                            WHERE ec.EmployeeID = e.EmployeeId
+                            AND ec.EmpClearanceTypeId = ects.EmpClearanceTypeId
+                            AND ec.Active = 1
+                            AND (ec.Expirationdate IS NULL OR ec.Expirationdate >= @today)
+                        )
+                    ) THEN 1 ELSE 0 END AS has_clearances,
+                    
+                    -- Not on approved leave today
+                    CASE WHEN NOT EXISTS (
+                        SELECT 1 FROM EmployeeLeave el
+                        JOIN LeaveStatus ls ON el.LeaveStatusId = ls.LeaveStatusId
+                        WHERE el.EmployeeId = ids.EmployeeId
+                        AND ls.Name = 'Approved'
+                        AND @today BETWEEN el.StartDate AND el.EndDate
+                    ) THEN 1 ELSE 0 END AS not_on_leave
+                FROM (SELECT DISTINCT CAST(value AS INT) AS EmployeeId FROM OPENJSON(?)) ids
+            """, (treatment_type_id, service_type_id, location_id, json.dumps(list(results))))
             
-            return {
-                'eligible': overall_eligible,
-                'checks': eligibility_checks,
-                'employee_id': employee_id
-            }
+            columns = [column[0] for column in cursor.description][1:]
+            for row in cursor.fetchall():
+                result = results[row[0]]
+                checks = result['checks']
+                for check, passed in zip(columns, row[1:]):
+                    checks[check] = bool(passed)
+                
+                # Credentials, qualifications and training would follow the same
+                # pattern (abbreviated for space)
+                
+                result['eligible'] = all(checks.values())
+        
+        return results
     
     def get_employee_availability(self, employee_id: int, start_date: str, end_date: str) -> List[Dict]:
         """Get employee availability for date range"""
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
             query = """
@@ -377,13 +569,12 @@ class HealthcareDatabaseManager:
             """
             
             cursor.execute(query, (employee_id, end_date, start_date))
-            return [dict(row) for row in cursor.fetchall()]
+            return fetch_dicts(cursor)
     
     def suggest_employees(self, service_type_id: int, treatment_type_id: int, 
                          location_id: int, patient_id: int, start_datetime: str) -> List[Dict]:
         """Suggest eligible employees based on comprehensive criteria"""
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
             # Complex query to score and rank employees
@@ -420,36 +611,44 @@ class HealthcareDatabaseManager:
                     AND e.Suspended = 0
                     
                     -- Exclude employees on leave
-                    AND e.EmployeeId NOT IN (
-                        SELECT el.EmployeeId FROM EmployeeLeave el
+                    AND NOT EXISTS (
+                        SELECT 1 FROM EmployeeLeave el
                         JOIN LeaveStatus ls ON el.LeaveStatusId = ls.LeaveStatusId
-                        WHERE ls.Name = 'Approved'
-                        AND date(?) BETWEEN el.StartDate AND el.EndDate
+                        WHERE el.EmployeeId = e.EmployeeId
+                        AND ls.Name = 'Approved'
+                        AND CAST(? AS date) BETWEEN el.StartDate AND el.EndDate
                     )
                     
                     -- Exclude employees with patient exclusions
-                    AND e.EmployeeId NOT IN (
-                        SELECT epe.EmployeeId FROM EmpPatientExclusion epe
-                        WHERE epe.PatientId = ?
+                    AND NOT EXISTS (
+                        SELECT 1 FROM EmpPatientExclusion epe
+                        WHERE epe.EmployeeId = e.EmployeeId
+                        AND epe.PatientId = ?
                     )
                 )
-                SELECT * FROM EmployeeScores
+                SELECT TOP 10 * FROM EmployeeScores
                 WHERE Score > 0
                 ORDER BY Score DESC, LastName, FirstName
-                LIMIT 10
+                -- One cached plan built from average selectivity instead of
+                -- the first call's sniffed treatment/service/location ids
+                OPTION (OPTIMIZE FOR UNKNOWN)
             """
             
             start_date = start_datetime.split('T')[0] if 'T' in start_datetime else start_datetime.split(' ')[0]
             
             cursor.execute(query, (treatment_type_id, service_type_id, location_id, 
                                  patient_id, start_date, patient_id))
-            return [dict(row) for row in cursor.fetchall()]
+            return fetch_dicts(cursor)
     
     def check_appointment_conflicts(self, employee_id: int, start_datetime: str, 
-                                  duration_minutes: int) -> List[Dict]:
-        """Check for appointment conflicts for an employee"""
+                                  duration_minutes: int, lock: bool = False) -> List[Dict]:
+        """Check for appointment conflicts for an employee
+
+        With lock=True the checked range stays locked (UPDLOCK, HOLDLOCK)
+        until the caller's transaction ends, so no other booking can insert
+        into it between this check and the caller's INSERT.
+        """
         with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
             query = """
@@ -457,20 +656,29 @@ class HealthcareDatabaseManager:
                     a.AppointmentId,
                     a.ScheduledDate,
                     a.ScheduledMinutes,
-                    p.FirstName || ' ' || p.LastName as PatientName,
+                    CONCAT(p.FirstName, ' ', p.LastName) as PatientName,
                     st.ServiceTypeDesc
-                FROM Appointment a
+                FROM Appointment a {lock_hint}
                 JOIN Patient p ON a.PatientId = p.PatientId
                 JOIN ServiceType st ON a.ServiceTypeId = st.ServiceTypeId
                 WHERE a.EmployeeId = ?
                 AND a.AppointmentStatusId NOT IN (3, 4)  -- Not cancelled or no-show
-                AND datetime(a.ScheduledDate) < datetime(?, '+' || ? || ' minutes')
-                AND datetime(a.ScheduledDate, '+' || a.ScheduledMinutes || ' minutes') > datetime(?)
+                -- Starts before the new slot ends, no earlier than the longest
+                -- appointment before it (a seekable ScheduledDate range) ...
+                AND a.ScheduledDate < ?
+                AND a.ScheduledDate > ?
+                -- ... and is still running when the new slot starts
+                AND DATEADD(MINUTE, a.ScheduledMinutes, a.ScheduledDate) > ?
                 ORDER BY a.ScheduledDate
-            """
+            """.format(lock_hint='WITH (UPDLOCK, HOLDLOCK)' if lock else '')
             
-            cursor.execute(query, (employee_id, start_datetime, duration_minutes, start_datetime))
-            return [dict(row) for row in cursor.fetchall()]
+            start = as_datetime(start_datetime)
+            end = start + timedelta(minutes=int(duration_minutes))
+            lookback = start - timedelta(minutes=MAX_APPOINTMENT_MINUTES)
+            cursor.setinputsizes([(pyodbc.SQL_INTEGER, 0, 0), SCHEDULED_DATE_INPUT,
+                                  SCHEDULED_DATE_INPUT, SCHEDULED_DATE_INPUT])
+            cursor.execute(query, (employee_id, end, lookback, start))
+            return fetch_dicts(cursor)
     
     def book_appointment(self, booking_data: Dict) -> Dict:
         """Book a new appointment with all validations"""
@@ -486,11 +694,14 @@ class HealthcareDatabaseManager:
                     if field not in booking_data:
                         return {'success': False, 'error': f'Missing required field: {field}'}
                 
-                # Check for conflicts
+                # Check for conflicts on this connection and keep the range
+                # locked until the INSERT commits, so two bookings for the
+                # same slot can't both pass the check
                 conflicts = self.check_appointment_conflicts(
                     booking_data['employee_id'], 
                     booking_data['scheduled_date'], 
-                    booking_data['scheduled_minutes']
+                    booking_data['scheduled_minutes'],
+                    lock=True
                 )
                 
                 if conflicts:
@@ -502,29 +713,38 @@ class HealthcareDatabaseManager:
                 
                 # Insert appointment
                 insert_query = """
+                    SET NOCOUNT ON;
                     INSERT INTO Appointment (
                         PatientId, AuthId, AuthDetailId, ServiceTypeId, EmployeeId,
                         ScheduledDate, ScheduledMinutes, AppointmentStatusId, LocationId,
                         HasPayroll, HasBilling, IsBillable, IsInternalAppointment, IsNonPayable,
                         GroupAppointment, Createdate, Createdby, Notes
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, 0, 0, 1, 0, 0, 'N', ?, 1, ?)
+                    )
+                    OUTPUT INSERTED.AppointmentId
+                    VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, 0, 0, 1, 0, 0, 'N', ?, 1, ?)
                 """
                 
+                # ScheduledDate goes over as a native timestamp, not a
+                # string for the server to parse
+                cursor.setinputsizes([None] * 5 + [SCHEDULED_DATE_INPUT] + [None] * 4)
                 cursor.execute(insert_query, (
                     booking_data['patient_id'],
                     booking_data['auth_id'],
                     booking_data['auth_detail_id'],
                     booking_data['service_type_id'],
                     booking_data['employee_id'],
-                    booking_data['scheduled_date'],
+                    as_datetime(booking_data['scheduled_date']),
                     booking_data['scheduled_minutes'],
                     booking_data['location_id'],
                     datetime.now(),
                     booking_data.get('notes', '')
                 ))
                 
-                appointment_id = cursor.lastrowid
+                # pyodbc leaves lastrowid unset on SQL Server; the new id
+                # comes back as the INSERT's own result row
+                appointment_id = cursor.fetchone()[0]
                 conn.commit()
+                self.result_cache.invalidate_table('Appointment')
                 
                 return {
                     'success': True,
@@ -538,7 +758,7 @@ class HealthcareDatabaseManager:
     
     def create_chat_session(self, patient_id: int = None) -> str:
         """Create a new chat session"""
-        session_id = str(uuid.uuid4())
+        session_id = _next_session_id()
         
         # For now, we'll use a simple session tracking
         # In production, you'd want a proper sessions table
@@ -10,51 +10,116 @@ from typing import List, Dict, Optional, Tuple
 import uuid
 import os
 import time
+import random
+import re
 import functools
 import logging
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+from db_connection_pool import ConnectionPool
+from db_params import SCHEDULED_DATE_INPUT, as_datetime
+from db_rows import fetch_dicts
+from name_match_ranking import name_search_shape, rank_by_name
+from query_result_cache import get_query_result_cache
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-def retry_db_operation(max_retries=3, delay=1, backoff=2):
+# Distinct SQL texts whose result column names are kept; execute_query runs
+# generated SQL, so the cache is emptied rather than left to grow
+COLUMN_CACHE_SIZE = 512
+
+
+# Patient and Employee have indexed FirstNameSoundex/LastNameSoundex persisted
+# columns (see SQL_SERVER_SETUP.md); filter name searches by equality on them
+NAME_SOUNDEX_COLUMNS = os.getenv('HEALTHCARE_NAME_SOUNDEX_COLUMNS', 'False').lower() == 'true'
+
+# Name search parameters bound at the declared @full/@first/@last sizes.
+# pyodbc otherwise sizes each NVARCHAR to the string passed, so every name
+# length got its own prepared statement and cached plan on the server
+_NAME_SEARCH_INPUTS = [(pyodbc.SQL_WVARCHAR, 200, 0), (pyodbc.SQL_WVARCHAR, 100, 0),
+                       (pyodbc.SQL_WVARCHAR, 100, 0)]
+
+
+def _name_search_params(name: str, name_parts: List[str]) -> Tuple[str, str, str]:
+    """@full/@first/@last values cut to their _NAME_SEARCH_INPUTS sizes
+
+    A longer string bound at a fixed size fails with SQLSTATE 22001 (string
+    data, right truncation) instead of being cut by the server.
+    """
+    return name.strip()[:200], name_parts[0][:100], name_parts[-1][:100]
+
+
+def _name_filter(alias: str) -> str:
+    """Name search filter for the Patient (p) or Employee (e) alias
+
+    With the SOUNDEX columns it is two index seeks; otherwise SOUNDEX and
+    '%part%' LIKEs are evaluated on every active row. Either way exact and
+    prefix matches are ranked first, by rapidfuzz or the MatchScore CASE.
+    """
+    if NAME_SOUNDEX_COLUMNS:
+        return f"""(
+                    {alias}.FirstNameSoundex = SOUNDEX(@first)
+                    OR {alias}.LastNameSoundex = SOUNDEX(@last)
+                )"""
+    return f"""(
+                    SOUNDEX({alias}.FirstName) = SOUNDEX(@first)
+                    OR SOUNDEX({alias}.LastName) = SOUNDEX(@last)
+                    OR LOWER({alias}.FirstName) LIKE '%' + @first + '%'
+                    OR LOWER({alias}.LastName) LIKE '%' + @last + '%'
+                )"""
+
+
+# SQLSTATEs worth retrying: deadlock/serialization failure, lost or refused
+# connections, timeouts, and invalid object name (kept from the original list)
+RETRYABLE_SQLSTATES = frozenset({
+    "40001", "40P01", "08001", "08S01", "08006", "HYT00", "HYT01", "42S02",
+})
+
+# SQL Server error numbers retried whatever SQLSTATE the driver reports them
+# under (1205 deadlock victim usually arrives as 40001, sometimes HY000)
+_RETRYABLE_ERROR_NUMBER = re.compile(r"\((1205)\)")
+
+
+def _is_retryable(e: pyodbc.Error) -> bool:
+    """Whether a pyodbc error is transient, judged by its SQLSTATE and message"""
+    sqlstate = e.args[0] if e.args else ""
+    message = str(e.args[1]) if len(e.args) > 1 else str(e)
+    return (sqlstate in RETRYABLE_SQLSTATES
+            or _RETRYABLE_ERROR_NUMBER.search(message) is not None
+            or "Connection refused" in message
+            or "timeout" in message.lower())
+
+
+def retry_db_operation(max_retries=3, delay=1, backoff=2, cap=60):
     """
     Decorator for database operations with exponential backoff retry logic
+
+    Sleeps a random time up to delay * backoff**(attempt - 1), at most cap
+    seconds, so callers that failed together, e.g. both sides of a
+    deadlock, don't retry in lockstep.
     """
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             retries = 0
-            current_delay = delay
             
             while retries < max_retries:
                 try:
                     return func(*args, **kwargs)
                 except pyodbc.Error as e:
                     retries += 1
-                    error_code = str(e)
-                    
-                    # Check if it's a retryable error
-                    retryable_errors = [
-                        "42S02",  # Invalid object name
-                        "08001",  # Connection timeout
-                        "08S01",  # Communication link failure
-                        "40001",  # Deadlock
-                        "Connection refused",
-                        "timeout"
-                    ]
-                    
-                    is_retryable = any(err in error_code for err in retryable_errors)
                     
-                    if retries >= max_retries or not is_retryable:
+                    if retries >= max_retries or not _is_retryable(e):
                         logger.error(f"Database operation failed after {retries} retries: {str(e)}")
                         raise
                     
+                    sleep_for = random.uniform(0, min(cap, delay * backoff ** (retries - 1)))
                     logger.warning(f"Database operation failed (attempt {retries}/{max_retries}): {str(e)}")
-                    logger.info(f"Retrying in {current_delay} seconds...")
-                    time.sleep(current_delay)
-                    current_delay *= backoff
+                    logger.info(f"Retrying in {sleep_for:.2f} seconds...")
+                    time.sleep(sleep_for)
                 
                 except Exception as e:
                     # For non-database errors, don't retry
@@ -70,6 +135,9 @@ class HealthcareDatabaseManager:
     
     def __init__(self, connection_string: str = None):
         self.connection_string = connection_string or self._build_connection_string()
+        self._pool = ConnectionPool(self._connect)
+        # SQL text -> result column names
+        self._col_cache: Dict[str, Tuple[str, ...]] = {}
         print(f"🔍 DEBUG: Database manager initialized")
         print(f"🔍 DEBUG: Connection string: {self._mask_connection_string()}")
     
@@ -105,8 +173,27 @@ class HealthcareDatabaseManager:
             masked = masked[:start] + '***' + masked[end:]
         return masked
     
+    @contextmanager
     def get_connection(self):
-        """Get SQL Server database connection with enhanced error handling"""
+        """Borrow a pooled SQL Server connection for the duration of a with block
+
+        Commits on success and rolls back on error like pyodbc's own
+        connection context manager, then hands the connection back to the
+        pool (or drops it, after an error).
+        """
+        with self._pool.acquire() as conn:
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                try:
+                    conn.rollback()
+                except pyodbc.Error:
+                    pass
+                raise
+    
+    def _connect(self):
+        """Open a new SQL Server connection with enhanced error handling"""
         try:
             print("🔍 DEBUG: Attempting to connect to SQL Server...")
             connection = pyodbc.connect(self.connection_string)
@@ -127,129 +214,92 @@ class HealthcareDatabaseManager:
             print(f"❌ ERROR: Unexpected database connection error: {str(e)}")
             raise
     
+    def _rows_to_dicts(self, cursor, sql: str) -> List[Dict]:
+        """Rows of the cursor's result set as dicts, with column names cached per SQL text"""
+        columns = self._col_cache.get(sql)
+        if columns is None or len(columns) != len(cursor.description):
+            if len(self._col_cache) >= COLUMN_CACHE_SIZE:
+                self._col_cache.clear()
+            columns = tuple(column[0] for column in cursor.description)
+            self._col_cache[sql] = columns
+        return fetch_dicts(cursor, columns)
+    
+    @retry_db_operation()
     def search_patient_by_name(self, patient_name: str) -> List[Dict]:
         """Search for patients using fuzzy name matching with phonetic similarity"""
+        # Split here and bind first/last as variables rather than splitting
+        # in SQL, where each NameParts lookup was its own subquery
+        name_parts = patient_name.split()
+        if not name_parts:
+            return []
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
             # SQL Server-compatible patient search query with phonetic matching
             query = """
-                WITH NameParts AS ( 
-                    SELECT value AS Part, ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS PartNumber 
-                    FROM STRING_SPLIT(?, ' ')
-                    WHERE LEN(TRIM(value)) > 0
-                ) 
-                SELECT TOP 10
+                SET NOCOUNT ON;
+                DECLARE @full NVARCHAR(200) = LOWER(TRIM(?)),
+                        @first NVARCHAR(100) = LOWER(?),
+                        @last NVARCHAR(100) = LOWER(?);
+                
+                SELECT TOP {top}
                     p.PatientId, 
                     p.FirstName, 
                     p.MiddleName, 
                     p.LastName,
                     p.DOB,
                     p.Email,
-                    s.Name as SiteName,
-                    -- Exact match score
-                    CASE 
-                        WHEN LOWER(TRIM(CONCAT(ISNULL(p.FirstName, ''), ' ', ISNULL(p.MiddleName, ''), ' ', ISNULL(p.LastName, '')))) = LOWER(TRIM(?)) THEN 100
-                        WHEN LOWER(TRIM(CONCAT(ISNULL(p.FirstName, ''), ' ', ISNULL(p.LastName, '')))) = LOWER(TRIM(?)) THEN 95
-                        ELSE 0 
-                    END +
-                    -- First name similarity using SOUNDEX
-                    CASE 
-                        WHEN LOWER(p.FirstName) = LOWER((SELECT Part FROM NameParts WHERE PartNumber = 1)) THEN 40
-                        WHEN SOUNDEX(p.FirstName) = SOUNDEX((SELECT Part FROM NameParts WHERE PartNumber = 1)) THEN 30
-                        WHEN LOWER(p.FirstName) LIKE LOWER((SELECT Part + '%' FROM NameParts WHERE PartNumber = 1)) THEN 25
-                        ELSE 0 
-                    END +
-                    -- Last name similarity using SOUNDEX
-                    CASE 
-                        WHEN LOWER(p.LastName) = LOWER((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) THEN 40
-                        WHEN SOUNDEX(p.LastName) = SOUNDEX((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) THEN 30
-                        WHEN LOWER(p.LastName) LIKE LOWER((SELECT Part + '%' FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) THEN 25
-                        ELSE 0 
-                    END AS MatchScore
+                    s.Name as SiteName{match_score}
                 FROM Patient p
                 LEFT JOIN Site s ON p.SiteId = s.SiteId
                 WHERE p.IsActive = 1
-                AND (
-                    SOUNDEX(p.FirstName) = SOUNDEX((SELECT Part FROM NameParts WHERE PartNumber = 1))
-                    OR SOUNDEX(p.LastName) = SOUNDEX((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts)))
-                    OR LOWER(p.FirstName) LIKE '%' + LOWER((SELECT Part FROM NameParts WHERE PartNumber = 1)) + '%'
-                    OR LOWER(p.LastName) LIKE '%' + LOWER((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) + '%'
-                )
-                ORDER BY MatchScore DESC
-            """
+                AND {name_filter}
+                {order_by}
+            """.format(name_filter=_name_filter('p'), **name_search_shape('p'))
             
-            cursor.execute(query, (patient_name, patient_name, patient_name))
+            cursor.setinputsizes(_NAME_SEARCH_INPUTS)
+            cursor.execute(query, _name_search_params(patient_name, name_parts))
             
-            # Convert to list of dictionaries
-            columns = [column[0] for column in cursor.description]
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
-            
-            return results
+            return rank_by_name(patient_name, self._rows_to_dicts(cursor, query))
     
     @retry_db_operation(max_retries=3, delay=2)
     def search_employee_by_name(self, employee_name: str) -> List[Dict]:
         """Search for employees (providers) by name"""
+        name_parts = employee_name.split()
+        if not name_parts:
+            return []
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
             query = """
-                WITH NameParts AS ( 
-                    SELECT value AS Part, ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS PartNumber 
-                    FROM STRING_SPLIT(?, ' ')
-                    WHERE LEN(TRIM(value)) > 0
-                ) 
-                SELECT TOP 10
+                SET NOCOUNT ON;
+                DECLARE @full NVARCHAR(200) = LOWER(TRIM(?)),
+                        @first NVARCHAR(100) = LOWER(?),
+                        @last NVARCHAR(100) = LOWER(?);
+                
+                SELECT TOP {top}
                     e.EmployeeId,
                     e.FirstName,
                     e.MiddleName,
                     e.LastName,
                     e.Email,
                     e.Title as RoleName,
-                    s.Name as SiteName,
-                    -- Exact match score
-                    CASE 
-                        WHEN LOWER(TRIM(CONCAT(ISNULL(e.FirstName, ''), ' ', ISNULL(e.MiddleName, ''), ' ', ISNULL(e.LastName, '')))) = LOWER(TRIM(?)) THEN 100
-                        WHEN LOWER(TRIM(CONCAT(ISNULL(e.FirstName, ''), ' ', ISNULL(e.LastName, '')))) = LOWER(TRIM(?)) THEN 95
-                        ELSE 0 
-                    END +
-                    -- First name similarity
-                    CASE 
-                        WHEN LOWER(e.FirstName) = LOWER((SELECT Part FROM NameParts WHERE PartNumber = 1)) THEN 40
-                        WHEN SOUNDEX(e.FirstName) = SOUNDEX((SELECT Part FROM NameParts WHERE PartNumber = 1)) THEN 30
-                        WHEN LOWER(e.FirstName) LIKE LOWER((SELECT Part + '%' FROM NameParts WHERE PartNumber = 1)) THEN 25
-                        ELSE 0 
-                    END +
-                    -- Last name similarity
-                    CASE 
-                        WHEN LOWER(e.LastName) = LOWER((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) THEN 40
-                        WHEN SOUNDEX(e.LastName) = SOUNDEX((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) THEN 30
-                        WHEN LOWER(e.LastName) LIKE LOWER((SELECT Part + '%' FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) THEN 25
-                        ELSE 0 
-                    END AS MatchScore
+                    s.Name as SiteName{match_score}
                 FROM Employee e
                 LEFT JOIN Site s ON e.SiteId = s.SiteId
                 WHERE e.IsActive = 1
-                AND (
-                    SOUNDEX(e.FirstName) = SOUNDEX((SELECT Part FROM NameParts WHERE PartNumber = 1))
-                    OR SOUNDEX(e.LastName) = SOUNDEX((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts)))
-                    OR LOWER(e.FirstName) LIKE '%' + LOWER((SELECT Part FROM NameParts WHERE PartNumber = 1)) + '%'
-                    OR LOWER(e.LastName) LIKE '%' + LOWER((SELECT Part FROM NameParts WHERE PartNumber = (SELECT MAX(PartNumber) FROM NameParts))) + '%'
-                )
-                ORDER BY MatchScore DESC
-            """
+                AND {name_filter}
+                {order_by}
+            """.format(name_filter=_name_filter('e'), **name_search_shape('e'))
             
-            cursor.execute(query, (employee_name, employee_name, employee_name))
+            cursor.setinputsizes(_NAME_SEARCH_INPUTS)
+            cursor.execute(query, _name_search_params(employee_name, name_parts))
             
-            columns = [column[0] for column in cursor.description]
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
-            
-            return results
+            return rank_by_name(employee_name, self._rows_to_dicts(cursor, query))
     
+    @retry_db_operation()
     def get_patient_authorizations(self, patient_id: int) -> List[Dict]:
         """Get all active authorizations for a patient"""
         with self.get_connection() as conn:
@@ -277,13 +327,9 @@ class HealthcareDatabaseManager:
             
             cursor.execute(query, (patient_id,))
             
-            columns = [column[0] for column in cursor.description]
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
-            
-            return results
+            return self._rows_to_dicts(cursor, query)
     
+    @retry_db_operation()
     def get_auth_details(self, auth_id: int) -> List[Dict]:
         """Get authorization details including service types and coverage"""
         with self.get_connection() as conn:
@@ -311,13 +357,9 @@ class HealthcareDatabaseManager:
             
             cursor.execute(query, (auth_id,))
             
-            columns = [column[0] for column in cursor.description]
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
-            
-            return results
+            return self._rows_to_dicts(cursor, query)
     
+    @retry_db_operation()
     def get_patient_locations(self, patient_id: int) -> List[Dict]:
         """Get available locations for a patient based on their authorizations"""
         with self.get_connection() as conn:
@@ -346,13 +388,9 @@ class HealthcareDatabaseManager:
             
             cursor.execute(query, (patient_id,))
             
-            columns = [column[0] for column in cursor.description]
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
-            
-            return results
+            return self._rows_to_dicts(cursor, query)
     
+    @retry_db_operation()
     def check_employee_eligibility(self, employee_id: int, service_type_id: int, 
                                  location_id: int, treatment_type_id: int) -> Dict:
         """Check if employee is eligible to provide service at location"""
@@ -400,6 +438,7 @@ class HealthcareDatabaseManager:
             
             return {'IsEligible': False, 'Error': 'Employee not found'}
     
+    @retry_db_operation()
     def suggest_employees(self, service_type_id: int, treatment_type_id: int, 
                          location_id: int, patient_id: int, start_datetime: str) -> List[Dict]:
         """Get employee suggestions based on eligibility and availability"""
@@ -424,32 +463,39 @@ class HealthcareDatabaseManager:
                         ) THEN 10
                         ELSE 5
                     END as AvailabilityScore,
-                    -- Count total appointments for workload assessment
-                    (SELECT COUNT(*) FROM Appointment a3 
-                     WHERE a3.EmployeeId = e.EmployeeId 
-                     AND a3.ScheduledDate >= DATEADD(day, -30, GETDATE())
-                     AND a3.StatusId IN (1, 2, 3)) as RecentAppointments
+                    recent.RecentAppointments
                 FROM Employee e
-                INNER JOIN EmployeeServiceLocation esl ON e.EmployeeId = esl.EmployeeId 
-                    AND esl.LocationId = ? AND esl.IsActive = 1
-                INNER JOIN EmployeeServiceType est ON e.EmployeeId = est.EmployeeId 
-                    AND est.ServiceTypeId = ? AND est.IsActive = 1
-                INNER JOIN EmployeeTreatmentType ett ON e.EmployeeId = ett.EmployeeId 
-                    AND ett.TreatmentTypeId = ? AND ett.IsActive = 1
                 LEFT JOIN Site s ON e.SiteId = s.SiteId
+                -- Count total appointments for workload assessment
+                OUTER APPLY (
+                    SELECT COUNT(*) AS RecentAppointments FROM Appointment a3 
+                    WHERE a3.EmployeeId = e.EmployeeId 
+                    AND a3.ScheduledDate >= DATEADD(day, -30, GETDATE())
+                    AND a3.StatusId IN (1, 2, 3)
+                ) recent
                 WHERE e.IsActive = 1
+                -- Semi-joins: one row per employee however many active
+                -- entries they have for the location/service/treatment
+                AND EXISTS (
+                    SELECT 1 FROM EmployeeServiceLocation esl
+                    WHERE esl.EmployeeId = e.EmployeeId AND esl.LocationId = ? AND esl.IsActive = 1
+                )
+                AND EXISTS (
+                    SELECT 1 FROM EmployeeServiceType est
+                    WHERE est.EmployeeId = e.EmployeeId AND est.ServiceTypeId = ? AND est.IsActive = 1
+                )
+                AND EXISTS (
+                    SELECT 1 FROM EmployeeTreatmentType ett
+                    WHERE ett.EmployeeId = e.EmployeeId AND ett.TreatmentTypeId = ? AND ett.IsActive = 1
+                )
                 ORDER BY AvailabilityScore DESC, RecentAppointments ASC
             """
             
             cursor.execute(query, (start_datetime, location_id, service_type_id, treatment_type_id))
             
-            columns = [column[0] for column in cursor.description]
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
-            
-            return results
+            return self._rows_to_dicts(cursor, query)
     
+    @retry_db_operation()
     def check_appointment_conflicts(self, employee_id: int, start_datetime: str, 
                                   duration_minutes: int = 60) -> List[Dict]:
         """Check for appointment conflicts for an employee"""
@@ -468,33 +514,25 @@ class HealthcareDatabaseManager:
                 LEFT JOIN AuthDetail ad ON a.AuthDetailId = ad.AuthDetailId
                 LEFT JOIN ServiceType st ON ad.ServiceTypeId = st.ServiceTypeId
                 WHERE a.EmployeeId = ?
-                AND a.ScheduledDate = CAST(? AS DATE)
                 AND a.StatusId IN (1, 2) -- Active/Scheduled
-                AND (
-                    -- Check for time overlap
-                    (CAST(? AS TIME) BETWEEN 
-                     CAST(DATEADD(minute, 0, CAST(? AS datetime)) AS TIME) AND 
-                     CAST(DATEADD(minute, ISNULL(a.ScheduledMinutes, 60), CAST(? AS datetime)) AS TIME))
-                    OR
-                    (DATEADD(minute, ?, CAST(? AS datetime)) BETWEEN 
-                     CAST(? AS datetime) AND 
-                     DATEADD(minute, ISNULL(a.ScheduledMinutes, 60), CAST(? AS datetime)))
-                )
+                -- Starts on the new slot's day, before the new slot ends ...
+                AND a.ScheduledDate >= ?
+                AND a.ScheduledDate < ?
+                -- ... and is still running when the new slot starts
+                AND DATEADD(minute, ISNULL(a.ScheduledMinutes, 60), a.ScheduledDate) > ?
                 ORDER BY a.ScheduledDate
             """
             
-            cursor.execute(query, (
-                employee_id, start_datetime, start_datetime, start_datetime, start_datetime,
-                duration_minutes, start_datetime, start_datetime, start_datetime
-            ))
+            start = as_datetime(start_datetime)
+            end = start + timedelta(minutes=int(duration_minutes))
+            day_start = datetime.combine(start.date(), datetime.min.time())
+            cursor.setinputsizes([(pyodbc.SQL_INTEGER, 0, 0), SCHEDULED_DATE_INPUT,
+                                  SCHEDULED_DATE_INPUT, SCHEDULED_DATE_INPUT])
+            cursor.execute(query, (employee_id, day_start, end, start))
             
-            columns = [column[0] for column in cursor.description]
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
-            
-            return results
+            return self._rows_to_dicts(cursor, query)
     
+    @retry_db_operation()
     def book_appointment(self, booking_data: Dict) -> Dict:
         """Book a new appointment"""
         with self.get_connection() as conn:
@@ -526,6 +564,7 @@ class HealthcareDatabaseManager:
                 
                 appointment_id = cursor.fetchone()[0]
                 conn.commit()
+                get_query_result_cache().invalidate_table('Appointment')
                 
                 return {
                     'success': True,
@@ -541,6 +580,7 @@ class HealthcareDatabaseManager:
                     'message': 'Failed to book appointment'
                 }
     
+    @retry_db_operation()
     def create_chat_session(self) -> int:
         """Create a new chat session record"""
         with self.get_connection() as conn:
@@ -557,6 +597,7 @@ class HealthcareDatabaseManager:
                 cursor.execute(query)
                 session_id = cursor.fetchone()[0]
                 conn.commit()
+                get_query_result_cache().invalidate_table('ChatSession')
                 return session_id
             except:
                 # If ChatSession table doesn't exist, return a dummy ID
@@ -565,8 +606,21 @@ class HealthcareDatabaseManager:
     def save_chat_message(self, session_id: int, sender: str, message: str, 
                          intent: str = None, entities: str = None) -> bool:
         """Save chat message to database"""
+        return self.save_chat_messages([(session_id, sender, message, intent, entities)])
+    
+    @retry_db_operation()
+    def save_chat_messages(self, messages: List[Tuple]) -> bool:
+        """Save several chat messages in one round trip and one commit
+        
+        Each message is (session_id, sender, message, intent, entities).
+        """
+        if not messages:
+            return True
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            # Send all rows as one parameter array instead of a round trip each
+            cursor.fast_executemany = True
             
             # Assuming there's a ChatMessage table
             query = """
@@ -577,22 +631,22 @@ class HealthcareDatabaseManager:
             """
             
             try:
-                cursor.execute(query, (session_id, sender, message, intent, entities))
+                cursor.executemany(query, messages)
                 conn.commit()
+                get_query_result_cache().invalidate_table('ChatMessage')
                 return True
             except:
                 # If table doesn't exist, just return True
                 return True
     
-    def execute_query(self, query: str) -> List[Dict]:
-        """Execute a raw SQL query and return results"""
+    @retry_db_operation()
+    def execute_query(self, query: str, params: tuple = None) -> List[Dict]:
+        """Execute a raw SQL query (optionally parameterized) and return results"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(query)
-            
-            columns = [column[0] for column in cursor.description]
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
             
-            return results
+            return self._rows_to_dicts(cursor, query)
@@ -799,10 +799,11 @@ Generate a SQL query for: {user_query}"""),
     def _determine_main_table(self, query_lower: str, tables: List[TableSchema]) -> str:
         """Determine the main table for the query"""
         # Priority order based on common query patterns
-        priority_order = ["Appointment", "Patient", "Employee", "Auth", "Location"]
+        priority_order = ("Appointment", "Patient", "Employee", "Auth", "Location")
+        by_name = {t.table_name: t for t in tables}
         
         for table_name in priority_order:
-            if any(t.table_name == table_name for t in tables):
+            if table_name in by_name:
                 return table_name
         
         # Return first table if no priority match
@@ -0,0 +1,94 @@
+"""
+Name Match Ranking
+Ranks patient/employee name search candidates in Python with rapidfuzz, so SQL
+only has to filter them, not score every row
+"""
+
+from typing import Dict, List
+
+try:
+    from rapidfuzz import fuzz, process, utils as fuzz_utils
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+# Name searches return this many matches
+NAME_MATCH_LIMIT = 10
+
+# With rapidfuzz installed, SQL only filters and returns up to this many
+# unscored candidates, which are then ranked in Python
+NAME_CANDIDATE_LIMIT = 200
+
+
+def sql_match_score(alias: str, phonetic: bool = True) -> str:
+    """Server-side MatchScore select-list item for the Patient (p) or Employee (e) alias
+
+    Used when rapidfuzz is not installed. Expects @full, @first and @last
+    declared in the batch, already lowercased. phonetic=False is for searches
+    whose filter has no SOUNDEX: full name 100, exact first or last name 50,
+    prefix 30, with no points for sounding alike.
+    """
+    if not phonetic:
+        return f""",
+                    -- Match scoring
+                    CASE 
+                        WHEN LOWER(TRIM(CONCAT(ISNULL({alias}.FirstName, ''), ' ', ISNULL({alias}.LastName, '')))) = @full THEN 100
+                        WHEN LOWER({alias}.FirstName) = @first THEN 50
+                        WHEN LOWER({alias}.LastName) = @last THEN 50
+                        WHEN LOWER({alias}.FirstName) LIKE @first + '%' THEN 30
+                        WHEN LOWER({alias}.LastName) LIKE @last + '%' THEN 30
+                        ELSE 0 
+                    END AS MatchScore"""
+    return f""",
+                    -- Exact match score
+                    CASE 
+                        WHEN LOWER(TRIM(CONCAT(ISNULL({alias}.FirstName, ''), ' ', ISNULL({alias}.MiddleName, ''), ' ', ISNULL({alias}.LastName, '')))) = @full THEN 100
+                        WHEN LOWER(TRIM(CONCAT(ISNULL({alias}.FirstName, ''), ' ', ISNULL({alias}.LastName, '')))) = @full THEN 95
+                        ELSE 0 
+                    END +
+                    -- First name similarity using SOUNDEX
+                    CASE 
+                        WHEN LOWER({alias}.FirstName) = @first THEN 40
+                        WHEN SOUNDEX({alias}.FirstName) = SOUNDEX(@first) THEN 30
+                        WHEN LOWER({alias}.FirstName) LIKE @first + '%' THEN 25
+                        ELSE 0 
+                    END +
+                    -- Last name similarity using SOUNDEX
+                    CASE 
+                        WHEN LOWER({alias}.LastName) = @last THEN 40
+                        WHEN SOUNDEX({alias}.LastName) = SOUNDEX(@last) THEN 30
+                        WHEN LOWER({alias}.LastName) LIKE @last + '%' THEN 25
+                        ELSE 0 
+                    END AS MatchScore"""
+
+
+def name_search_shape(alias: str, phonetic: bool = True) -> Dict[str, str]:
+    """Format fields for a name search query on the alias: SQL-scored TOP 10, or unscored candidates"""
+    if RAPIDFUZZ_AVAILABLE:
+        return {'top': NAME_CANDIDATE_LIMIT, 'match_score': '', 'order_by': ''}
+    return {'top': NAME_MATCH_LIMIT, 'match_score': sql_match_score(alias, phonetic),
+            'order_by': 'ORDER BY MatchScore DESC'}
+
+
+def rank_by_name(name: str, rows: List[Dict]) -> List[Dict]:
+    """Best NAME_MATCH_LIMIT rows by rapidfuzz WRatio against the full name, as MatchScore
+
+    Rows are returned unchanged when rapidfuzz is not installed.
+    """
+    if not RAPIDFUZZ_AVAILABLE:
+        return rows
+
+    full_names = [
+        ' '.join(filter(None, (row['FirstName'], row['MiddleName'], row['LastName'])))
+        for row in rows
+    ]
+    # default_process lowercases and strips each choice once, not per comparison
+    ranked = process.extract(name, full_names, scorer=fuzz.WRatio,
+                             processor=fuzz_utils.default_process, limit=NAME_MATCH_LIMIT)
+
+    results = []
+    for _, score, index in ranked:
+        row = rows[index]
+        row['MatchScore'] = round(score)
+        results.append(row)
+    return results
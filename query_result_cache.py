@@ -0,0 +1,158 @@
+"""
+Query Result Cache
+Caches the rows returned by read-only chatbot SELECTs, keyed on the SQL text and params,
+and drops them when a write touches any table the result was read from
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+# Maximum cached results; override with HEALTHCARE_RESULT_CACHE_SIZE
+DEFAULT_CACHE_SIZE = int(os.getenv('HEALTHCARE_RESULT_CACHE_SIZE', '256'))
+
+# Results older than this are treated as a miss even without a write
+DEFAULT_TTL_SECONDS = 60
+
+_READ_ONLY_RE = re.compile(r'^\s*(?:SELECT|WITH)\b', re.IGNORECASE)
+# Anything that writes, runs other code or creates a table (SELECT ... INTO),
+# including inside a CTE batch
+_WRITE_TOKEN_RE = re.compile(
+    r'\b(?:INSERT|UPDATE|DELETE|MERGE|EXEC|EXECUTE|INTO|CREATE|ALTER|DROP|TRUNCATE)\b',
+    re.IGNORECASE
+)
+_TABLE_REF_RE = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE)\s+(?:\[?dbo\]?\.)?\[?(\w+)\]?', re.IGNORECASE)
+
+
+def is_read_only_sql(sql_query: str) -> bool:
+    """True for statements that start with SELECT or WITH and contain no write keywords"""
+    return bool(_READ_ONLY_RE.match(sql_query)) and not _WRITE_TOKEN_RE.search(sql_query)
+
+
+def tables_in_sql(sql_query: str) -> Set[str]:
+    """Names following FROM/JOIN/INTO/UPDATE, lowercased (CTE names included)"""
+    return {name.lower() for name in _TABLE_REF_RE.findall(sql_query)}
+
+
+@dataclass
+class CachedResult:
+    """Rows of one query and the tables they depend on"""
+    results: List[Dict[str, Any]]
+    tables: FrozenSet[str]
+    expires_at: float
+
+
+class QueryResultCache:
+    """Thread-safe LRU of query results with TTL and per-table invalidation"""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+        # table name -> keys of the cached results that read it
+        self._keys_by_table: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        # Called with the table name after each invalidate_table, for caches
+        # of data derived from these results
+        self._invalidation_listeners: List[Callable[[str], None]] = []
+
+    @staticmethod
+    def key(sql_query: str, params: Tuple[Any, ...] = ()) -> str:
+        """Cache key for a SQL string and its bound parameters"""
+        if params:
+            sql_query = f"{sql_query}\x00{params!r}"
+        return hashlib.md5(sql_query.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached rows for a key, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at < time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry.results)
+
+    def insert(self, key: str, results: List[Dict[str, Any]], tables: Iterable[str]):
+        """Cache rows read from the given tables"""
+        tables = frozenset(table.lower() for table in tables)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = CachedResult(list(results), tables, time.monotonic() + self.ttl_seconds)
+            for table in tables:
+                self._keys_by_table.setdefault(table, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def add_invalidation_listener(self, listener: Callable[[str], None]):
+        """Have invalidate_table also call listener(table_name)"""
+        with self._lock:
+            self._invalidation_listeners.append(listener)
+
+    def invalidate_table(self, table_name: str) -> int:
+        """Drop every cached result that read the table; returns how many"""
+        with self._lock:
+            keys = self._keys_by_table.pop(table_name.lower(), set())
+            for key in keys:
+                self._remove(key)
+            listeners = list(self._invalidation_listeners)
+        for listener in listeners:
+            listener(table_name)
+        return len(keys)
+
+    def clear(self):
+        """Drop every cached result"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_table.clear()
+
+    def _remove(self, key: str):
+        """Remove one entry and its table index references (caller holds the lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for table in entry.tables:
+            keys = self._keys_by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_table[table]
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters in the same shape as functools cache_info()"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'maxsize': self.max_entries,
+            'currsize': len(self._entries)
+        }
+
+
+# Global instance shared by the chatbot (reads) and the database manager (writes)
+_query_result_cache = None
+_cache_init_lock = threading.Lock()
+
+
+def get_query_result_cache() -> QueryResultCache:
+    """Get or create the global query result cache"""
+    global _query_result_cache
+    if _query_result_cache is None:
+        with _cache_init_lock:
+            if _query_result_cache is None:
+                _query_result_cache = QueryResultCache()
+    return _query_result_cache
@@ -0,0 +1,262 @@
+"""
+Semantic Response Cache
+Approximate, embedding-keyed cache of chatbot responses so that rephrased
+questions skip the schema RAG lookups and SQL generation behind them
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+try:
+    import numba
+    NUMBA_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached response is served before it counts as a miss
+DEFAULT_TTL_SECONDS = 60
+
+# Candidate sets at least this large are scored by the numba kernel; below
+# it NumPy's per-call overhead is lower than the kernel launch
+NUMBA_MIN_CANDIDATES = 64
+
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True, parallel=True, fastmath=True)
+    def _int8_row_dots(keys, rows, query, out):
+        """out[i] = keys[rows[i]] . query, accumulated in int32"""
+        for i in numba.prange(rows.shape[0]):
+            row = rows[i]
+            total = np.int32(0)
+            for j in range(keys.shape[1]):
+                total += np.int32(keys[row, j]) * np.int32(query[j])
+            out[i] = total
+
+
+class SemanticResponseCache:
+    """LRU cache keyed on query embeddings, hit when cosine similarity >= threshold
+
+    Every entry also carries a scope (any hashable value) that a lookup must
+    match exactly, so near-identical wordings about different people, dates
+    or ids never share a response. Entries expire after `ttl_seconds`.
+
+    Candidates are found with random-projection LSH: each of `n_tables`
+    tables hashes a key to the sign pattern of `n_hashes` random hyperplanes,
+    and a lookup probes the query's bucket plus every bucket one bit flip
+    away. Only those candidates are scored, so lookups stay cheap as the
+    cache grows.
+
+    Keys are stored quantized to int8 with a per-vector scale, a quarter of
+    the memory of float32, and scored with an int32-accumulated dot product.
+    """
+
+    def __init__(self, capacity: int = 512, threshold: float = 0.95,
+                 n_hashes: int = 16, n_tables: int = 4, seed: Optional[int] = None,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.n_hashes = n_hashes
+        self.n_tables = n_tables
+        self.seed = seed
+        self.enabled = NUMPY_AVAILABLE
+        self.use_numba = NUMBA_AVAILABLE
+        self.hits = 0
+        self.misses = 0
+
+        # Unit-normalised int8 keys stacked row-wise with their scales;
+        # allocated on the first put (the embedding dimension is only known
+        # then) and grown by doubling
+        self._keys = None
+        self._scales = None
+        self._values: List[Any] = []
+        self._scopes: List[Hashable] = []
+        self._expires_at: List[float] = []
+        self._last_used = None
+        self._clock = 0
+        self._lock = threading.Lock()
+
+        # LSH state, also allocated on the first put
+        self._planes = None
+        self._bit_weights = None
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in range(n_tables)]
+        self._entry_hashes: List[Tuple[int, ...]] = []
+
+        if not self.enabled:
+            logger.warning("numpy not installed, semantic response cache disabled")
+        elif self.use_numba:
+            # Compile (or load the cached build of) the kernel now rather
+            # than on the first large lookup
+            _int8_row_dots(np.zeros((1, 1), dtype=np.int8), np.zeros(1, dtype=np.int64),
+                           np.zeros(1, dtype=np.int8), np.zeros(1, dtype=np.int32))
+
+    def _normalize(self, embedding: Optional[Sequence[float]]):
+        """Return the embedding as a unit float32 vector, or None if unusable"""
+        if embedding is None:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if vector.ndim != 1 or norm == 0.0:
+            return None
+        if self._keys is not None and vector.shape[0] != self._keys.shape[1]:
+            return None
+        return vector / norm
+
+    @staticmethod
+    def _quantize(vector):
+        """Symmetric int8 quantization: returns (int8 vector, scale)"""
+        scale = float(np.abs(vector).max()) / 127.0
+        quantized = np.clip(np.round(vector / scale), -127, 127).astype(np.int8)
+        return quantized, scale
+
+    def _hash(self, vector) -> Tuple[int, ...]:
+        """One bucket key per table from the signs of the hyperplane projections"""
+        bits = (np.dot(self._planes, vector) > 0).reshape(self.n_tables, self.n_hashes)
+        return tuple(int(key) for key in np.dot(bits, self._bit_weights))
+
+    def _candidates(self, hashes: Tuple[int, ...]) -> List[int]:
+        """Cached indices in each table's bucket or its Hamming-1 neighbours"""
+        candidates = set()
+        for buckets, key in zip(self._buckets, hashes):
+            for probe in (key, *(key ^ (1 << bit) for bit in range(self.n_hashes))):
+                entries = buckets.get(probe)
+                if entries:
+                    candidates.update(entries)
+        return list(candidates)
+
+    def _best_match(self, vector, hashes: Tuple[int, ...], scope: Hashable):
+        """Index and similarity of the closest candidate key with the same scope"""
+        candidates = self._candidates(hashes) if self._values else []
+        candidates = [index for index in candidates if self._scopes[index] == scope]
+        if not candidates:
+            return None, 0.0
+        quantized, scale = self._quantize(vector)
+        if self.use_numba and len(candidates) >= NUMBA_MIN_CANDIDATES:
+            rows = np.asarray(candidates, dtype=np.int64)
+            similarities = np.empty(len(candidates), dtype=np.int32)
+            _int8_row_dots(self._keys, rows, quantized, similarities)
+        else:
+            # Widen before the dot product; int8 * int8 sums overflow anything narrower than int32
+            similarities = np.dot(self._keys[candidates].astype(np.int32), quantized.astype(np.int32))
+        similarities = similarities * (self._scales[candidates] * scale)
+        best = int(np.argmax(similarities))
+        return candidates[best], float(similarities[best])
+
+    def get(self, embedding: Optional[Sequence[float]], scope: Hashable = None) -> Optional[Any]:
+        """Return the cached value for the nearest unexpired key in scope within the threshold"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            vector = self._normalize(embedding)
+            if vector is None or self._planes is None:
+                self.misses += 1
+                return None
+
+            index, similarity = self._best_match(vector, self._hash(vector), scope)
+            if (index is None or similarity < self.threshold
+                    or self._expires_at[index] < time.monotonic()):
+                self.misses += 1
+                return None
+
+            self._clock += 1
+            self._last_used[index] = self._clock
+            self.hits += 1
+            return self._values[index]
+
+    def put(self, embedding: Optional[Sequence[float]], value: Any, scope: Hashable = None):
+        """Store a value, replacing a near-duplicate key in scope or the least recently used entry"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            vector = self._normalize(embedding)
+            if vector is None:
+                return
+
+            if self._keys is None:
+                dimension = vector.shape[0]
+                self._keys = np.empty((min(16, self.capacity), dimension), dtype=np.int8)
+                self._scales = np.zeros(self._keys.shape[0], dtype=np.float32)
+                self._last_used = np.zeros(self._keys.shape[0], dtype=np.int64)
+                rng = np.random.default_rng(self.seed)
+                self._planes = rng.standard_normal(
+                    (self.n_tables * self.n_hashes, dimension)).astype(np.float32)
+                self._bit_weights = 1 << np.arange(self.n_hashes, dtype=np.int64)
+
+            size = len(self._values)
+            hashes = self._hash(vector)
+            index, similarity = self._best_match(vector, hashes, scope)
+            if index is None or similarity < self.threshold:
+                if size < self.capacity:
+                    if size == self._keys.shape[0]:
+                        self._grow(min(size * 2, self.capacity))
+                    index = size
+                    self._values.append(value)
+                    self._scopes.append(scope)
+                    self._expires_at.append(0.0)
+                    self._entry_hashes.append(())
+                else:
+                    index = int(np.argmin(self._last_used[:size]))
+
+            self._rebucket(index, hashes)
+            self._keys[index], self._scales[index] = self._quantize(vector)
+            self._values[index] = value
+            self._scopes[index] = scope
+            self._expires_at[index] = time.monotonic() + self.ttl_seconds
+            self._clock += 1
+            self._last_used[index] = self._clock
+
+    def _rebucket(self, index: int, hashes: Tuple[int, ...]):
+        """Move an entry from the buckets of its old key to those of its new one"""
+        for buckets, key in zip(self._buckets, self._entry_hashes[index]):
+            entries = buckets[key]
+            entries.remove(index)
+            if not entries:
+                del buckets[key]
+        for buckets, key in zip(self._buckets, hashes):
+            buckets.setdefault(key, []).append(index)
+        self._entry_hashes[index] = hashes
+
+    def _grow(self, rows: int):
+        """Reallocate the key matrix with room for `rows` entries"""
+        keys = np.empty((rows, self._keys.shape[1]), dtype=np.int8)
+        keys[:self._keys.shape[0]] = self._keys
+        scales = np.zeros(rows, dtype=np.float32)
+        scales[:self._scales.shape[0]] = self._scales
+        last_used = np.zeros(rows, dtype=np.int64)
+        last_used[:self._last_used.shape[0]] = self._last_used
+        self._keys, self._scales, self._last_used = keys, scales, last_used
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._keys = None
+            self._scales = None
+            self._values = []
+            self._scopes = []
+            self._expires_at = []
+            self._last_used = None
+            self._planes = None
+            self._buckets = [{} for _ in range(self.n_tables)]
+            self._entry_hashes = []
+
+    def stats(self) -> dict:
+        """Hit/miss counters in the same shape as functools cache_info()"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'maxsize': self.capacity,
+            'currsize': len(self._values)
+        }
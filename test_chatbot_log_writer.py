@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test that closing the response generator writes every queued thought and
+query before the background log writer stops
+"""
+
+import sys
+import os
+import atexit
+import logging
+import queue
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from healthcare_chatbot_service import HealthcareResponseGenerator, LOG_WRITER_BATCH_SIZE
+
+
+class RecordingGenerator(HealthcareResponseGenerator):
+    """Generator whose log writer records entries instead of printing them"""
+
+    def __init__(self):
+        # Only the logging state; no database, schema or WebSocket setup
+        self.logger = logging.getLogger('test_chatbot_log_writer')
+        self.logger.setLevel(logging.INFO)
+        self._request_clock = threading.local()
+        self.written = []
+        self.release = threading.Event()
+        self._log_q = queue.SimpleQueue()
+        self._log_writer = threading.Thread(target=self._log_drain, daemon=True)
+        self._log_writer.start()
+        atexit.register(self.close)
+
+    def _write_thought(self, session_id, formatted_thought):
+        # Hold the writer on its first entry so the rest stay queued
+        self.release.wait()
+        self.written.append(formatted_thought)
+
+    def _write_query(self, session_id, log_entry):
+        self.written.append(log_entry['query'])
+
+
+def test_close_writes_queued_entries_and_stops():
+    generator = RecordingGenerator()
+    thoughts = [generator.emit_thought(f"step {i}") for i in range(LOG_WRITER_BATCH_SIZE + 10)]
+    generator.log_query("SELECT 1")
+
+    generator.release.set()
+    generator.close()
+
+    assert generator.written == thoughts + ["SELECT 1"]
+    assert not generator._log_writer.is_alive()
+    # A second close is a no-op
+    generator.close()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test the database connection pool with a fake connect callable: reuse,
+discarding after errors, exhaustion and the idle probe
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pyodbc
+
+from db_connection_pool import ConnectionPool, ConnectionPoolExhaustedError
+
+
+class FakeConnection:
+    """Stands in for a pyodbc connection; the SELECT 1 probe fails once broken"""
+
+    def __init__(self, number: int):
+        self.number = number
+        self.broken = False
+        self.closed = False
+        self.probes = 0
+
+    def execute(self, sql):
+        self.probes += 1
+        if self.broken:
+            raise pyodbc.Error('08S01', 'Communication link failure')
+        return self
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnect:
+    """connect callable that numbers the connections it opens"""
+
+    def __init__(self):
+        self.opened = []
+
+    def __call__(self):
+        conn = FakeConnection(len(self.opened) + 1)
+        self.opened.append(conn)
+        return conn
+
+
+def test_reuse_returns_same_connection():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, max_size=2, timeout=0.1)
+
+    with pool.acquire() as first:
+        pass
+    with pool.acquire() as second:
+        pass
+
+    assert second is first
+    assert len(connect.opened) == 1
+    # Returned moments ago, so it is reused without a probe
+    assert first.probes == 0
+
+
+def test_body_exception_discards_connection_and_frees_slot():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, max_size=1, timeout=0.1)
+
+    try:
+        with pool.acquire() as failed:
+            raise ValueError("query failed")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("the body's exception should propagate")
+
+    assert failed.closed
+    # The only slot is free again and a fresh connection replaces the discarded one
+    with pool.acquire() as replacement:
+        assert replacement is not failed
+    assert len(connect.opened) == 2
+
+
+def test_exhaustion_raises_after_timeout():
+    pool = ConnectionPool(FakeConnect(), max_size=1, timeout=0.05)
+
+    with pool.acquire():
+        started = time.monotonic()
+        try:
+            with pool.acquire():
+                pass
+        except ConnectionPoolExhaustedError:
+            waited = time.monotonic() - started
+        else:
+            raise AssertionError("a second checkout of a size-1 pool should fail")
+
+    assert waited >= 0.05
+    # Once the holder returns its connection the pool works again
+    with pool.acquire():
+        pass
+
+
+def test_stale_connection_failing_probe_is_replaced():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, max_size=2, max_idle=0, timeout=0.1)
+
+    with pool.acquire() as stale:
+        pass
+    stale.broken = True
+
+    with pool.acquire() as conn:
+        assert conn is not stale
+    assert stale.probes == 1
+    assert stale.closed
+    assert len(connect.opened) == 2
+
+
+def test_stale_connection_passing_probe_is_reused():
+    connect = FakeConnect()
+    pool = ConnectionPool(connect, max_size=2, max_idle=0, timeout=0.1)
+
+    with pool.acquire() as idle:
+        pass
+    with pool.acquire() as conn:
+        assert conn is idle
+    assert idle.probes == 1
+    assert len(connect.opened) == 1
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test the batched employee availability SQL: per-name matching and splitting
+under SQL Server's parameter limit
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from generate_availability_query import (
+    AVAILABILITY_BATCH_MAX_NAMES,
+    generate_employee_availability_sql_batch,
+)
+
+
+def test_single_and_full_names_match_like_single_query():
+    batches = generate_employee_availability_sql_batch(['snow', 'Jon Snow', 'snow'])
+
+    assert len(batches) == 1
+    sql, params = batches[0]
+    # Duplicates are dropped and a single name binds an empty last name
+    assert params == ('snow', '', 'Jon', 'Snow')
+    assert 'FROM (VALUES (?, ?), (?, ?)) AS n(FirstName, LastName)' in sql
+    assert ("(n.LastName = '' AND (e.FirstName LIKE '%' + n.FirstName + '%' "
+            "OR e.LastName LIKE '%' + n.FirstName + '%'))") in sql
+    assert ("(n.LastName <> '' AND e.FirstName LIKE '%' + n.FirstName + '%' "
+            "AND e.LastName LIKE '%' + n.LastName + '%')") in sql
+    assert sql.endswith('ORDER BY e.LastName, e.FirstName, ead.WeekDay, ead.AvailableFrom')
+
+
+def test_large_lists_split_under_parameter_limit():
+    names = [f'First{i} Last{i}' for i in range(AVAILABILITY_BATCH_MAX_NAMES * 2 + 5)]
+    batches = generate_employee_availability_sql_batch(names)
+
+    assert [len(params) for _, params in batches] == [
+        AVAILABILITY_BATCH_MAX_NAMES * 2, AVAILABILITY_BATCH_MAX_NAMES * 2, 10
+    ]
+    for sql, params in batches:
+        assert len(params) < 2100
+        assert sql.count('?') == len(params)
+    # Every name is bound exactly once, in caller order
+    bound = [part for _, params in batches for part in params]
+    assert bound[:4] == ['First0', 'Last0', 'First1', 'Last1']
+    assert bound[-2:] == [f'First{len(names) - 1}', f'Last{len(names) - 1}']
+
+
+def test_empty_names_rejected():
+    try:
+        generate_employee_availability_sql_batch(['', '   '])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a list without names should be rejected")
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test the SQL the database manager sends for employee name search when
+rapidfuzz is not installed and ranking stays in SQL
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import name_match_ranking
+from db_connection_pool import ConnectionPool
+from healthcare_database_manager import HealthcareDatabaseManager
+
+
+class RecordingCursor:
+    """Records executed SQL and returns no rows"""
+
+    description = [('EmployeeId',), ('FirstName',), ('MiddleName',), ('LastName',), ('MatchScore',)]
+
+    def __init__(self, executed):
+        self.executed = executed
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, list(params or ())))
+        return self
+
+    def fetchmany(self, size):
+        return []
+
+
+class RecordingConnection:
+    def __init__(self, executed):
+        self.executed = executed
+
+    def cursor(self):
+        return RecordingCursor(self.executed)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def employee_search_sql(name: str):
+    """SQL and params of one employee search run with SQL-side scoring"""
+    executed = []
+    manager = HealthcareDatabaseManager('DRIVER={fake}')
+    manager._pool = ConnectionPool(lambda: RecordingConnection(executed))
+    rapidfuzz = name_match_ranking.RAPIDFUZZ_AVAILABLE
+    name_match_ranking.RAPIDFUZZ_AVAILABLE = False
+    try:
+        manager.search_employee_by_name(name)
+    finally:
+        name_match_ranking.RAPIDFUZZ_AVAILABLE = rapidfuzz
+    assert len(executed) == 1
+    return executed[0]
+
+
+def test_employee_search_keeps_prefix_scoring():
+    sql, params = employee_search_sql('Avery Quinlan')
+
+    assert params[:3] == ['Avery Quinlan', 'Avery', 'Quinlan']
+    assert 'SELECT TOP 10' in sql
+    assert "LOWER(TRIM(CONCAT(ISNULL(e.FirstName, ''), ' ', ISNULL(e.LastName, '')))) = @full THEN 100" in sql
+    assert 'WHEN LOWER(e.FirstName) = @first THEN 50' in sql
+    assert 'WHEN LOWER(e.LastName) = @last THEN 50' in sql
+    assert "WHEN LOWER(e.FirstName) LIKE @first + '%' THEN 30" in sql
+    assert "WHEN LOWER(e.LastName) LIKE @last + '%' THEN 30" in sql
+    # The filter is substring-only, so SOUNDEX must not add points
+    assert 'SOUNDEX' not in sql
+    assert sql.rstrip().endswith('ORDER BY MatchScore DESC')
+
+
+def test_patient_scoring_is_phonetic():
+    shape = name_match_ranking.name_search_shape('p')
+    if name_match_ranking.RAPIDFUZZ_AVAILABLE:
+        assert shape['order_by'] == ''
+    else:
+        assert 'SOUNDEX(p.FirstName) = SOUNDEX(@first) THEN 30' in shape['match_score']
+        assert shape['order_by'] == 'ORDER BY MatchScore DESC'
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Test date references picked out of chat messages by entity extraction
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from healthcare_chatbot_service import _extract_entity_items
+
+
+def date_references(message: str):
+    return dict(_extract_entity_items(message)).get('date_references', ())
+
+
+def test_day_words():
+    assert date_references("is anyone free tomorrow or on friday?") == ('tomorrow', 'friday')
+    assert date_references("Book me for next Monday at 3pm") == ('next monday',)
+    assert date_references("next, monday") == ('monday',)
+
+
+def test_possessives():
+    assert date_references("What's today's schedule?") == ('today',)
+    assert date_references("Cancel Tuesday's appointment") == ('tuesday',)
+
+
+def test_ranges():
+    assert date_references("available monday-friday") == ('monday', 'friday')
+    assert date_references("monday/tuesday please") == ('monday', 'tuesday')
+
+
+def test_numeric_dates():
+    assert date_references("on 12/05/2024 or 1-2-24.") == ('12/05/2024', '1-2-24')
+    assert date_references("reference 112/05/2024") == ()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
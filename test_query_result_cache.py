@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test which SQL the query result cache treats as read-only
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from query_result_cache import QueryResultCache, is_read_only_sql
+
+
+def test_plain_select_is_read_only():
+    assert is_read_only_sql("SELECT e.FirstName, e.UpdatedDate FROM Employee e WHERE e.EmployeeId = 1")
+    assert is_read_only_sql("  with recent AS (SELECT 1 AS x) SELECT x FROM recent")
+
+
+def test_data_modifying_cte_is_not_read_only():
+    assert not is_read_only_sql("WITH x AS (SELECT 1) DELETE FROM Appointment")
+    assert not is_read_only_sql("WITH x AS (SELECT 1 AS id) UPDATE Appointment SET StatusId = 3")
+    assert not is_read_only_sql("WITH x AS (SELECT 1 AS id) INSERT INTO Appointment (PatientId) SELECT id FROM x")
+    assert not is_read_only_sql("WITH x AS (SELECT 1 AS id) MERGE Appointment AS a USING x ON 1 = 0 WHEN NOT MATCHED THEN INSERT DEFAULT VALUES;")
+
+
+def test_other_writes_are_not_read_only():
+    assert not is_read_only_sql("SELECT * INTO AppointmentCopy FROM Appointment")
+    assert not is_read_only_sql("SELECT 1; EXEC sp_cleanup")
+    assert not is_read_only_sql("DELETE FROM Appointment")
+
+
+def test_invalidation_drops_results_for_the_table():
+    cache = QueryResultCache(max_entries=4, ttl_seconds=60)
+    key = QueryResultCache.key("SELECT * FROM Appointment", (1,))
+    cache.insert(key, [{'AppointmentId': 1}], ['Appointment'])
+    assert cache.get(key) == [{'AppointmentId': 1}]
+
+    invalidated = []
+    cache.add_invalidation_listener(invalidated.append)
+    assert cache.invalidate_table('Appointment') == 1
+    assert cache.get(key) is None
+    assert invalidated == ['Appointment']
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test that RAG query results reach the formatter for their query intent with
+the results and query in the right places
+"""
+
+import sys
+import os
+import inspect
+import logging
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from healthcare_chatbot_service import HealthcareResponseGenerator, _query_intent
+
+# One query per _RAG_FORMATTERS entry, with text only that formatter writes
+ROUTED_QUERIES = {
+    'availability check': ("is Avery available on monday", "Here's the availability information for your query 'is Avery available on monday'"),
+    'appointment booking': ("book an appointment for Avery", "Here are the appointment details I found"),
+    'appointment modification': ("cancel my session with Avery", "Here are the appointment details I found"),
+    'provider search': ("find a therapist near me", "Here are the providers I found"),
+}
+
+RESULTS = [{
+    'EmployeeName': 'Avery Quinlan', 'EmployeeID': 7, 'WeekDay': 1,
+    'appointment_id': 42, 'first_name': 'Avery', 'last_name': 'Quinlan',
+    'specialty': 'Anxiety',
+}]
+
+SCHEMA_RESULT = {'tables': [{'name': 'Employee'}]}
+
+
+def response_generator():
+    """Generator without its database, schema or logging setup; formatting needs none of them"""
+    generator = HealthcareResponseGenerator.__new__(HealthcareResponseGenerator)
+    generator.logger = logging.getLogger('test_rag_result_formatting')
+    return generator
+
+
+def test_every_intent_has_a_routing_case():
+    assert set(ROUTED_QUERIES) == set(HealthcareResponseGenerator._RAG_FORMATTERS)
+
+
+def test_formatters_take_results_then_query():
+    for formatter in set(HealthcareResponseGenerator._RAG_FORMATTERS.values()):
+        parameters = list(inspect.signature(getattr(HealthcareResponseGenerator, formatter)).parameters)
+        assert parameters[1:3] == ['results', 'query'], formatter
+
+
+def test_each_intent_routes_to_its_formatter():
+    generator = response_generator()
+    for intent, (query, expected) in ROUTED_QUERIES.items():
+        assert _query_intent(query) == intent
+        formatted = generator._format_rag_query_results(query, RESULTS, SCHEMA_RESULT)
+        assert expected in formatted, intent
+        # Falling back to the generic message would hide a formatter failure
+        assert not formatted.startswith("I found 1 result"), intent
+
+
+def test_other_intents_use_generic_formatting():
+    formatted = response_generator()._format_rag_query_results("how many sites are there", RESULTS, SCHEMA_RESULT)
+    assert formatted.startswith("I found 1 result for 'how many sites are there' in our Employee database")
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
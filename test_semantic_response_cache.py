@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test the semantic response cache: threshold hits and misses, scoping,
+LRU eviction and the disabled path without numpy
+"""
+
+import sys
+import os
+import unittest
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import semantic_response_cache
+from semantic_response_cache import SemanticResponseCache
+
+DIMENSION = 64
+
+
+def unit_vectors(count: int, seed: int = 0):
+    """`count` orthonormal float vectors of DIMENSION entries"""
+    import numpy as np
+    matrix = np.random.default_rng(seed).standard_normal((DIMENSION, count))
+    basis, _ = np.linalg.qr(matrix)
+    return [basis[:, i] for i in range(count)]
+
+
+def at_similarity(vector, other, cosine: float):
+    """Unit vector with the given cosine similarity to `vector`, rotated towards `other`"""
+    return vector * cosine + other * (1.0 - cosine ** 2) ** 0.5
+
+
+def require_numpy():
+    if not semantic_response_cache.NUMPY_AVAILABLE:
+        raise unittest.SkipTest("numpy not installed")
+
+
+def test_hit_above_threshold():
+    require_numpy()
+    question, other = unit_vectors(2)
+    cache = SemanticResponseCache(capacity=8, threshold=0.95, seed=1)
+    cache.put(question, 'cached answer')
+
+    assert cache.get(question) == 'cached answer'
+    assert cache.get(at_similarity(question, other, 0.99)) == 'cached answer'
+    assert cache.stats()['hits'] == 2
+
+
+def test_miss_below_threshold():
+    require_numpy()
+    question, other = unit_vectors(2)
+    cache = SemanticResponseCache(capacity=8, threshold=0.95, seed=1)
+    cache.put(question, 'cached answer')
+
+    assert cache.get(at_similarity(question, other, 0.8)) is None
+    assert cache.get(other) is None
+    assert cache.stats()['misses'] == 2
+
+
+def test_scope_must_match():
+    require_numpy()
+    question, = unit_vectors(1)
+    cache = SemanticResponseCache(capacity=8, threshold=0.95, seed=1)
+    cache.put(question, 'john smith', scope=('check_availability', 'john smith'))
+
+    assert cache.get(question, scope=('check_availability', 'jon smith')) is None
+    assert cache.get(question, scope=('check_availability', 'john smith')) == 'john smith'
+
+
+def test_expired_entry_misses():
+    require_numpy()
+    question, = unit_vectors(1)
+    cache = SemanticResponseCache(capacity=8, threshold=0.95, seed=1, ttl_seconds=-1)
+    cache.put(question, 'stale answer')
+
+    assert cache.get(question) is None
+
+
+def test_eviction_cleans_buckets():
+    require_numpy()
+    first, second, third = unit_vectors(3)
+    cache = SemanticResponseCache(capacity=2, threshold=0.95, seed=1)
+    cache.put(first, 'first')
+    cache.put(second, 'second')
+    cache.get(second)
+    cache.put(third, 'third')
+
+    # The least recently used entry was replaced
+    assert cache.get(first) is None
+    assert cache.get(second) == 'second'
+    assert cache.get(third) == 'third'
+    assert cache.stats()['currsize'] == 2
+
+    # Every bucket entry points at a live entry under its current hashes
+    for table, buckets in enumerate(cache._buckets):
+        indices = sorted(index for entries in buckets.values() for index in entries)
+        assert indices == [0, 1]
+        for key, entries in buckets.items():
+            for index in entries:
+                assert cache._entry_hashes[index][table] == key
+
+
+def test_disabled_without_numpy():
+    enabled = semantic_response_cache.NUMPY_AVAILABLE
+    semantic_response_cache.NUMPY_AVAILABLE = False
+    try:
+        cache = SemanticResponseCache(capacity=8)
+    finally:
+        semantic_response_cache.NUMPY_AVAILABLE = enabled
+
+    assert not cache.enabled
+    cache.put([1.0, 0.0, 0.0], 'answer')
+    assert cache.get([1.0, 0.0, 0.0]) is None
+    assert cache.stats()['currsize'] == 0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            try:
+                test()
+                print(f"✅ {name}")
+            except unittest.SkipTest as skipped:
+                print(f"⏭️  {name}: {skipped}")
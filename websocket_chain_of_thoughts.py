@@ -6,6 +6,7 @@ Provides real-time updates of the chatbot's thinking process to the frontend
 import json
 import asyncio
 import logging
+from collections import deque
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from flask import Flask
@@ -15,6 +16,14 @@ import time
 
 logger = logging.getLogger(__name__)
 
+# Thoughts held per session while the client falls behind; beyond this the
+# oldest are dropped and the client is told how many
+MAX_QUEUED_THOUGHTS = 1000
+
+# Frames written to one session per second at most; anything that arrives
+# in between is coalesced into the next frame
+MAX_FRAMES_PER_SECOND = 60
+
 
 class ChainOfThoughtsWebSocket:
     """WebSocket handler for real-time chain of thoughts"""
@@ -26,6 +35,13 @@ class ChainOfThoughtsWebSocket:
         self.active_sessions: Dict[str, Dict] = {}
         self.thought_queues: Dict[str, List] = {}
         
+        # Thoughts waiting for the sender, per session; one long-lived
+        # background task writes every frame so emitting never blocks the caller
+        self._outbox: Dict[str, deque] = {}
+        self._dropped: Dict[str, int] = {}
+        self.total_dropped = 0
+        self._outbox_ready = threading.Condition()
+        
         if app:
             self.init_app(app)
     
@@ -43,6 +59,9 @@ class ChainOfThoughtsWebSocket:
         # Register WebSocket event handlers
         self._register_handlers()
         
+        # Single sender for the lifetime of the app
+        self.socketio.start_background_task(self._send_loop)
+        
         logger.info("✅ WebSocket initialized for chain of thoughts")
     
     def _register_handlers(self):
@@ -119,31 +138,95 @@ class ChainOfThoughtsWebSocket:
         import uuid
         return f"cot_{uuid.uuid4().hex[:12]}"
     
+    def _queue_thought(self, session_id: str, thought: Any) -> Dict[str, Any]:
+        """Stamp a thought with its ID and timestamp and store it in the session queue"""
+        if not isinstance(thought, dict):
+            thought = {'description': str(thought)}
+        
+        history = self.thought_queues.setdefault(session_id, [])
+        thought_with_meta = {
+            'id': f"thought_{len(history)}",
+            'timestamp': datetime.now().isoformat(),
+            **thought
+        }
+        history.append(thought_with_meta)
+        return thought_with_meta
+    
+    def _enqueue(self, session_id: str, thoughts: List[Dict[str, Any]]):
+        """Queue thoughts for the sender, dropping the oldest beyond MAX_QUEUED_THOUGHTS"""
+        with self._outbox_ready:
+            pending = self._outbox.get(session_id)
+            if pending is None:
+                pending = self._outbox[session_id] = deque(maxlen=MAX_QUEUED_THOUGHTS)
+            overflow = len(pending) + len(thoughts) - MAX_QUEUED_THOUGHTS
+            if overflow > 0:
+                self._dropped[session_id] = self._dropped.get(session_id, 0) + overflow
+                self.total_dropped += overflow
+            pending.extend(thoughts)
+            self._outbox_ready.notify()
+    
+    def _send_loop(self):
+        """Background sender: one frame per session per pass, at most MAX_FRAMES_PER_SECOND passes"""
+        interval = 1.0 / MAX_FRAMES_PER_SECOND
+        while True:
+            with self._outbox_ready:
+                while not self._outbox:
+                    self._outbox_ready.wait()
+                outbox, self._outbox = self._outbox, {}
+                dropped, self._dropped = self._dropped, {}
+            
+            started = time.monotonic()
+            for session_id, thoughts in outbox.items():
+                try:
+                    self._send_thoughts(session_id, list(thoughts), dropped.get(session_id, 0))
+                except Exception as e:
+                    logger.error(f"❌ WebSocket send failed for session {session_id}: {e}")
+            
+            # Whatever arrives meanwhile is coalesced into the next pass
+            remaining = interval - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+    
+    def _send_thoughts(self, session_id: str, thoughts: List[Dict[str, Any]], dropped: int = 0):
+        """Write queued thoughts as new_thought, or as one cot_batch if several or any were dropped"""
+        if len(thoughts) == 1 and not dropped:
+            self.socketio.emit('new_thought', {
+                'session_id': session_id,
+                'thought': thoughts[0]
+            }, room=session_id)
+        else:
+            self.socketio.emit('cot_batch', {
+                'type': 'cot_batch',
+                'session_id': session_id,
+                'thoughts': thoughts,
+                'dropped': dropped
+            }, room=session_id)
+    
     def emit_thought(self, session_id: str, thought: Dict[str, Any]):
         """Emit a single thought to the client"""
         if not self.socketio:
             logger.warning("WebSocket not initialized")
             return
         
-        # Add timestamp and ID to thought
-        thought_with_meta = {
-            'id': f"thought_{len(self.thought_queues.get(session_id, []))}",
-            'timestamp': datetime.now().isoformat(),
-            **thought
-        }
+        # Add timestamp and ID to thought and store it
+        thought_with_meta = self._queue_thought(session_id, thought)
         
-        # Store in queue
-        if session_id not in self.thought_queues:
-            self.thought_queues[session_id] = []
-        self.thought_queues[session_id].append(thought_with_meta)
+        # Hand off to the sender
+        self._enqueue(session_id, [thought_with_meta])
+        
+        logger.debug(f"💭 Queued thought for session {session_id}: {thought_with_meta.get('step', 'Unknown')}")
+    
+    def emit_thoughts_batch(self, session_id: str, thoughts: List[Any]):
+        """Emit several thoughts to the client; the sender writes them as one cot_batch frame"""
+        if not self.socketio:
+            logger.warning("WebSocket not initialized")
+            return
+        if not thoughts:
+            return
         
-        # Emit to client
-        self.socketio.emit('new_thought', {
-            'session_id': session_id,
-            'thought': thought_with_meta
-        }, room=session_id)
+        self._enqueue(session_id, [self._queue_thought(session_id, thought) for thought in thoughts])
         
-        logger.debug(f"💭 Emitted thought to session {session_id}: {thought.get('step', 'Unknown')}")
+        logger.debug(f"💭 Queued {len(thoughts)} thoughts for session {session_id}")
     
     def emit_thought_step(self, session_id: str, step: str, description: str, 
                          status: str = 'processing', data: Optional[Dict] = None):
@@ -309,6 +392,7 @@ class ChainOfThoughtsWebSocket:
         return {
             'active_sessions': len(self.active_sessions),
             'total_thoughts': sum(len(thoughts) for thoughts in self.thought_queues.values()),
+            'dropped_thoughts': self.total_dropped,
             'avg_thoughts_per_session': (
                 sum(len(thoughts) for thoughts in self.thought_queues.values()) / 
                 len(self.thought_queues) if self.thought_queues else 0